@@ -0,0 +1,217 @@
+# csmBench.py
+''' benchmark suite for the LCOE cost model and demos
+
+    Times assembly construction/configure, a single execute, FullFactorial
+    csmDOE grids of several sizes, the csmSensDemo sweeps and an lcoeOpt run.
+    Each benchmark runs in its own process so that its peak memory can be
+    measured.  Results (seconds, cases, cases per second, peak memory) are
+    written as JSON and can be compared against a stored baseline.
+
+    USAGE: python csmBench.py [-oFILE] [-baselineFILE] [-gridsN,N,...] [-tolPCT]
+
+      -oFILE         write results to FILE (default bench.json)
+      -baselineFILE  compare the results against FILE
+      -gridsN,N,...  FullFactorial grid sizes (default 5,10,20)
+      -tolPCT        slow-down (in percent) reported as a regression (default 10)
+'''
+
+import sys, os, json, time, resource, shutil, tempfile, platform, subprocess
+import numpy as np
+
+#-----------------------------------------
+
+class quietStdout(object):
+    ''' context manager that discards the demos' console output '''
+
+    def __enter__(self):
+        self.stdout = sys.stdout
+        sys.stdout = open(os.devnull, 'w')
+
+    def __exit__(self, *args):
+        sys.stdout.close()
+        sys.stdout = self.stdout
+
+def executeCount(lcoe):
+    ''' number of times an lcoe_csm_assembly has executed (from its timing stats) '''
+
+    return lcoe.stats.calls.get('overhead', 0)
+
+#-----------------------------------------
+# benchmarks: each returns (seconds, number of assembly executions)
+
+def benchConstruct():
+    from lcoe_csm_assembly import lcoe_csm_assembly
+    tt = time.time()
+    lcoe = lcoe_csm_assembly()
+    return time.time() - tt, 1
+
+def benchExecute():
+    from lcoe_csm_assembly import lcoe_csm_assembly
+    lcoe = lcoe_csm_assembly()
+    lcoe.quiet = True
+    tt = time.time()
+    lcoe.execute()
+    return time.time() - tt, 1
+
+def benchDOE(n):
+    import csmDOEDemo
+    csmDOEDemo.nfact = n
+    doe_problem = csmDOEDemo.csmDOE()
+    doe_problem.lcoe.quiet = True
+    tt = time.time()
+    doe_problem.run()
+    doe_problem.driver.recorders[0].close()
+    return time.time() - tt, executeCount(doe_problem.lcoe)
+
+def benchSens():
+    import csmSensDemo
+    from lcoe_csm_assembly import lcoe_csm_assembly
+    csmSensDemo.doplot = False
+
+    # count the executions of the assembly that main() creates
+    created = []
+    def factory():
+        lcoe = lcoe_csm_assembly()
+        created.append(lcoe)
+        return lcoe
+    csmSensDemo.lcoe_csm_assembly = factory
+
+    tt = time.time()
+    with quietStdout():
+        csmSensDemo.main()
+    return time.time() - tt, sum([executeCount(lcoe) for lcoe in created])
+
+def benchOpt():
+    import csmOptDemo
+    opt_problem = csmOptDemo.lcoeOpt()
+    opt_problem.lcoe.quiet = True
+    opt_problem.driver.iprint = 0
+    tt = time.time()
+    opt_problem.run()
+    opt_problem.driver.recorders[0].close()
+    return time.time() - tt, executeCount(opt_problem.lcoe)
+
+def benchmarks(grids):
+    ''' return the ordered list of (name, function, args) to run '''
+
+    bl = [('construct', benchConstruct, ()), ('execute', benchExecute, ())]
+    for n in grids:
+        bl.append(('doe{:d}x{:d}'.format(n, n), benchDOE, (n,)))
+    bl.append(('sens', benchSens, ()))
+    bl.append(('opt', benchOpt, ()))
+    return bl
+
+#-----------------------------------------
+
+def runOne(name, grids):
+    ''' run a single benchmark in this process and print its result as JSON '''
+
+    for bname, func, args in benchmarks(grids):
+        if bname == name:
+            # the demos write their recorder output to the working directory
+            here = os.getcwd()
+            tmpdir = tempfile.mkdtemp()
+            os.chdir(tmpdir)
+            try:
+                with quietStdout():
+                    seconds, cases = func(*args)
+            finally:
+                os.chdir(here)
+                shutil.rmtree(tmpdir)
+
+            # ru_maxrss is in kB on Linux and bytes on OS X
+            peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            if sys.platform == 'darwin':
+                peak /= 1024
+            print json.dumps({'seconds' : seconds, 'cases' : cases,
+                              'casesPerSec' : cases / seconds if seconds > 0 else 0.0,
+                              'peakMemMB' : peak / 1024.0})
+            return
+    raise ValueError("no benchmark named '{:}'".format(name))
+
+def runAll(grids):
+    ''' run every benchmark in a separate process and collect the results '''
+
+    results = {}
+    for name, func, args in benchmarks(grids):
+        sys.stderr.write("  running {:}...\n".format(name))
+        out = subprocess.check_output([sys.executable, os.path.abspath(__file__), '-one' + name,
+                                       '-grids' + ','.join([str(n) for n in grids])])
+        results[name] = json.loads(out.strip().splitlines()[-1])
+    return {'meta' : {'date' : time.strftime('%Y-%m-%d %H:%M:%S'), 'host' : platform.node(),
+                      'python' : platform.python_version(), 'numpy' : np.__version__},
+            'order' : [name for name, func, args in benchmarks(grids)],
+            'results' : results}
+
+#-----------------------------------------
+
+def compare(bench, baseline, tol=10.0):
+    ''' print a table of bench vs. baseline; returns the names of benchmarks slower by more than tol percent '''
+
+    print '{:12s} {:>12s} {:>12s} {:>8s} {:>10s} {:>10s}'.format(
+        'benchmark', 'base(c/s)', 'new(c/s)', 'change', 'base(MB)', 'new(MB)')
+    slower = []
+    for name in bench['order']:
+        new = bench['results'][name]
+        if name not in baseline['results']:
+            print '{:12s} {:>12s} {:12.2f}'.format(name, '-', new['casesPerSec'])
+            continue
+        old = baseline['results'][name]
+        change = 100.0 * (new['casesPerSec'] / old['casesPerSec'] - 1.0) if old['casesPerSec'] > 0 else 0.0
+        flag = ''
+        if change < -tol:
+            flag = '  <-- REGRESSION'
+            slower.append(name)
+        print '{:12s} {:12.2f} {:12.2f} {:7.1f}% {:10.1f} {:10.1f}{:}'.format(name, old['casesPerSec'],
+            new['casesPerSec'], change, old['peakMemMB'], new['peakMemMB'], flag)
+    return slower
+
+#-----------------------------------------
+
+def main():
+
+    ofname = 'bench.json'
+    basefile = None
+    grids = [5, 10, 20]
+    tol = 10.0
+    one = None
+    for arg in sys.argv[1:]:
+        if arg.startswith('-help'):
+            sys.stderr.write(__doc__)
+            exit()
+        elif arg.startswith('-one'):
+            one = arg[4:]
+        elif arg.startswith('-o'):
+            ofname = arg[2:]
+        elif arg.startswith('-baseline'):
+            basefile = arg[9:]
+        elif arg.startswith('-grids'):
+            grids = [int(n) for n in arg[6:].split(',')]
+        elif arg.startswith('-tol'):
+            tol = float(arg[4:])
+        else:
+            sys.stderr.write("\nUnrecognized argument '{:}'\n\n".format(arg))
+
+    if one is not None:
+        runOne(one, grids)
+        return
+
+    bench = runAll(grids)
+    with open(ofname, 'w') as ofh:
+        json.dump(bench, ofh, indent=1, sort_keys=True)
+    sys.stderr.write("Wrote benchmark results to '{:}'\n".format(ofname))
+
+    if basefile is not None:
+        with open(basefile) as ifh:
+            baseline = json.load(ifh)
+        if compare(bench, baseline, tol):
+            exit(1)
+    else:
+        for name in bench['order']:
+            r = bench['results'][name]
+            print '{:12s} {:10.3f} s {:8d} cases {:12.2f} cases/s {:8.1f} MB'.format(name,
+                r['seconds'], r['cases'], r['casesPerSec'], r['peakMemMB'])
+
+if __name__=="__main__":
+
+    main()
@@ -3,9 +3,18 @@
 ''' demonstrate Design of Expt of LCOE  using OpenMDAO
 
    Sweeps over a 10x10 grid of rotorDiameter and maxTipSpeed
+   Records each case in binary columns under 'doeCases'
    Saves output at each point in 'doePts.txt'
    Plots 3-d wireframe diagram of LCOE vs. rDiam and mTS
 
+   Options:
+     -rp     sweep ratedPower instead of maxTipSpeed
+     -npN    run the cases on a pool of N worker processes
+     -adaptive  refine a coarse grid near the LCOE minimum instead of
+             running the full grid (see lcoe_csm_adaptive.py)
+     -resume continue an interrupted run, skipping the cases already in
+             the checkpoint file 'doeCheckpoint.jsonl'
+
     Author: G. Scott, NREL, Jan 2013
 '''
 
@@ -15,14 +24,23 @@ import numpy as np
 from openmdao.main.api import Component, Assembly, set_as_top, VariableTree, Slot
 from openmdao.lib.drivers.api import DOEdriver
 from openmdao.lib.doegenerators.api import FullFactorial, Uniform
-from openmdao.lib.casehandlers.api import ListCaseRecorder
 
 from lcoe_csm_assembly import lcoe_csm_assembly
+from lcoe_csm_pool import lcoePool
+from lcoe_csm_recorder import ColumnarCaseRecorder, readColumns
+from lcoe_csm_adaptive import AdaptiveDOE, batchEvaluator, poolEvaluator
+from lcoe_csm_checkpoint import CheckpointRecorder, caseKey
+from lcoe_csm_casetable import CaseTable
+from lcoe_csm_batch import setInput, evaluate
 
-global doplot, rpopt
+global doplot, rpopt, nproc, nfact, adaptive, resume
 doplot = True
 #doplot = False
 rpopt = False # if True, optimize with ratedPower rather than maxTipSpeed
+nproc = 1     # if > 1, run the DOE cases on a pool of nproc worker processes
+nfact = 10    # number of levels of each variable in the FullFactorial grid
+adaptive = False # if True, refine a coarse grid adaptively instead of running the FullFactorial grid
+resume = False   # if True, skip the cases already in the checkpoint file
 
 try:
     import matplotlib.cm as cm
@@ -37,14 +55,14 @@ except:
 
 class csmDOE(Assembly):
     """Design of Expt for csm LCOE"""
-    global doplot, rpopt
+    global doplot, rpopt, nfact, resume
 
     def configure(self):
 
         # Create Optimizer instance
         self.add('driver',DOEdriver())
         
-        self.nfact = 10
+        self.nfact = nfact
         self.rdMin = 110.0
         self.rdMax = 145.0
         self.tsMin =  75.0
@@ -76,72 +94,188 @@ class csmDOE(Assembly):
                                     'lcoe.OnMcost', 'lcoe.aep', 'lcoe.ratedPower',
                                     'lcoe.maxTipSpeed']
         
-        #Simple recorder which stores the cases in memory.
-        self.driver.recorders = [ListCaseRecorder(),]
+        #Streams the cases to binary column files in 'doeCases'
+        #  and appends each one durably to 'doeCheckpoint.jsonl'
+        columns = self.driver.case_outputs + ['lcoe.rotorDiameter']
+        self.driver.recorders = [ColumnarCaseRecorder('doeCases', columns),
+                                 CheckpointRecorder('doeCheckpoint.jsonl', columns, append=resume)]
+        
+#-----------------------------------------
+
+def doeCases(doe_problem):
+    ''' return the FullFactorial cases of doe_problem as a list of {input : value} dicts,
+        in the same order that DOEdriver runs them '''
+    
+    from itertools import product
+    
+    rdVals = np.linspace(doe_problem.rdMin, doe_problem.rdMax, doe_problem.nfact)
+    if rpopt:
+        yName = 'ratedPower'
+        yVals = np.linspace(doe_problem.rpMin, doe_problem.rpMax, doe_problem.nfact)
+    else:
+        yName = 'maxTipSpeed'
+        yVals = np.linspace(doe_problem.tsMin, doe_problem.tsMax, doe_problem.nfact)
+        
+    return [{'rotorDiameter' : rd, yName : y} for rd, y in product(rdVals, yVals)]
+
+def runResumable(doe_problem, nproc, checkpoint):
+    ''' run the DOE cases not already in the checkpoint (on a pool of worker processes if nproc > 1),
+        recording each one to it as it finishes
+        returns the list of all case dicts keyed like the recorded DOEdriver cases, in DOEdriver order '''
+    
+    outputs = [name[5:] for name in doe_problem.driver.case_outputs] + ['rotorDiameter']
+    cases = doeCases(doe_problem)
+    names = sorted(cases[0])
+    keyNames = ['lcoe.' + name for name in names]
+    
+    done = dict([(caseKey(c, keyNames), c) for c in checkpoint.cases])
+    todo = [case for case in cases if caseKey(case, names) not in done]
+    if len(done) > 0:
+        sys.stderr.write("Resuming: {:d} of {:d} cases already done\n".format(len(cases) - len(todo), len(cases)))
+    
+    def finished(vals):
+        c = dict(('lcoe.' + name, val) for name, val in zip(outputs, vals))
+        checkpoint.record(c)
+        done[caseKey(c, keyNames)] = c
+    
+    if nproc > 1:
+        pool = lcoePool(nproc)
+        try:
+            for index, vals in pool.imapUnordered(todo, outputs):
+                finished(vals)
+        finally:
+            pool.close()
+    else:
+        lcoe = doe_problem.lcoe
+        lcoe.quiet = True
+        for case in todo:
+            for name in names:
+                setInput(lcoe, name, case[name])
+            vals = evaluate(lcoe, outputs)
+            finished([vals[name] for name in outputs])
+    
+    return [done[caseKey(case, names)] for case in cases]
+
+def runAdaptive(doe_problem, nproc, checkpoint):
+    ''' run an AdaptiveDOE over the same variables and bounds as doe_problem, reusing the points
+        already in the checkpoint and recording each new one to it as it finishes
+        returns a list of case dicts keyed like the recorded DOEdriver cases '''
+    
+    outputs = [name[5:] for name in doe_problem.driver.case_outputs] + ['rotorDiameter']
+    if rpopt:
+        names = ['rotorDiameter', 'ratedPower']
+        low, high = [doe_problem.rdMin, doe_problem.rpMin], [doe_problem.rdMax, doe_problem.rpMax]
+    else:
+        names = ['rotorDiameter', 'maxTipSpeed']
+        low, high = [doe_problem.rdMin, doe_problem.tsMin], [doe_problem.rdMax, doe_problem.tsMax]
+    
+    keyNames = ['lcoe.' + name for name in names]
+    known = dict([(caseKey(c, keyNames), [c['lcoe.' + name] for name in outputs]) for c in checkpoint.cases])
+    
+    def finished(case, vals):
+        checkpoint.record(dict(('lcoe.' + name, val) for name, val in zip(outputs, vals)))
+    
+    pool = None
+    if nproc > 1:
+        pool = lcoePool(nproc)
+        evaluate = poolEvaluator(pool, outputs, finished)
+    else:
+        doe_problem.lcoe.quiet = True
+        evaluate = batchEvaluator(outputs, doe_problem.lcoe, finished)
+    try:
+        doe = AdaptiveDOE(names, low, high, evaluate, outputs, known=known)
+        cases = doe.run()
+    finally:
+        if pool is not None:
+            pool.close()
+    
+    sys.stderr.write("Adaptive DOE: {:d} cases ({:d} from the checkpoint) in {:d} passes, finest cells {:}\n".format(
+                     len(cases), doe.reused, doe.passes, doe.resolution()))
+    return cases
         
 #-----------------------------------------
 
 def main():
     
-    global doplot, rpopt
+    global doplot, rpopt, nproc, adaptive, resume
     for i in range(1,len(sys.argv)):
         if sys.argv[i].startswith('-rp'):
         	  rpopt = True
+        if sys.argv[i].startswith('-np'):
+            nproc = int(sys.argv[i][3:])
+        if sys.argv[i].startswith('-adaptive'):
+            adaptive = True
+        if sys.argv[i].startswith('-resume'):
+            resume = True
     
     doe_problem = csmDOE()
 
     import time
     tt = time.time()
 
-    doe_problem.run()
+    recorder = doe_problem.driver.recorders[0]
+    checkpoint = doe_problem.driver.recorders[1]
+    # every mode appends each case to the checkpoint as soon as it finishes
+    if adaptive:
+        for c in runAdaptive(doe_problem, nproc, checkpoint):
+            recorder.record(c)
+    elif resume or nproc > 1:
+        for c in runResumable(doe_problem, nproc, checkpoint):
+            recorder.record(c)
+    else:
+        doe_problem.run()
+    recorder.close()
+    checkpoint.close()
 
     print "Elapsed time: {:.2f} seconds".format(time.time()-tt)
     
     # show results of each case
     
-    lcoeVals = []
-    diamVals = []
-    tipsVals = []
-    rpwrVals = []
-
-    X = np.zeros((doe_problem.nfact, doe_problem.nfact)) 
-    Y = np.zeros((doe_problem.nfact, doe_problem.nfact)) 
-    Z = np.zeros((doe_problem.nfact, doe_problem.nfact)) 
+    cols = CaseTable.fromColumns(readColumns(recorder.dirname))
+    lcoeVals = cols['lcoe.lcoe']
+    diamVals = cols['lcoe.rotorDiameter']
+    tipsVals = cols['lcoe.maxTipSpeed']
+    rpwrVals = cols['lcoe.ratedPower']
     
-    ofname = 'doePts.txt'
-    ofh = open(ofname,'w')
-    ofh.write('LCOE    Diam    TipSp  TurbCost     BOSCost    OnMCost    AEP\n')
-    nIter = 0
-    for c in doe_problem.driver.recorders[0].get_iterator():
+    for i in range(len(lcoeVals)):
         print 'LCOE {:7.5f} at diameter {:6.2f} m TS {:6.2f} mps'.format( 
-            c['lcoe.lcoe'], c['lcoe.rotorDiameter'], c['lcoe.maxTipSpeed']),
+            lcoeVals[i], diamVals[i], tipsVals[i]),
         print ' T {:9.1f} B {:9.1f} O {:9.1f} A {:9.1f}'.format(
-            c['lcoe.turbineCost'], c['lcoe.BOScost'], c['lcoe.OnMcost'],
-            c['lcoe.aep']),
+            cols['lcoe.turbineCost'][i], cols['lcoe.BOScost'][i], cols['lcoe.OnMcost'][i],
+            cols['lcoe.aep'][i]),
         print
-        ofh.write('{:7.5f} {:6.2f} {:6.2f} {:9.1f} {:9.1f} {:9.1f} {:9.1f}\n'.format(
-            c['lcoe.lcoe'], c['lcoe.rotorDiameter'], c['lcoe.maxTipSpeed'],
-            c['lcoe.turbineCost'], c['lcoe.BOScost'], c['lcoe.OnMcost'],
-            c['lcoe.aep']))
-        
-        lcoeVals.append(c['lcoe.lcoe'])
-        diamVals.append(c['lcoe.rotorDiameter'])
-        tipsVals.append(c['lcoe.maxTipSpeed'])
-        rpwrVals.append(c['lcoe.ratedPower'])
-        
-        ix = nIter / doe_problem.nfact
-        iy = nIter % doe_problem.nfact
-        X[ix][iy] = c['lcoe.rotorDiameter']
-        if rpopt:
-        	  Y[ix][iy] = c['lcoe.ratedPower']
-        else:
-            Y[ix][iy] = c['lcoe.maxTipSpeed']
-        Z[ix][iy] = c['lcoe.lcoe']
-        nIter += 1
-        
-    ofh.close()
+    
+    ofname = 'doePts.txt'
+    np.savetxt(ofname, np.column_stack([lcoeVals, diamVals, tipsVals, cols['lcoe.turbineCost'],
+                                        cols['lcoe.BOScost'], cols['lcoe.OnMcost'], cols['lcoe.aep']]),
+               fmt=['%7.5f', '%6.2f', '%6.2f', '%9.1f', '%9.1f', '%9.1f', '%9.1f'],
+               header='LCOE    Diam    TipSp  TurbCost     BOSCost    OnMCost    AEP', comments='')
     sys.stderr.write("Wrote output to '{:}'\n".format(ofname))
     
+    if adaptive:
+        # the adaptive points are not on a grid, so there is no wireframe to draw
+        if doplot:
+            fig = plt.figure()
+            ax = fig.add_subplot(111, projection='3d')
+            if rpopt:
+                ax.scatter(diamVals,rpwrVals, zs=lcoeVals)
+                ax.set_ylabel('Rated Power')
+            else:
+                ax.scatter(diamVals,tipsVals, zs=lcoeVals)
+                ax.set_ylabel('Tip Speed')
+            plt.title("Adaptive DOE Sample Points")
+            ax.set_xlabel('Diameter')
+            ax.set_zlabel('LCOE')
+            plt.savefig('DOEpts.png')
+            sys.stderr.write('Saved plot file DOEpts.png\n')
+            plt.show()
+        return
+    
+    if rpopt:
+        X, Y, Z = cols.grid('lcoe.rotorDiameter', 'lcoe.ratedPower', 'lcoe.lcoe')
+    else:
+        X, Y, Z = cols.grid('lcoe.rotorDiameter', 'lcoe.maxTipSpeed', 'lcoe.lcoe')
+    
     if doplot:
         fig = plt.figure()
         ax = fig.add_subplot(111, projection='3d')
@@ -159,13 +293,13 @@ def main():
         if rpopt:
             ax.set_ylabel('Rated Power')
         ax.set_zlabel('LCOE')
-        ax.set_zlim3d(0.98*min(lcoeVals), 1.02*max(lcoeVals))
+        ax.set_zlim3d(0.98*lcoeVals.min(), 1.02*lcoeVals.max())
       
         ax.plot_wireframe(X,Y,Z)  # wireframe 'surface' defined by sample points
         
         # projections of curves with constant X|Y|Z onto proper plane
         
-        cset = ax.contour(X, Y, Z, zdir='z', offset=0.96*min(lcoeVals), cmap=cm.coolwarm)
+        cset = ax.contour(X, Y, Z, zdir='z', offset=0.96*lcoeVals.min(), cmap=cm.coolwarm)
         cset = ax.contour(X, Y, Z, zdir='x', offset=doe_problem.rdMin-5.0, cmap=cm.coolwarm)
         if rpopt:
             cset = ax.contour(X, Y, Z, zdir='y', offset=doe_problem.rpMin-50.0, cmap=cm.coolwarm)
@@ -180,7 +314,7 @@ def main():
             ax.set_ylim(doe_problem.rpMin-50.0, doe_problem.rpMax)
         else:
         	  ax.set_ylim(doe_problem.tsMin, doe_problem.tsMax+5.0)
-        ax.set_zlim(0.96*min(lcoeVals), 1.02*max(lcoeVals))
+        ax.set_zlim(0.96*lcoeVals.min(), 1.02*lcoeVals.max())
 
         plt.tight_layout()
         plt.savefig('DOEpts.png')
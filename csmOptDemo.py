@@ -1,18 +1,46 @@
 # csmOptDemo.py
 # 2013 01 25
-''' demonstrate optimization of LCOE '''
+''' demonstrate optimization of LCOE 
+
+    Options:
+      -rp       optimize with ratedPower rather than maxTipSpeed
+      -smDIR    optimize a surrogate trained on the cases recorded in DIR
+                (e.g. -smdoeCases after running csmDOEDemo.py), then check
+                the optimum with the real model
+      -msN      run N optimizations from Latin hypercube starting points
+                and report the distinct optima (see lcoe_csm_multistart.py)
+      -npN      number of worker processes for -ms (default: number of cores)
+      -resume   continue an interrupted run from the last design in its
+                checkpoint file 'optCheckpoint.jsonl'; the column files in
+                'optCases' are rebuilt from the checkpoint and the new cases
+                are numbered after the checkpointed ones
+'''
 
 import sys, os, fileinput
+import numpy as np
 from openmdao.main.api import Component, Assembly, set_as_top, VariableTree, Slot
 from openmdao.lib.drivers.api import SLSQPdriver, CONMINdriver
-from openmdao.lib.casehandlers.api import ListCaseRecorder
 
 from lcoe_csm_assembly import lcoe_csm_assembly
+from lcoe_csm_recorder import ColumnarCaseRecorder, readColumns
+from lcoe_csm_surrogate import surrogateFromCases
+from lcoe_csm_checkpoint import CheckpointRecorder
 
-global doplot, rpopt
+global doplot, rpopt, smdir, nstarts, nproc, resume, caseDir, checkpointFile
 doplot = True
 #doplot = False
 rpopt = False
+smdir = None  # if set, optimize a surrogate trained on the DOE cases in this directory
+nstarts = 0   # if > 0, run a multi-start optimization from this many starting points
+nproc = None  # worker processes for the multi-start optimization
+resume = False # if True, continue from the last design in the checkpoint file
+caseDir = 'optCases' # the cases are streamed to column files here (None for no column files)
+checkpointFile = 'optCheckpoint.jsonl' # every case is appended here (None for no checkpoint)
+
+# design variable bounds
+rdBounds = (110., 145.)
+tsBounds = (75., 100.)
+rpBounds = (4500., 5500.)
 
 try:
     import matplotlib.cm as cm
@@ -27,7 +55,7 @@ except:
 
 class lcoeOpt(Assembly):
     """Unconstrained optimization of LCOE"""
-    global doplot, rpopt
+    global doplot, rpopt, smdir, resume, caseDir, checkpointFile
 
     def configure(self):
 
@@ -35,7 +63,13 @@ class lcoeOpt(Assembly):
         self.add('driver', CONMINdriver())
 
         # Create LCOE instances
-        self.add('lcoe', lcoe_csm_assembly())
+        if smdir is not None:
+            if rpopt:
+                self.add('lcoe', surrogateFromCases(smdir, ['rotorDiameter', 'ratedPower']))
+            else:
+                self.add('lcoe', surrogateFromCases(smdir, ['rotorDiameter', 'maxTipSpeed']))
+        else:
+            self.add('lcoe', lcoe_csm_assembly())
 
         # Driver process definition
         self.driver.workflow.add('lcoe')
@@ -47,62 +81,161 @@ class lcoeOpt(Assembly):
         self.driver.delfun = 0.001  # default is 0.1
         #self.driver.fdch = .0001
         #self.driver.fdchm = .0001   
+        # gradients of lcoe.lcoe come from lcoe_csm_assembly.provideJ() rather than
+        # finite differences of the whole assembly
              
         # Objective
         self.driver.add_objective('lcoe.lcoe')
 
         # Design Variables
-        self.driver.add_parameter('lcoe.rotorDiameter', low=110., high=145.)
+        self.driver.add_parameter('lcoe.rotorDiameter', low=rdBounds[0], high=rdBounds[1])
         if rpopt:
-            self.driver.add_parameter('lcoe.ratedPower',    low=4500.,  high=5500.)
+            self.driver.add_parameter('lcoe.ratedPower',    low=rpBounds[0], high=rpBounds[1])
         else:
-            self.driver.add_parameter('lcoe.maxTipSpeed',   low=75.,  high=100.)
+            self.driver.add_parameter('lcoe.maxTipSpeed',   low=tsBounds[0], high=tsBounds[1])
         self.driver.case_outputs = ['lcoe.lcoe'] #,'lcoe.ratedPower','lcoe.maxTipSpeed'] 
           # lcoe.lcoe will be named 'Objective' in case recorder
         
         
-        #Simple recorder which stores the cases in memory.
-        self.driver.recorders = [ListCaseRecorder(),]
+        #Streams the cases to binary column files in caseDir
+        if rpopt:
+            columns = ['Objective', 'lcoe.rotorDiameter', 'lcoe.ratedPower']
+        else:
+            columns = ['Objective', 'lcoe.rotorDiameter', 'lcoe.maxTipSpeed']
+        self.driver.recorders = []
+        checkpoint = None
+        if checkpointFile is not None:
+            checkpoint = CheckpointRecorder(checkpointFile, columns, append=resume)
+        if caseDir is not None:
+            recorder = ColumnarCaseRecorder(caseDir, columns)
+            if checkpoint is not None:
+                # on resume the column files may be a chunk behind, so rebuild them from the
+                # checkpoint, which holds every finished case
+                for case in checkpoint.cases:
+                    recorder.record(case)
+            self.driver.recorders.append(recorder)
+        if checkpoint is not None:
+            self.driver.recorders.append(checkpoint)
         
 #-----------------------------------------
 
+def mainMultiStart():
+    ''' run and report a multi-start optimization '''
+    
+    from lcoe_csm_multistart import multiStart
+    
+    import time
+    tt = time.time()
+    
+    res = multiStart(nstarts, nproc, rpopt, smdir)
+    
+    names = res['names']
+    print 'Start  {:>16s} {:>16s}   {:>16s} {:>16s}   LCOE     Iter'.format(
+        'start ' + names[0][:10], 'start ' + names[1][:10], names[0][:16], names[1][:16])
+    for r in res['results']:
+        print '{:5d}  {:16.2f} {:16.2f}   {:16.2f} {:16.2f}   {:7.5f} {:4d}'.format(r['index'],
+            r['start'][0], r['start'][1], r['x'][0], r['x'][1], r['lcoe'], len(r['trajectory']))
+    
+    print "\n{:d} distinct optima".format(len(res['optima']))
+    for opt in res['optima']:
+        print '  LCOE {:7.5f} at ({:.2f}, {:.2f}) from {:d} starts'.format(opt['lcoe'],
+            opt['x'][0], opt['x'][1], len(opt['starts']))
+    print 'Minimum found at ({:6.2f}, {:6.2f})'.format(res['best']['x'][0], res['best']['x'][1])
+    print "Elapsed time: {:.2f} seconds".format(time.time()-tt)
+    
+    if doplot:
+        fig = plt.figure()
+        ax = fig.add_subplot(111)
+        for r in res['results']:
+            traj = np.array(r['trajectory'])
+            ax.plot(traj[:,1], traj[:,2], '-')
+            ax.plot(traj[0,1], traj[0,2], 'k+')
+        best = res['best']['x']
+        ax.plot(best[0], best[1], 'ro', ms=8)
+        ax.set_xlabel('Diameter')
+        ax.set_ylabel('Rated Pwr' if rpopt else 'Tip Speed')
+        plt.title("Multi-start optimization trajectories")
+        plt.savefig('optraj.png')
+        sys.stderr.write('Saved plot file optraj.png\n')
+        plt.show()
+
 def main():
     
-    global doplot, rpopt
+    global doplot, rpopt, smdir, nstarts, nproc, resume
     for i in range(1,len(sys.argv)):
         if sys.argv[i].startswith('-rp'):
             rpopt = True
+        if sys.argv[i].startswith('-sm'):
+            smdir = sys.argv[i][3:]
+        if sys.argv[i].startswith('-ms'):
+            nstarts = int(sys.argv[i][3:])
+        if sys.argv[i].startswith('-np'):
+            nproc = int(sys.argv[i][3:])
+        if sys.argv[i].startswith('-resume'):
+            resume = True
+    
+    if nstarts > 0:
+        mainMultiStart()
+        return
     
     opt_problem = lcoeOpt()
+    
+    previous = 0 # iterations (recorded cases) of the interrupted run
+    if resume and checkpointFile is not None:
+        # CONMIN's internal state isn't saved, so the descent continues from the last recorded design
+        checkpoint = opt_problem.driver.recorders[-1]
+        previous = checkpoint.previous
+        if previous > 0:
+            last = checkpoint.cases[-1]
+            opt_problem.lcoe.rotorDiameter = last['lcoe.rotorDiameter']
+            if rpopt:
+                opt_problem.lcoe.ratedPower = last['lcoe.ratedPower']
+            else:
+                opt_problem.lcoe.maxTipSpeed = last['lcoe.maxTipSpeed']
+            sys.stderr.write("Resuming at iteration {:d} from the last checkpointed design (LCOE {:7.5f}, "
+                             "best so far {:7.5f})\n".format(previous + 1, last['Objective'],
+                             checkpoint.best('Objective')['Objective']))
 
     import time
     tt = time.time()
 
     opt_problem.run()
+    for recorder in opt_problem.driver.recorders:
+        recorder.close()
 
     print "\n"
     print 'Minimum found at ({:6.2f}m {:6.2f}mps)'.format(opt_problem.lcoe.rotorDiameter,
                                              opt_problem.lcoe.maxTipSpeed)
     print "Elapsed time: {:.2f} seconds".format(time.time()-tt)
+    if caseDir is not None:
+        ncases = opt_problem.driver.recorders[0].ncases
+        print "{:d} iterations ({:d} before the resume)".format(ncases, previous)
+    
+    if smdir is not None:
+        # confirm the surrogate optimum with the real model
+        lcoe = lcoe_csm_assembly()
+        lcoe.rotorDiameter = opt_problem.lcoe.rotorDiameter
+        lcoe.maxTipSpeed = opt_problem.lcoe.maxTipSpeed
+        lcoe.ratedPower = opt_problem.lcoe.ratedPower
+        lcoe.execute()
+        print 'Surrogate LCOE {:7.5f}  model LCOE {:7.5f}'.format(opt_problem.lcoe.lcoe, lcoe.lcoe)
     
     # show results of each case (as stored in caseRecorder)
     
-    lcoeVals = []
-    diamVals = []
-    tipsVals = []
-    rpwrVals = []
-    for c in opt_problem.driver.recorders[0].get_iterator():
-        print 'LCOE {:7.5f} at diameter {:6.2f} m '.format( 
-            c['Objective'], c['lcoe.rotorDiameter']),
+    cols = readColumns(caseDir)
+    lcoeVals = cols['Objective']
+    diamVals = cols['lcoe.rotorDiameter']
+    if rpopt:
+        rpwrVals = cols['lcoe.ratedPower']
+    else:
+        tipsVals = cols['lcoe.maxTipSpeed']
+    for i in range(len(lcoeVals)):
+        print '{:4d} LCOE {:7.5f} at diameter {:6.2f} m '.format( 
+            i+1, lcoeVals[i], diamVals[i]),
         if rpopt:
-            print ' RP {:6.1f} kW'.format( c['lcoe.ratedPower']  )
-            rpwrVals.append(c['lcoe.ratedPower'])
+            print ' RP {:6.1f} kW'.format( rpwrVals[i] )
         else:
-            print 'TS {:6.2f} mps'.format( c['lcoe.maxTipSpeed'] )
-            tipsVals.append(c['lcoe.maxTipSpeed'])
-            
-        lcoeVals.append(c['Objective'])
-        diamVals.append(c['lcoe.rotorDiameter'])
+            print 'TS {:6.2f} mps'.format( tipsVals[i] )
     
     if doplot:
         fig = plt.figure()
@@ -0,0 +1,220 @@
+"""
+lcoe_csm_adaptive.py
+
+Adaptive refinement of a two-variable design of experiments.
+
+AdaptiveDOE starts from a coarse n0 x n0 grid over two assembly inputs
+(e.g. rotorDiameter and maxTipSpeed) and repeatedly splits grid cells in
+four.  A cell is split while it is larger than the target resolution and
+either
+  - one of its corners is within nearTol (relative) of the best LCOE found
+    so far, or
+  - its estimated error is above errTol: a quarter of the difference
+    between the value at its parent's centre and the mean of its parent's
+    corners, relative to the best value (the starting cells use the
+    spread of their corner values).
+All new points of one refinement pass are evaluated together, as a batch
+on one assembly or on an lcoePool.  Points are stored on an integer
+lattice at the finest resolution, so points shared by neighbouring cells
+are evaluated once.
+
+Given finished=, the evaluators report each point as it completes (one
+at a time on the assembly, in completion order on a pool), so a caller
+can checkpoint a pass before it ends.  Points in known, e.g. read back
+from the checkpoint of an interrupted run, are reused rather than
+evaluated again; since the refinement is deterministic, a resumed run
+follows the same passes and evaluates only the points it had not reached.
+
+Cases are returned as dicts keyed like the csmDOE recorder columns
+('lcoe.lcoe', 'lcoe.rotorDiameter', ...) so they can be recorded with a
+ColumnarCaseRecorder.
+
+    doe = AdaptiveDOE(['rotorDiameter', 'maxTipSpeed'], [110., 75.], [145., 100.],
+                      batchEvaluator(['lcoe', 'aep']))
+    cases = doe.run()
+"""
+
+import numpy as np
+
+from lcoe_csm_batch import lcoeBatch
+from lcoe_csm_checkpoint import caseKey
+
+#-----------------------------------------
+
+def batchEvaluator(outputs, lcoe=None, finished=None):
+    ''' return a function evaluating a list of {input : value} dicts with lcoeBatch on one assembly
+        (outputs[0] is the objective); finished(case, output values) is called after each case '''
+
+    if lcoe is None:
+        from lcoe_csm_assembly import lcoe_csm_assembly
+        lcoe = lcoe_csm_assembly()
+
+    def evaluate(cases):
+        names = sorted(cases[0])
+        if finished is None:
+            res = lcoeBatch(dict([(name, [case[name] for case in cases]) for name in names]), outputs, lcoe)
+            return [[res[name][i] for name in outputs] for i in range(len(cases))]
+        results = []
+        for case in cases:
+            res = lcoeBatch(dict([(name, [case[name]]) for name in names]), outputs, lcoe)
+            vals = [res[name][0] for name in outputs]
+            finished(case, vals)
+            results.append(vals)
+        return results
+    return evaluate
+
+def poolEvaluator(pool, outputs, finished=None):
+    ''' return a function evaluating a list of {input : value} dicts on an lcoePool;
+        finished(case, output values) is called as each case completes '''
+
+    def evaluate(cases):
+        if finished is None:
+            return pool.map(cases, outputs)
+        results = [None] * len(cases)
+        for i, vals in pool.imapUnordered(cases, outputs):
+            finished(cases[i], vals)
+            results[i] = vals
+        return results
+    return evaluate
+
+#-----------------------------------------
+
+class AdaptiveDOE(object):
+    ''' coarse grid over two inputs, refined where the objective is near its best or poorly resolved '''
+
+    def __init__(self, names, low, high, evaluate, outputs=None, n0=5, maxDepth=4,
+                 nearTol=0.01, errTol=0.001, maxEvals=None, known=None):
+        ''' names    : the two assembly inputs varied
+            low,high : their bounds
+            evaluate : function taking a list of {input : value} dicts and returning a list of
+                       output-value lists, the first output being the objective (minimized)
+            outputs  : names of the output values returned by evaluate (default ['lcoe'])
+            n0       : number of levels of each input in the starting grid
+            maxDepth : number of times a starting cell may be halved (sets the target resolution)
+            nearTol  : relative distance from the best objective within which cells are refined
+            errTol   : relative refinement error above which cells are refined
+            maxEvals : optional limit on the number of evaluations
+            known    : optional dict of {caseKey(case, names) : output values} of points already
+                       evaluated, which are reused (and counted against maxEvals) '''
+
+        self.names = list(names)
+        self.low = np.asarray(low, dtype=float)
+        self.high = np.asarray(high, dtype=float)
+        self.evaluate = evaluate
+        self.outputs = outputs if outputs is not None else ['lcoe']
+        self.n0 = n0
+        self.maxDepth = maxDepth
+        self.nearTol = nearTol
+        self.errTol = errTol
+        self.maxEvals = maxEvals
+        self.known = known if known is not None else {}
+
+        self.scale = 2**maxDepth                      # lattice steps per starting cell
+        self.step = (self.high - self.low) / ((n0 - 1) * self.scale)
+        self.values = {}                              # lattice node -> output values
+        self.order = []                               # lattice nodes in evaluation order
+        self.cells = []                               # leaf cells as (i, j, size, err)
+        self.passes = 0
+        self.reused = 0                               # points taken from known
+
+    def _x(self, node):
+        return self.low + self.step * np.asarray(node)
+
+    def _f(self, node):
+        return self.values[node][0]
+
+    def _evaluateNodes(self, nodes):
+        ''' evaluate the nodes not yet evaluated and not known, in one batch '''
+
+        nodes = [node for node in sorted(set(nodes)) if node not in self.values]
+        if self.maxEvals is not None:
+            nodes = nodes[:max(0, self.maxEvals - len(self.order))]
+        if len(nodes) == 0:
+            return
+        todo = []
+        for node in nodes:
+            case = dict(zip(self.names, self._x(node).tolist()))
+            key = caseKey(case, self.names)
+            if key in self.known:
+                self.values[node] = list(self.known[key])
+                self.reused += 1
+            else:
+                todo.append((node, case))
+        if len(todo) > 0:
+            for (node, case), vals in zip(todo, self.evaluate([case for node, case in todo])):
+                self.values[node] = list(vals)
+        self.order += nodes
+
+    def _corners(self, cell):
+        i, j, size, err = cell
+        return [(i, j), (i + size, j), (i, j + size), (i + size, j + size)]
+
+    def best(self):
+        ''' (input values, output values) of the best point found so far '''
+
+        node = min(self.order, key=self._f)
+        return dict(zip(self.names, self._x(node).tolist())), self.values[node]
+
+    def _refine(self, cell, best):
+        i, j, size, err = cell
+        if size == 1:
+            return False
+        fmin = min([self._f(node) for node in self._corners(cell)])
+        return fmin <= best + self.nearTol * abs(best) or err > self.errTol
+
+    def run(self):
+        ''' run the starting grid and refinement passes until no cell qualifies
+            returns the evaluated cases in evaluation order (see cases()) '''
+
+        s = self.scale
+        self._evaluateNodes([(a * s, b * s) for a in range(self.n0) for b in range(self.n0)])
+        best = min([self._f(node) for node in self.order])
+        for a in range(self.n0 - 1):
+            for b in range(self.n0 - 1):
+                cell = (a * s, b * s, s, 0.0)
+                vals = [self._f(node) for node in self._corners(cell)]
+                self.cells.append((a * s, b * s, s, (max(vals) - min(vals)) / abs(best)))
+
+        while self.maxEvals is None or len(self.order) < self.maxEvals:
+            best = min([self._f(node) for node in self.order])
+            split = [cell for cell in self.cells if self._refine(cell, best)]
+            if len(split) == 0:
+                break
+
+            nodes = []
+            for i, j, size, err in split:
+                h = size // 2
+                nodes += [(i + h, j + h), (i + h, j), (i, j + h), (i + size, j + h), (i + h, j + size)]
+            self._evaluateNodes(nodes)
+            self.passes += 1
+
+            splitSet = set(split)
+            cells = [cell for cell in self.cells if cell not in splitSet]
+            for cell in split:
+                i, j, size, err = cell
+                h = size // 2
+                if (i + h, j + h) not in self.values:
+                    cells.append(cell)      # evaluation budget ran out
+                    continue
+                fc = self._f((i + h, j + h))
+                # the error of a smooth function falls with the square of the cell size
+                err = 0.25 * abs(fc - np.mean([self._f(node) for node in self._corners(cell)])) / abs(best)
+                cells += [(i, j, h, err), (i + h, j, h, err), (i, j + h, h, err), (i + h, j + h, h, err)]
+            self.cells = cells
+
+        return self.cases()
+
+    def cases(self, prefix='lcoe.'):
+        ''' evaluated points as dicts of {prefix + name : value} for the inputs and outputs '''
+
+        cases = []
+        for node in self.order:
+            case = dict([(prefix + name, x) for name, x in zip(self.names, self._x(node).tolist())])
+            case.update(dict([(prefix + name, v) for name, v in zip(self.outputs, self.values[node])]))
+            cases.append(case)
+        return cases
+
+    def resolution(self):
+        ''' size of the finest cells (input units) '''
+
+        return self.step * min([cell[2] for cell in self.cells])
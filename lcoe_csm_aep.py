@@ -0,0 +1,121 @@
+"""
+lcoe_csm_aep.py
+
+Cached power curves and vectorized Weibull AEP for site screening.
+
+The power curve produced by aep1 (the 'powerCurve' passthrough of
+lcoe_csm_assembly) depends only on the turbine inputs in CURVE_INPUTS and,
+when airDensity is 0, on the altitude and hub height that set the
+standard air density.  powerCurveCache keeps one curve per distinct set of
+those inputs, so it is computed by the assembly once per turbine design.  weibullAEP()
+integrates one curve against the Weibull wind distributions of any number
+of sites (windSpeed50m, weibullK, shearExponent, hubHeight and losses
+may all be arrays) in a few NumPy operations.
+
+    curves = powerCurveCache()
+    curve = curves.curveFor(lcoe)
+    aep, aepPerTurbine, cf = weibullAEP(curve, windSpeed50m=u50, weibullK=k)
+
+weibullAEP() integrates the curve with its own bins, which need not be
+the ones used inside aep1; aepRatio() compares the two at the assembly's
+current site so a screening study can be checked against the full model.
+"""
+
+import math
+import numpy as np
+
+# inputs that determine the power curve
+CURVE_INPUTS = ['rotorDiameter', 'maxTipSpeed', 'ratedPower', 'maxPowerCoefficient', 'optTipSpeedRatio',
+                'cutInWindSpeed', 'cutOutWindSpeed', 'drivetrainDesign', 'airDensity']
+# inputs that also determine it when airDensity is 0: aep1 then uses the standard air density at
+# altitude + hubHeight (lcoe_csm_kernel.standardAirDensity)
+DENSITY_INPUTS = ['altitude', 'hubHeight']
+
+HOURS_PER_YEAR = 8760.0
+
+#-----------------------------------------
+
+class powerCurveCache(object):
+    ''' power curves of lcoe_csm_assembly keyed by the values of CURVE_INPUTS (and DENSITY_INPUTS) '''
+
+    def __init__(self):
+        self.curves = {}
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, lcoe):
+        names = CURVE_INPUTS + (DENSITY_INPUTS if lcoe.airDensity == 0.0 else [])
+        return tuple([float(getattr(lcoe, name)) for name in names])
+
+    def curveFor(self, lcoe):
+        ''' return the power curve for the current turbine inputs of lcoe, executing it only on a miss '''
+
+        key = self.key(lcoe)
+        if key in self.curves:
+            self.hits += 1
+        else:
+            self.misses += 1
+            lcoe.execute()
+            self.curves[key] = np.array(lcoe.powerCurve, dtype=float)
+        return self.curves[key]
+
+#-----------------------------------------
+
+def curveArrays(curve):
+    ''' return (wind speeds, power) from a power curve stored as 2 x N or N x 2 '''
+
+    curve = np.asarray(curve, dtype=float)
+    if curve.shape[0] == 2 and curve.shape[1] != 2:
+        return curve[0], curve[1]
+    return curve[:, 0], curve[:, 1]
+
+def weibullAEP(curve, windSpeed50m, weibullK, shearExponent=0.143, hubHeight=90.0,
+               soilingLosses=0.0, arrayLosses=0.0, availability=1.0, turbineNumber=1,
+               binWidth=0.25, chunkSize=10000):
+    ''' AEP of a plant for many sites from one power curve
+
+        curve         : power curve (wind speed m/s, power kW)
+        windSpeed50m .. turbineNumber : site values, scalars or arrays broadcast together; hubHeight
+                        scales the wind speed only, the air density stays that of the curve
+        binWidth      : wind speed resolution (m/s) of the integration
+        chunkSize     : sites integrated per NumPy block, bounding temporary memory
+
+        returns (aep kWh, aepPerTurbine kWh, capacityFactor), arrays of the broadcast shape '''
+
+    speeds, power = curveArrays(curve)
+    edges = np.arange(0.0, speeds.max() + binWidth, binWidth)
+    mids = 0.5 * (edges[1:] + edges[:-1])
+    pmid = np.interp(mids, speeds, power, left=0.0, right=0.0)
+    rated = power.max()
+
+    args = np.broadcast_arrays(*[np.asarray(a, dtype=float) for a in
+                                 (windSpeed50m, weibullK, shearExponent, hubHeight,
+                                  soilingLosses, arrayLosses, availability, turbineNumber)])
+    shape = args[0].shape
+    u50, k, alpha, hh, soil, array, avail, nturb = [a.ravel() for a in args]
+
+    gamma = np.vectorize(math.gamma)
+    meanPower = np.zeros(len(u50))
+    for i in range(0, len(u50), chunkSize):
+        s = slice(i, i + chunkSize)
+        uhub = u50[s] * (hh[s] / 50.0)**alpha[s]
+        scale = uhub / gamma(1.0 + 1.0 / k[s])
+        cdf = 1.0 - np.exp(-(edges[np.newaxis, :] / scale[:, np.newaxis])**k[s][:, np.newaxis])
+        meanPower[s] = np.diff(cdf, axis=1).dot(pmid)
+
+    net = meanPower * (1.0 - soil) * (1.0 - array) * avail
+    aepPerTurbine = net * HOURS_PER_YEAR
+    aep = aepPerTurbine * nturb
+    cf = net / rated
+    return aep.reshape(shape), aepPerTurbine.reshape(shape), cf.reshape(shape)
+
+def aepRatio(lcoe, curves=None):
+    ''' ratio of weibullAEP() to the assembly's own aep at its current inputs '''
+
+    if curves is None:
+        curves = powerCurveCache()
+    curve = curves.curveFor(lcoe)
+    lcoe.execute()
+    aep = weibullAEP(curve, lcoe.windSpeed50m, lcoe.weibullK, lcoe.shearExponent, lcoe.hubHeight,
+                     lcoe.soilingLosses, lcoe.arrayLosses, lcoe.availability, lcoe.turbineNumber)[0]
+    return float(aep) / lcoe.aep
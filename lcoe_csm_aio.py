@@ -0,0 +1,282 @@
+"""
+lcoe_csm_aio.py
+
+asyncio client for the LCOE evaluation service in lcoe_csm_server.py.
+
+The assemblies run in the server's pool of warm worker processes, so an
+event loop can keep every core busy without blocking on execute().  The
+client holds up to `concurrency` connections (the server answers each
+connection's requests in order) and never has more requests in flight,
+so the worker pool is not oversubscribed.
+
+    async with lcoeAsyncClient(concurrency=8) as client:
+        res = await client.evaluate({'rotorDiameter' : 130.0}, timeout=10.0)
+        async for index, res in client.evaluateMany(cases):
+            ...
+
+evaluateMany() takes a list, an iterator or an async iterator of input
+dicts and reads the next case only when a slot is free, so a large or
+unbounded stream is consumed at the rate the server evaluates it.  It
+yields (index, {output : value}) as cases finish (in case order with
+ordered=True); a failed or timed-out case yields {'error' : message}.
+A request that times out or is cancelled drops its connection, so a late
+reply can never be read as the answer to a later request; the server
+still finishes the abandoned evaluation, so its workers can briefly be
+busier than `concurrency` after timeouts.
+
+startServer() launches lcoe_csm_server.py as a subprocess and waits for
+it to accept connections; stopServer() terminates it.
+
+This module is Python 3 (3.7+); the server and assemblies keep running
+under the Python 2 OpenMDAO environment.
+
+USAGE: python3 lcoe_csm_aio.py [-npN] [-nN] [-concurrencyN] [-pythonPATH]
+"""
+
+import os, sys, json, time, asyncio
+
+# as in lcoe_csm_server.py, which is Python 2 and not importable here
+DEFAULT_PORT = 8642
+
+#-----------------------------------------
+
+class lcoeServiceError(Exception):
+    pass
+
+async def startServer(nproc=None, port=DEFAULT_PORT, socketPath=None, cacheFile=None,
+                      python='python2', startTimeout=60.0):
+    ''' start lcoe_csm_server.py in a subprocess and return it once it accepts connections '''
+
+    args = [python, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'lcoe_csm_server.py')]
+    if nproc is not None:
+        args.append('-np{:d}'.format(nproc))
+    if socketPath is not None:
+        args.append('-socket' + socketPath)
+    else:
+        args.append('-port{:d}'.format(port))
+    if cacheFile is not None:
+        args.append('-cache' + cacheFile)
+    proc = await asyncio.create_subprocess_exec(*args)
+
+    deadline = time.time() + startTimeout
+    while True:
+        if proc.returncode is not None:
+            raise lcoeServiceError('server exited with status {:d}'.format(proc.returncode))
+        try:
+            if socketPath is not None:
+                reader, writer = await asyncio.open_unix_connection(socketPath)
+            else:
+                reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        except OSError:
+            if time.time() > deadline:
+                proc.terminate()
+                await proc.wait()
+                raise lcoeServiceError('server did not start within {:g} s'.format(startTimeout))
+            await asyncio.sleep(0.1)
+            continue
+        writer.close()
+        if hasattr(writer, 'wait_closed'):
+            await writer.wait_closed()
+        return proc
+
+async def stopServer(proc):
+    ''' terminate a server started by startServer() '''
+
+    if proc.returncode is None:
+        proc.terminate()
+    await proc.wait()
+
+#-----------------------------------------
+
+class lcoeAsyncClient(object):
+    ''' bounded set of connections to an lcoe_csm_server '''
+
+    def __init__(self, address=('127.0.0.1', DEFAULT_PORT), concurrency=4):
+        ''' address     : (host, port) of a TCP server, or the path of a Unix socket
+            concurrency : maximum number of requests in flight (and of open connections) '''
+
+        self.address = address
+        self.concurrency = concurrency
+        self.slots = None
+        self.idle = []
+        self.nextId = 0
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def _connect(self):
+        if isinstance(self.address, str):
+            return await asyncio.open_unix_connection(self.address)
+        return await asyncio.open_connection(*self.address)
+
+    async def _exchange(self, conn, request):
+        reader, writer = conn
+        writer.write((json.dumps(request) + '\n').encode())
+        await writer.drain()
+        line = await reader.readline()
+        if len(line) == 0:
+            raise lcoeServiceError('connection closed by server')
+        return json.loads(line.decode())
+
+    async def request(self, request, timeout=None):
+        ''' send one request dict and return the reply dict
+            timeout : seconds to wait for a slot and the reply (None waits indefinitely);
+                      asyncio.TimeoutError is raised when it expires '''
+
+        if self.slots is None:
+            # created here so the semaphore belongs to the running loop
+            self.slots = asyncio.Semaphore(self.concurrency)
+        self.nextId += 1
+        request['id'] = self.nextId
+
+        async def exchange():
+            async with self.slots:
+                conn = self.idle.pop() if self.idle else await self._connect()
+                try:
+                    reply = await self._exchange(conn, request)
+                except BaseException:
+                    # timed out, cancelled or broken: a late reply must not reach another request
+                    conn[1].close()
+                    raise
+                self.idle.append(conn)
+                return reply
+
+        reply = await asyncio.wait_for(exchange(), timeout)
+        if 'error' in reply:
+            raise lcoeServiceError(reply['error'])
+        return reply
+
+    async def evaluate(self, inputs, outputs=None, timeout=None):
+        ''' evaluate one design point; returns {output : value} '''
+
+        request = {'inputs' : inputs}
+        if outputs is not None:
+            request['outputs'] = list(outputs)
+        res = (await self.request(request, timeout))['results']
+        if 'error' in res:
+            raise lcoeServiceError(res['error'])
+        return res
+
+    async def evaluateMany(self, cases, outputs=None, timeout=None, ordered=False):
+        ''' async generator of (index, {output : value}) for an iterable or async iterable of
+            input dicts, with at most `concurrency` cases in flight; failed cases give {'error' : message} '''
+
+        async def run(index, inputs):
+            try:
+                return index, await self.evaluate(inputs, outputs, timeout)
+            except asyncio.TimeoutError:
+                return index, {'error' : 'timed out after {:g} s'.format(timeout)}
+            except (lcoeServiceError, OSError, ValueError) as err:
+                # ValueError: a malformed reply (json.JSONDecodeError is a subclass)
+                return index, {'error' : '{:}'.format(err)}
+
+        if hasattr(cases, '__aiter__'):
+            source = cases.__aiter__()
+            async def nextCase():
+                return await source.__anext__()
+        else:
+            source = iter(cases)
+            async def nextCase():
+                try:
+                    return next(source)
+                except StopIteration:
+                    raise StopAsyncIteration
+
+        pending = set()
+        done = {}
+        index = 0
+        nextYield = 0
+        exhausted = False
+        try:
+            while True:
+                # backpressure: read another case only when a slot is free (results held back
+                # for ordering occupy a slot, so a slow case cannot make the buffer grow)
+                while not exhausted and len(pending) + len(done) < self.concurrency:
+                    try:
+                        inputs = await nextCase()
+                    except StopAsyncIteration:
+                        exhausted = True
+                        break
+                    pending.add(asyncio.ensure_future(run(index, inputs)))
+                    index += 1
+                if not pending:
+                    break
+                finished, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in finished:
+                    i, res = task.result()
+                    if not ordered:
+                        yield i, res
+                    else:
+                        done[i] = res
+                while nextYield in done:
+                    yield nextYield, done.pop(nextYield)
+                    nextYield += 1
+        finally:
+            # consumer stopped early or was cancelled
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.wait(pending)
+
+    async def stats(self):
+        ''' server latency and queue-depth statistics '''
+
+        return (await self.request({'stats' : True}))['stats']
+
+    async def close(self):
+        while self.idle:
+            self.idle.pop()[1].close()
+
+#-----------------------------------------
+
+async def _demo(nproc, n, concurrency, python):
+    proc = await startServer(nproc, python=python)
+    try:
+        cases = [{'rotorDiameter' : 110.0 + 35.0 * i / max(n - 1, 1)} for i in range(n)]
+        t0 = time.time()
+        async with lcoeAsyncClient(concurrency=concurrency) as client:
+            results = [None] * n
+            async for i, res in client.evaluateMany(cases, timeout=60.0):
+                results[i] = res
+            stats = await client.stats()
+        sys.stderr.write("{:d} evaluations in {:.2f} s with {:d} requests in flight\n".format(n, time.time() - t0, concurrency))
+        for case, res in zip(cases, results):
+            if 'error' in res:
+                print('{:8.2f} {:}'.format(case['rotorDiameter'], res['error']))
+            else:
+                print('{:8.2f} {:10.6f}'.format(case['rotorDiameter'], res['lcoe']))
+        sys.stderr.write("server max in flight {:d}\n".format(stats['maxInflight']))
+    finally:
+        await stopServer(proc)
+
+def main():
+
+    nproc = None
+    n = 64
+    concurrency = None
+    python = 'python2'
+    for arg in sys.argv[1:]:
+        if arg.startswith('-help'):
+            sys.stderr.write(__doc__)
+            exit()
+        elif arg.startswith('-np'):
+            nproc = int(arg[3:])
+        elif arg.startswith('-n'):
+            n = int(arg[2:])
+        elif arg.startswith('-concurrency'):
+            concurrency = int(arg[12:])
+        elif arg.startswith('-python'):
+            python = arg[7:]
+        else:
+            sys.stderr.write("\nUnrecognized argument '{:}'\n\n".format(arg))
+
+    if concurrency is None:
+        concurrency = nproc if nproc is not None else os.cpu_count()
+    asyncio.run(_demo(nproc, n, concurrency, python))
+
+if __name__=="__main__":
+
+    main()
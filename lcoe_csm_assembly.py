@@ -5,10 +5,10 @@ Created by NWTC Systems Engineering Sub-Task on 2012-08-01.
 Copyright (c) NREL. All rights reserved.
 """
 
-import sys, os, fileinput
+import sys, os, fileinput, time
 import numpy as np    
 
-from openmdao.main.api import Component, Assembly, set_as_top, VariableTree, Slot
+from openmdao.main.api import Component, Assembly, Driver, set_as_top, VariableTree, Slot
 from openmdao.main.datatypes.api import Int, Bool, Float, Array
 
 from twister.components.global_config import WESEConfig, get_dict
@@ -23,6 +23,44 @@ from twister.components.fin_csm_component import fin_csm_component
 # NREL cost and scaling model AEP assembly
 from twister.assemblies.aep_csm_assembly import aep_csm_assembly
 
+from lcoe_csm_deriv import lcoeGradient, DERIV_INPUTS, DERIV_OUTPUTS
+from lcoe_csm_stats import WorkflowStats
+from lcoe_csm_schema import bindInputs
+
+class lcoe_csm_driver(Driver):
+    ''' runs the workflow once, skipping components that are not in 'active' (None runs them all)
+        and timing each component in 'stats'
+
+        After a component runs, 'changed' (if set) is called with its name and returns the
+        components fed by its outputs whose values changed; those are added to the active set,
+        so a component downstream of one that re-ran is skipped when its inputs came out equal. '''
+
+    def __init__(self):
+        super(lcoe_csm_driver, self).__init__()
+        self.active = None
+        self.changed = None
+        self.stats = WorkflowStats()
+        self.elapsed = 0.0
+
+    def execute(self):
+        self.elapsed = 0.0
+        active = None if self.active is None else set(self.active)
+        for comp in self.workflow.__iter__():
+            if active is None or comp.name in active:
+                t0 = time.time()
+                comp.run()
+                dt = time.time() - t0
+                self.stats.add(comp.name, dt)
+                self.elapsed += dt
+                if self.changed is not None:
+                    fed = self.changed(comp.name)
+                    if active is not None:
+                        active |= fed
+            else:
+                self.stats.skip(comp.name)
+
+#-------------------------------
+
 class lcoe_csm_assembly(Assembly):
 
     # ---- Design Variables ----------
@@ -40,6 +78,9 @@ class lcoe_csm_assembly(Assembly):
     turbineNumber = Int(50, iotype='in', desc = 'total number of wind turbines at the plant')
     year = Int(2009, units = 'yr', iotype='in', desc = 'year of project start')
     month = Int(12, units = 'mon', iotype='in', desc = 'month of project start')    
+    # run control
+    quiet = Bool(False, iotype='in', desc = 'suppress per-execute progress output (used for batch runs)')
+    incremental = Bool(True, iotype='in', desc = 're-run only the components whose inputs changed since the last execute')
 
     # ------------- Outputs -------------- 
     # See passthrough variables below
@@ -58,6 +99,20 @@ class lcoe_csm_assembly(Assembly):
     def configure(self):
         ''' configures assembly by adding components, creating the workflow, and connecting the component i/o within the workflow '''
 
+        # input dependency graph, filled in by connect() and create_passthrough()
+        self._inputDeps = {}   # assembly input -> components it feeds
+        self._connections = [] # (source path, destination path) pairs
+        self._passthroughs = {} # passthrough name -> component variable path
+        self._lastInputs = None
+        self._pendingInputs = None
+        self._lastOutputs = {}  # component output path -> value its consumers last ran with
+        
+        # per-component call counts and times; 'overhead' is the rest of execute()
+        self.stats = WorkflowStats()
+        self.add('driver', lcoe_csm_driver())
+        self.driver.stats = self.stats
+        self.driver.changed = self.ChangedConsumers
+
         # Create assembly instances (mode swapping occurs here)
         self.SelectComponents()
 
@@ -70,12 +125,25 @@ class lcoe_csm_assembly(Assembly):
     def execute(self):
 
         #print "In {0}.execute()...".format(self.__class__)
-        sys.stderr.write("In {0}.execute()...\n".format(self.__class__))
-
-        super(lcoe_csm_assembly, self).execute()  # will actually run the workflow
+        if not self.quiet:
+            sys.stderr.write("In {0}.execute()...\n".format(self.__class__))
+
+        t0 = time.time()
+        self.driver.active = self.DirtyComponents()
+        try:
+            super(lcoe_csm_assembly, self).execute()  # will actually run the workflow
+        except:
+            # a component that failed may not have run with the recorded outputs
+            self._lastOutputs = {}
+            raise
+        # only a successful run makes these inputs clean; after an exception everything they
+        # feed runs again on the next execute
+        self._lastInputs = self._pendingInputs
+        self.stats.add('overhead', time.time() - t0 - self.driver.elapsed)
         
-        print 'LCOE {:7.5f} at diameter {:6.2f} m TS {:6.2f} mps'.format(self.lcoe, 
-          self.rotorDiameter, self.maxTipSpeed)
+        if not self.quiet:
+            print 'LCOE {:7.5f} at diameter {:6.2f} m TS {:6.2f} mps'.format(self.lcoe, 
+              self.rotorDiameter, self.maxTipSpeed)
         #self.ofh.write('LCOE {:7.5f} at diameter {:6.2f} m TS {:6.2f} mps\n'.format(self.lcoe, 
         #  self.rotorDiameter, self.maxTipSpeed))
 
@@ -84,6 +152,121 @@ class lcoe_csm_assembly(Assembly):
     
     #------- Supporting methods --------------
 
+    def connect(self, srcpath, destpath):
+        ''' connect as usual and record the edge in the input dependency graph and connection list '''
+
+        super(lcoe_csm_assembly, self).connect(srcpath, destpath)
+
+        if isinstance(destpath, basestring):
+            destpath = [destpath]
+        for dest in destpath:
+            self._connections.append((srcpath, dest))
+            self._addEdge(srcpath, dest)
+
+    def disconnect(self, varpath, varpath2=None):
+        ''' disconnect as usual and remove the edges from the input dependency graph and connection list '''
+
+        super(lcoe_csm_assembly, self).disconnect(varpath, varpath2)
+
+        def touches(path, var):
+            return path == var or path.startswith(var + '.')
+
+        if varpath2 is None:
+            removed = lambda src, dest: touches(src, varpath) or touches(dest, varpath)
+        else:
+            removed = lambda src, dest: set([src, dest]) == set([varpath, varpath2])
+        self._connections = [(src, dest) for src, dest in self._connections if not removed(src, dest)]
+        self._passthroughs = dict([(alias, path) for alias, path in self._passthroughs.items()
+                                   if not removed(alias, path)])
+
+        self._inputDeps = {}
+        for alias, path in self._passthroughs.items():
+            self._inputDeps.setdefault(alias, set()).add(path.split('.')[0])
+        for src, dest in self._connections:
+            self._addEdge(src, dest)
+        self._lastInputs = None
+        self._lastOutputs = {}
+
+    def _addEdge(self, srcpath, dest):
+        if '.' not in srcpath:
+            self._inputDeps.setdefault(srcpath, set()).add(dest.split('.')[0])
+
+    def create_passthrough(self, pathname, alias=None):
+        ''' create the passthrough as usual and record which component it belongs to '''
+
+        result = super(lcoe_csm_assembly, self).create_passthrough(pathname, alias)
+
+        if alias is None:
+            alias = pathname.split('.')[-1]
+        self._passthroughs[alias] = pathname
+        self._inputDeps.setdefault(alias, set()).add(pathname.split('.')[0])
+
+        return result
+
+    def list_deriv_vars(self):
+        ''' design variables and outputs for which provideJ() supplies derivatives '''
+
+        return tuple(DERIV_INPUTS), tuple(DERIV_OUTPUTS)
+
+    def provideJ(self):
+        ''' Jacobian of DERIV_OUTPUTS w.r.t. DERIV_INPUTS, chained through the component connections '''
+
+        return lcoeGradient(self, DERIV_INPUTS, DERIV_OUTPUTS)
+
+    def DirtyComponents(self):
+        '''
+        Returns the set of components that must run because an assembly input feeding them directly
+        changed since the last successful execute, or None if everything must run.  Components
+        further downstream are added by the driver as ChangedConsumers() finds their connected
+        inputs changed.  The current inputs are kept in _pendingInputs until execute() succeeds;
+        arrays are copied so that later in-place edits are seen as changes.
+        '''
+
+        if self._lastInputs is None:
+            names = [name for name in self.list_inputs() if name in self._inputDeps]
+        else:
+            names = self._lastInputs.keys()
+        current = {}
+        for name in names:
+            value = getattr(self, name)
+            if isinstance(value, np.ndarray):
+                value = np.array(value, copy=True)
+            current[name] = value
+
+        last = self._lastInputs
+        self._pendingInputs = current
+        if last is None or not self.incremental:
+            return None
+
+        dirty = set()
+        for name in names:
+            if not np.array_equal(current[name], last[name]):
+                dirty |= self._inputDeps[name]
+
+        return dirty
+
+    def ChangedConsumers(self, name):
+        '''
+        Returns the set of components connected to outputs of component name whose values differ
+        from those the components last ran with (all of them the first time), and records the
+        current values.
+        '''
+
+        edges = [(src, dest) for src, dest in self._connections if '.' in src and src.split('.')[0] == name]
+        values = {}
+        for src, dest in edges:
+            value = self.get(src)
+            if isinstance(value, np.ndarray):
+                value = np.array(value, copy=True)
+            values[src] = value
+
+        changed = set()
+        for src, dest in edges:
+            if src not in self._lastOutputs or not np.array_equal(values[src], self._lastOutputs[src]):
+                changed.add(dest.split('.')[0])
+        self._lastOutputs.update(values)
+        return changed
+
     def SelectComponents(self):
         '''
         Component selections for wrapping different models which calculate main outputs for cost analysis
@@ -186,87 +369,10 @@ class lcoe_csm_assembly(Assembly):
         self.create_passthrough('fin.coe')
 
     def AssignInputs(self,inputs=None):
+        ''' validates a scenario dict of {input name : value} against INPUT_SCHEMA and assigns it to the assembly inputs '''
 
-        if inputs != None:
-            for key in inputs:
-                self.inputs[key] = inputs[key]
-        
-            # assign inputs to variables for assembly
-            for key in self.inputs:
-                # Turbine configuration
-                # rotor
-                if key == 'rotorDiameter':
-                    self.rotorDiam = float(self.inputs[key])
-                if key == 'maxTipSpeed':
-                    self.maxTipSpeed = float(self.inputs[key])
-                if key == 'bladeNumber':
-                    self.bladeNumber = int(self.inputs[key])
-                if key == 'advancedBlade':
-                    if int(self.inputs[key]) == 0:
-                       self.advancedBlade = False
-                    else:
-                       self.advancedBlade = True
-                if key == 'maxPowerCoefficient':
-                    self.maxPowerCoefficient = float(self.inputs[key])
-                if key == 'optTipSpeedRatio':
-                    self.optTipSpeedRatio = float(self.inputs[key])
-                if key == 'cutInWindSpeed':
-                    self.cutInWindSpeed = float(self.inputs[key])
-                if key == 'cutOutWindSpeed':
-                    self.cutOutWindSpeed = float(self.inputs[key])
-                if key == 'thrustCoefficient':
-                    self.thrustCoefficient = float(self.inputs[key])
-                # drivetrain
-                if key == 'ratedPower':
-                    self.ratedPower = float(self.inputs[key])
-                if key == 'drivetrainDesign':
-                    self.drivetrainDesign = int(self.inputs[key])
-                if key == 'crane':
-                    if int(self.inputs[key]) == 0:
-                      self.crane = False
-                    else:
-                      self.crane = True
-                if key == 'advancedBedplate':
-                    self.advancedBedplate = int(self.inputs[key])
-                # tower
-                if key == 'hubHeight':
-                    self.hubHeight = float(self.inputs[key])
-                    
-                # Plant configuration
-                if key == 'windSpeed50m':
-                    self.windSpeed50m = float(self.inputs[key])
-                if key == 'weibullK':
-                    self.weibullK = float(self.inputs[key])
-                if key == 'shearExponent':
-                    self.shearExponent = float(self.inputs[key])
-                if key == 'seaDepth':
-                    self.seaDepth = float(self.inputs[key])
-                if key == 'altitude':
-                    self.altitude = float(self.inputs[key])
-                if key == 'airDensity':
-                    self.airDensity = float(self.inputs[key])
-                if key == 'year':
-                    self.year = int(self.inputs[key])
-                if key == 'month':
-                    self.month = int(self.inputs[key])
-                if key == 'turbineNumber':
-                    self.turbineNumber = int(self.inputs[key])
-                if key == 'soilingLosses':
-                    self.soilingLosses = float(self.inputs[key])
-                if key == 'arrayLosses':
-                    self.arrayLosses = float(self.inputs[key])
-                if key == 'availability':
-                    self.availability = float(self.inputs[key])
-                if key == 'discountRate':
-                    self.discountRate = float(self.inputs[key])
-                if key == 'taxRate':
-                    self.taxRate = float(self.inputs[key])
-                if key == 'discountRate':
-                    self.discountRate = float(self.inputs[key])
-                if key == 'constructionTime':
-                    self.constructionTime = float(self.inputs[key])
-                if key == 'projectLifetime':
-                    self.projectLifetime = float(self.inputs[key])
+        if inputs is not None:
+            bindInputs(self, inputs)
 
 #-------------------------------
 
@@ -288,6 +394,13 @@ class lcoe_csm_assembly(Assembly):
         print "Plant OM output variable tree:"
         self.plantOM.printVT()
 
+#-------------------------------
+
+    def printStats(self):
+        ''' print call counts and timing of each component and of the assembly overhead '''
+
+        print self.stats.report()
+
 #-------------------------------
 
     def printShortHeader(self):
@@ -309,17 +422,43 @@ if __name__=="__main__":
     lcoe = lcoe_csm_assembly()
     
     # modify default parameters with -rd, -ts, 
+    # -batch[FILE] evaluates the scenarios (CSV or JSON Lines) in FILE, or stdin if no FILE is given,
+    #   streaming one result line per scenario; the -rd etc. values become the defaults for the batch
+    #   the batch is evaluated with lcoe_csm_kernel unless -cacheFILE or -assembly is given
     
+    base = {}         # default inputs set on the command line
+    batchFile = None
+    nproc = 1
+    ordered = True
+    cacheFile = None
+    model = None
     for i in range(1,len(sys.argv)):
         arg = sys.argv[i]
         badArg = True
         if arg.startswith('-help'):
             sys.stderr.write(" USAGE: python {:} [-rdXXX] [-tsXXX] [-rpXXX] [-hhXXX] [-sdXXX]\n".format(sys.argv[0]))
+            sys.stderr.write("        python {:} -batch[FILE] [-assembly] [-npN] [-unordered] [-cacheFILE] [-rdXXX] ...\n".format(sys.argv[0]))
             exit()
+        if arg.startswith('-batch'):
+            badArg = False
+            batchFile = arg[6:]
+        if arg.startswith('-assembly'):
+            badArg = False
+            model = 'assembly'
+        if arg.startswith('-np'):
+            badArg = False
+            nproc = int(arg[3:])
+        if arg.startswith('-unordered'):
+            badArg = False
+            ordered = False
+        if arg.startswith('-cache'):
+            badArg = False
+            cacheFile = arg[6:]
         if arg.startswith('-rd'):
             badArg = False
             try:
                 lcoe.rotorDiameter = float(arg[3:])
+                base['rotorDiameter'] = lcoe.rotorDiameter
                 sys.stderr.write("  ...set rotorDiameter to {:.1f}\n".format(lcoe.rotorDiameter))
             except:
                 sys.stderr.write("\nCan't understand '{:}'\n\n".format(arg))
@@ -327,6 +466,7 @@ if __name__=="__main__":
             badArg = False
             try:
                 lcoe.maxTipSpeed = float(arg[3:])
+                base['maxTipSpeed'] = lcoe.maxTipSpeed
                 sys.stderr.write("  ...set maxTipSpeed to {:.1f}\n".format(lcoe.maxTipSpeed))
             except:
                 sys.stderr.write("\nCan't understand '{:}'\n\n".format(arg))
@@ -334,6 +474,7 @@ if __name__=="__main__":
             badArg = False
             try:
                 lcoe.ratedPower = float(arg[3:])
+                base['ratedPower'] = lcoe.ratedPower
                 sys.stderr.write("  ...set ratedPower to {:.1f}\n".format(lcoe.ratedPower))
             except:
                 sys.stderr.write("\nCan't understand '{:}'\n\n".format(arg))
@@ -341,6 +482,7 @@ if __name__=="__main__":
             badArg = False
             try:
                 lcoe.hubHeight = float(arg[3:])
+                base['hubHeight'] = lcoe.hubHeight
                 sys.stderr.write("  ...set hubHeight to {:.1f}\n".format(lcoe.hubHeight))
             except:
                 sys.stderr.write("\nCan't understand '{:}'\n\n".format(arg))
@@ -348,12 +490,22 @@ if __name__=="__main__":
             badArg = False
             try:
                 lcoe.seaDepth = float(arg[3:])
+                base['seaDepth'] = lcoe.seaDepth
                 sys.stderr.write("  ...set seaDepth to {:.1f}\n".format(lcoe.seaDepth))
             except:
                 sys.stderr.write("\nCan't understand '{:}'\n\n".format(arg))
         
         if badArg:
             sys.stderr.write("\nUnrecognized argument '{:}'\n\n".format(arg))
+    
+    if batchFile is not None:
+        from lcoe_csm_batch import runBatch
+        if batchFile in ('', '-'):
+            ifh = sys.stdin
+        else:
+            ifh = open(batchFile)
+        nerr = runBatch(ifh, sys.stdout, nproc, ordered, inputs=base, cacheFile=cacheFile, model=model)
+        exit(nerr > 0)
                             
     lcoe.execute()
     lcoe.printShortHeader()
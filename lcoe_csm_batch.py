@@ -0,0 +1,213 @@
+"""
+lcoe_csm_batch.py
+
+Batch evaluation of the LCOE model over arrays of design points.
+
+Inputs are given as a dict of {name : scalar or array}; arrays are broadcast
+against each other.  When every requested output is one of the kernel's
+(lcoe_csm_kernel.KERNEL_OUTPUTS) the points are evaluated with the
+vectorized kernel, which imports neither OpenMDAO nor the assembly.
+
+Otherwise, or when an assembly or result cache is given or
+model='assembly' is asked for, every point is run through a single,
+already configured lcoe_csm_assembly with progress output turned off.
+Only inputs that differ from the previous point are re-assigned, so the
+assembly is never rebuilt and unchanged inputs never touch the framework.
+
+    from lcoe_csm_batch import lcoeBatch
+    res = lcoeBatch({'rotorDiameter' : np.linspace(110.,145.,100),
+                     'maxTipSpeed'   : 80.0})
+    print res['lcoe'].min()
+"""
+
+import sys, json
+import numpy as np
+
+from lcoe_csm_schema import INPUT_SCHEMA, SCHEMA, bindColumns, castValue, checkUsed
+
+# assembly inputs that may be varied in a batch (design variables and passthroughs)
+BATCH_INPUTS = [spec.name for spec in INPUT_SCHEMA]
+
+# scalar outputs returned by default
+BATCH_OUTPUTS = ['lcoe', 'coe', 'aep', 'turbineCost', 'BOScost', 'OnMcost']
+
+#-----------------------------------------
+
+def broadcastInputs(inputs):
+    ''' return (names, 2-d array of shape (npts, len(names))) after broadcasting the input arrays '''
+
+    names = sorted(inputs.keys())
+    if len(names) == 0:
+        return names, np.zeros((1,0))
+
+    cols = np.broadcast_arrays(*[np.atleast_1d(np.asarray(inputs[name], dtype=float)) for name in names])
+    pts = np.column_stack([c.ravel() for c in cols])
+
+    # validates names and bounds of every column at once
+    bindColumns(dict([(name, pts[:, j]) for j, name in enumerate(names)]))
+    return names, pts
+
+#-----------------------------------------
+
+def useKernel(outputs, model=None, assembly=False):
+    ''' True if outputs are to be evaluated with lcoe_csm_kernel rather than lcoe_csm_assembly
+
+        model    : 'kernel', 'assembly' or None to use the kernel when every output is a kernel output
+        assembly : True if an assembly or result cache was given, which selects the assembly when model is None '''
+
+    from lcoe_csm_kernel import KERNEL_OUTPUTS
+    if model not in (None, 'kernel', 'assembly'):
+        raise ValueError("model must be 'kernel' or 'assembly', not '{:}'".format(model))
+    if model is None:
+        return not assembly and all([name in KERNEL_OUTPUTS for name in outputs])
+    return model == 'kernel'
+
+def lcoeBatch(inputs, outputs=BATCH_OUTPUTS, lcoe=None, cache=None, model=None):
+    ''' evaluate the LCOE model at every point defined by inputs
+
+        inputs  : dict of {input name : scalar or array}, broadcast together
+        outputs : names of scalar assembly outputs to return
+        lcoe    : an existing lcoe_csm_assembly to reuse (one is created if None)
+        cache   : optional lcoe_csm_cache.lcoeCache consulted before each execute
+        model   : 'kernel' or 'assembly'; None uses lcoe_csm_kernel unless lcoe or cache is given
+                  or an output is not a kernel output (see useKernel)
+
+        returns dict of {output name : array of length npts}
+    '''
+
+    if useKernel(outputs, model, lcoe is not None or cache is not None):
+        from lcoe_csm_kernel import lcoeKernelBatch
+        return lcoeKernelBatch(inputs, outputs)
+
+    names, pts = broadcastInputs(inputs)
+
+    if lcoe is None:
+        from lcoe_csm_assembly import lcoe_csm_assembly
+        lcoe = lcoe_csm_assembly()
+    checkUsed(lcoe, names)
+
+    res = dict([(name, np.zeros(len(pts))) for name in outputs])
+
+    quiet = lcoe.quiet
+    lcoe.quiet = True
+    try:
+        last = None
+        for i in range(len(pts)):
+            pt = pts[i]
+            for j in range(len(names)):
+                if last is None or pt[j] != last[j]:
+                    setInput(lcoe, names[j], pt[j])
+            last = pt
+
+            vals = evaluate(lcoe, outputs, cache)
+            for name in outputs:
+                res[name][i] = vals[name]
+    finally:
+        lcoe.quiet = quiet
+
+    return res
+
+#-----------------------------------------
+
+def evaluate(lcoe, outputs, cache=None):
+    ''' execute lcoe with its current inputs and return {output : value},
+        using cache (an lcoe_csm_cache.lcoeCache) if given '''
+
+    if cache is not None:
+        from lcoe_csm_cache import cacheInputs
+        key = cacheInputs(lcoe)
+        vals = cache.get(key, outputs)
+        if vals is not None:
+            return vals
+
+    lcoe.execute()
+    vals = dict([(name, getattr(lcoe, name)) for name in outputs])
+
+    if cache is not None:
+        cache.put(key, vals)
+    return vals
+
+def setInput(lcoe, name, value):
+    ''' assign a value to an assembly input, converting it to the input's type '''
+
+    setattr(lcoe, SCHEMA[name].trait, castValue(name, value))
+
+#-----------------------------------------
+
+def readCases(lines):
+    ''' yield scenario dicts from an iterable of lines of CSV (header row of input names) or
+        JSON Lines; a line that cannot be parsed is yielded as an error message string '''
+
+    header = None
+    for line in lines:
+        line = line.strip()
+        if len(line) == 0 or line.startswith('#'):
+            continue
+        if line.startswith('{'):
+            try:
+                yield json.loads(line)
+            except ValueError, err:
+                yield "can't parse '{:}': {:}".format(line, err)
+        elif header is None:
+            header = [name.strip() for name in line.split(',')]
+        else:
+            vals = [v.strip() for v in line.split(',')]
+            if len(vals) != len(header):
+                yield "expected {:d} values in '{:}'".format(len(header), line)
+            else:
+                yield dict(zip(header, vals))
+
+def runBatch(ifh, ofh, nproc=1, ordered=True, outputs=BATCH_OUTPUTS, inputs=None, cacheFile=None, model=None):
+    ''' evaluate the scenarios read from ifh and write one result line per scenario to ofh as it
+        finishes (JSON Lines if the input is JSON Lines, otherwise CSV)
+
+        the scenarios are evaluated (and written) a chunk at a time with lcoe_csm_kernel.kernelStream()
+        unless an output is not a kernel output, a cacheFile is given or model is 'assembly', when
+        they are run on a pool of nproc warm assemblies (see useKernel)
+
+        returns the number of scenarios that failed '''
+
+    from itertools import chain
+
+    # readline() rather than file iteration, which reads ahead and would stall a pipe
+    lines = iter(ifh.readline, '')
+    first = ''
+    for first in lines:
+        if len(first.strip()) and not first.startswith('#'):
+            break
+    jsonOut = first.strip().startswith('{')
+    if not jsonOut:
+        ofh.write(','.join(['index'] + list(outputs)) + '\n')
+    cases = readCases(chain([first], lines))
+
+    pool = None
+    if useKernel(outputs, model, cacheFile is not None):
+        from lcoe_csm_kernel import kernelStream
+        results = kernelStream(cases, outputs, inputs)
+    else:
+        from lcoe_csm_pool import lcoePool
+        pool = lcoePool(nproc, inputs, cacheFile)
+        results = pool.stream(cases, outputs, ordered)
+
+    nerr = 0
+    try:
+        for index, vals, err in results:
+            if err is not None:
+                nerr += 1
+                sys.stderr.write("scenario {:d}: {:}\n".format(index, err))
+            if jsonOut:
+                if err is None:
+                    res = dict(zip(outputs, vals))
+                else:
+                    res = {'error' : err}
+                res['index'] = index
+                ofh.write(json.dumps(res, sort_keys=True) + '\n')
+            else:
+                if err is not None:
+                    vals = [float('nan')] * len(outputs)
+                ofh.write(','.join([str(index)] + ['{:.10g}'.format(v) for v in vals]) + '\n')
+            ofh.flush()
+    finally:
+        if pool is not None:
+            pool.close()
+    return nerr
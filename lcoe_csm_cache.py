@@ -0,0 +1,194 @@
+"""
+lcoe_csm_cache.py
+
+Persistent, content-addressed cache of lcoe_csm_assembly results.
+
+Results are stored in an sqlite database keyed by a hash of the model
+version, the assembly class and its full input vector (every batch input
+plus any other input that feeds a component, such as a wake layout or a
+wind series), so the same design point evaluated by any demo, optimizer
+or batch run is only computed once.  Outputs stored for the same key by
+calls asking for different outputs are merged.  The database is bounded
+in size; least recently used entries are evicted first, with access
+times recorded in batches so that cache hits do not take sqlite's write
+lock.  sqlite's file locking makes the cache safe to share between
+processes.
+
+    cache = lcoeCache('lcoeCache.db')
+    res = lcoeBatch({'rotorDiameter' : diams}, cache=cache)
+"""
+
+import time, json, hashlib
+import sqlite3
+import numpy as np
+
+from lcoe_csm_batch import BATCH_INPUTS
+
+# bump when the cost model (or the twister components behind it) changes
+MODEL_VERSION = 'csm-1'
+
+# access times are written after this many cache hits (and with every put)
+TOUCH_EVERY = 256
+
+#-----------------------------------------
+
+def fullInputs(lcoe):
+    ''' return the full input vector of an assembly as a dict of {input name : value} '''
+
+    return dict([(name, getattr(lcoe, name)) for name in BATCH_INPUTS])
+
+def cacheInputs(lcoe):
+    ''' return the inputs that identify a result of lcoe in the cache: fullInputs() plus the other
+        inputs feeding its components (layouts, wind series, ...) and the assembly class as '__model__' '''
+
+    inputs = fullInputs(lcoe)
+    for name in sorted(getattr(lcoe, '_inputDeps', {})):
+        if name not in inputs and name in lcoe.list_inputs():
+            inputs[name] = getattr(lcoe, name)
+    inputs['__model__'] = '{:}.{:}'.format(lcoe.__class__.__module__, lcoe.__class__.__name__)
+    return inputs
+
+def _keyValue(value):
+    if isinstance(value, basestring):
+        return value
+    if isinstance(value, (np.ndarray, list, tuple)):
+        return np.asarray(value, dtype=float).tolist()
+    return float(value)
+
+#-----------------------------------------
+
+class lcoeCache(object):
+    ''' on-disk LRU cache of {input vector : outputs} '''
+
+    def __init__(self, filename='lcoeCache.db', maxBytes=256*1024*1024, version=MODEL_VERSION):
+        ''' filename : sqlite database (created if missing)
+            maxBytes : approximate bound on the size of the stored results
+            version  : model version included in every key '''
+
+        self.filename = filename
+        self.maxBytes = maxBytes
+        self.version = version
+        self.hits = 0
+        self.misses = 0
+        self._puts = 0
+        self._touched = {}     # key -> access time not yet written
+
+        self.db = sqlite3.connect(filename, timeout=60.0)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.execute('PRAGMA synchronous=NORMAL')
+        self.db.execute('CREATE TABLE IF NOT EXISTS results '
+                        '(key TEXT PRIMARY KEY, value TEXT, size INTEGER, atime REAL)')
+        self.db.execute('CREATE INDEX IF NOT EXISTS results_atime ON results (atime)')
+        self.db.execute('CREATE TABLE IF NOT EXISTS defaults (version TEXT PRIMARY KEY, value TEXT)')
+        self.db.commit()
+
+    def key(self, inputs):
+        ''' hash of the model version and the input vector (see cacheInputs()) '''
+
+        items = [(name, _keyValue(inputs[name])) for name in sorted(inputs)]
+        return hashlib.sha1(json.dumps([self.version, items]).encode('utf-8')).hexdigest()
+
+    def get(self, inputs, outputs=None):
+        ''' return the cached {output : value} dict for inputs, or None if any of outputs is missing '''
+
+        key = self.key(inputs)
+        row = self.db.execute('SELECT value FROM results WHERE key=?', (key,)).fetchone()
+        if row is not None:
+            value = json.loads(row[0])
+            if outputs is None or all([name in value for name in outputs]):
+                self._touched[key] = time.time()
+                if len(self._touched) >= TOUCH_EVERY:
+                    self.flushTouched()
+                self.hits += 1
+                return value
+        self.misses += 1
+        return None
+
+    def _writeTouched(self):
+        self.db.executemany('UPDATE results SET atime=? WHERE key=?',
+                            [(atime, key) for key, atime in self._touched.items()])
+        self._touched = {}
+
+    def flushTouched(self):
+        ''' write the buffered access times if the database is not locked by another writer;
+            they only order evictions, so they are dropped rather than waited for '''
+
+        if not self._touched:
+            return
+        self.db.execute('PRAGMA busy_timeout=0')
+        try:
+            self.db.execute('BEGIN IMMEDIATE')
+            self._writeTouched()
+            self.db.commit()
+        except sqlite3.OperationalError:
+            self.db.rollback()
+            self._touched = {}
+        finally:
+            self.db.execute('PRAGMA busy_timeout=60000')
+
+    def put(self, inputs, outputs):
+        ''' store {output : value} for inputs, merged with any outputs already stored for them '''
+
+        key = self.key(inputs)
+        value = dict([(name, float(outputs[name])) for name in outputs])
+        self.db.execute('BEGIN IMMEDIATE')
+        try:
+            row = self.db.execute('SELECT value FROM results WHERE key=?', (key,)).fetchone()
+            if row is not None:
+                merged = json.loads(row[0])
+                merged.update(value)
+                value = merged
+            value = json.dumps(value)
+            self.db.execute('INSERT OR REPLACE INTO results VALUES (?,?,?,?)',
+                            (key, value, len(value), time.time()))
+            self._writeTouched()
+            self.db.commit()
+        except:
+            self.db.rollback()
+            raise
+
+        # summing the sizes is a table scan, so only check the bound every so often
+        self._puts += 1
+        if self._puts % 100 == 0:
+            self.evict()
+
+    def evict(self):
+        ''' remove least recently used entries until the cache is below 90% of maxBytes '''
+
+        total = self.db.execute('SELECT SUM(size) FROM results').fetchone()[0] or 0
+        if total <= self.maxBytes:
+            return
+
+        target = total - 0.9*self.maxBytes
+        cutoff = None
+        freed = 0
+        for atime, size in self.db.execute('SELECT atime, size FROM results ORDER BY atime'):
+            freed += size
+            cutoff = atime
+            if freed >= target:
+                break
+        self.db.execute('DELETE FROM results WHERE atime<=?', (cutoff,))
+        self.db.commit()
+
+    def getDefaults(self):
+        ''' return the default full input vector stored for this model version, or None '''
+
+        row = self.db.execute('SELECT value FROM defaults WHERE version=?', (self.version,)).fetchone()
+        if row is None:
+            return None
+        return json.loads(row[0])
+
+    def putDefaults(self, inputs):
+        ''' store the default full input vector of the assembly for this model version '''
+
+        value = json.dumps(dict([(name, inputs[name]) for name in inputs]))
+        self.db.execute('INSERT OR REPLACE INTO defaults VALUES (?,?)', (self.version, value))
+        self.db.commit()
+
+    def clear(self):
+        self.db.execute('DELETE FROM results')
+        self.db.commit()
+
+    def close(self):
+        self.flushTouched()
+        self.db.close()
@@ -0,0 +1,216 @@
+"""
+lcoe_csm_casetable.py
+
+Compact in-memory case storage.
+
+CaseTable keeps each case variable in a preallocated NumPy column that
+doubles in size when full, instead of one dict-like object per case, so
+a million cases of the csmDOE outputs take a few tens of MB.  A column
+may also hold fixed-width records: the powerCurve array of every case
+(shape=(2, n)) or the numeric fields of a variable tree such as turbine,
+plantBOS or plantOM (dtype=vartreeDtype(tree)).
+
+Whole columns are returned as array views, table[i] is a light row view
+(a __slots__ object indexable by column name), and filter(), sort() and
+grid() return new tables or arrays without Python loops over cases.
+CaseTable also has the recorder interface (record, close, get_iterator),
+so it can be used in a driver's recorders list.
+
+    table = CaseTable(['lcoe.lcoe', 'lcoe.rotorDiameter', 'lcoe.maxTipSpeed'])
+    for case in cases:
+        table.record(case)
+    X, Y, Z = table.grid('lcoe.rotorDiameter', 'lcoe.maxTipSpeed', 'lcoe.lcoe')
+"""
+
+import numpy as np
+
+#-----------------------------------------
+
+def vartreeFields(tree, prefix=''):
+    ''' dotted names of the numeric variables of a variable tree (nested trees included) '''
+
+    fields = []
+    for name in sorted(tree.list_vars()):
+        value = getattr(tree, name)
+        if hasattr(value, 'list_vars'):
+            fields += vartreeFields(value, prefix + name + '.')
+        elif isinstance(value, (int, long, float, bool, np.number)):
+            fields.append(prefix + name)
+    return fields
+
+def vartreeDtype(tree):
+    ''' structured dtype with one float64 field per numeric variable of tree '''
+
+    return np.dtype([(field, 'f8') for field in vartreeFields(tree)])
+
+def vartreeRecord(tree, dtype):
+    ''' the values of the fields of dtype from a variable tree, as a tuple '''
+
+    values = []
+    for field in dtype.names:
+        value = tree
+        for part in field.split('.'):
+            value = getattr(value, part)
+        values.append(value)
+    return tuple(values)
+
+def columnLength(cols, names):
+    ''' the common length of the arrays cols[name] for name in names (0 if there are none);
+        raises ValueError if they differ '''
+
+    lengths = [(len(cols[name]), name) for name in names]
+    for n, name in lengths[1:]:
+        if n != lengths[0][0]:
+            raise ValueError("column '{:}' has {:d} rows, expected {:d}".format(name, n, lengths[0][0]))
+    return lengths[0][0] if lengths else 0
+
+#-----------------------------------------
+
+class CaseRow(object):
+    ''' view of one row of a CaseTable '''
+
+    __slots__ = ('table', 'index')
+
+    def __init__(self, table, index):
+        self.table = table
+        self.index = index
+
+    def __getitem__(self, name):
+        return self.table.data[name][self.index]
+
+    def keys(self):
+        return list(self.table.columns)
+
+    def __repr__(self):
+        return 'CaseRow({:})'.format(', '.join(['{:}={:}'.format(name, self[name]) for name in self.table.columns]))
+
+class CaseTable(object):
+    ''' growable typed columns of case values '''
+
+    def __init__(self, columns, dtypes=None, shapes=None, capacity=1024):
+        ''' columns  : case variable names
+            dtypes   : optional dict of {column : numpy dtype} (default float64; a structured dtype
+                       from vartreeDtype() stores variable trees)
+            shapes   : optional dict of {column : per-case shape} for fixed-width array columns
+            capacity : number of rows allocated initially '''
+
+        if dtypes is None:
+            dtypes = {}
+        if shapes is None:
+            shapes = {}
+        self.columns = list(columns)
+        self.n = 0
+        self.data = {}
+        for name in self.columns:
+            self.data[name] = np.zeros((capacity,) + tuple(shapes.get(name, ())), dtype=dtypes.get(name, 'f8'))
+
+    @classmethod
+    def fromColumns(cls, cols, copy=False):
+        ''' table over existing equal-length arrays (e.g. from lcoe_csm_recorder.readColumns) '''
+
+        table = cls([])
+        table.columns = sorted(cols)
+        table.n = columnLength(cols, table.columns)
+        for name in table.columns:
+            table.data[name] = np.array(cols[name]) if copy else cols[name]
+        return table
+
+    def __len__(self):
+        return self.n
+
+    def _reserve(self, n):
+        if not self.columns:
+            return
+        capacity = len(self.data[self.columns[0]])
+        if n <= capacity:
+            return
+        capacity = max(n, 2 * capacity)
+        for name in self.columns:
+            old = self.data[name]
+            new = np.zeros((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:self.n] = old[:self.n]
+            self.data[name] = new
+
+    def _value(self, name, value):
+        dtype = self.data[name].dtype
+        if dtype.names is not None and not isinstance(value, tuple):
+            return vartreeRecord(value, dtype)
+        return value
+
+    def record(self, case):
+        ''' append one case (anything indexable by column name) '''
+
+        self._reserve(self.n + 1)
+        for name in self.columns:
+            self.data[name][self.n] = self._value(name, case[name])
+        self.n += 1
+
+    def extend(self, cols):
+        ''' append many cases given as {column : array} of equal length '''
+
+        n = columnLength(cols, self.columns if self.columns else list(cols))
+        self._reserve(self.n + n)
+        for name in self.columns:
+            self.data[name][self.n:self.n + n] = cols[name]
+        self.n += n
+
+    def close(self):
+        pass
+
+    def get_iterator(self):
+        return (CaseRow(self, i) for i in range(self.n))
+
+    def __getitem__(self, key):
+        ''' table['name'] is a view of a column, table[i] a CaseRow '''
+
+        if isinstance(key, basestring):
+            return self.data[key][:self.n]
+        if key < 0:
+            key += self.n
+        if not 0 <= key < self.n:
+            raise IndexError('case index {:d} out of range'.format(key))
+        return CaseRow(self, key)
+
+    def nbytes(self):
+        return sum([self.data[name][:self.n].nbytes for name in self.columns])
+
+    #---------------------------------
+
+    def take(self, index):
+        ''' new table with the rows in index (an integer array), in that order '''
+
+        table = CaseTable([])
+        table.columns = list(self.columns)
+        for name in self.columns:
+            table.data[name] = self[name][index]
+        table.n = len(index)
+        return table
+
+    def filter(self, mask):
+        ''' new table with the rows where the boolean array mask is True '''
+
+        return self.take(np.flatnonzero(mask))
+
+    def sort(self, *names):
+        ''' new table sorted by the given columns (the first is the primary key);
+            with no columns the rows keep their order '''
+
+        if len(names) == 0:
+            return self.take(np.arange(self.n))
+        return self.take(np.lexsort([self[name] for name in reversed(names)]))
+
+    def argmin(self, name):
+        ''' the CaseRow with the smallest value of column name '''
+
+        return self[int(np.argmin(self[name]))]
+
+    def grid(self, xname, yname, zname):
+        ''' X, Y, Z 2-d arrays (x varying along the first axis) for cases that fill a full x-y grid '''
+
+        nx = len(np.unique(self[xname]))
+        ny = len(np.unique(self[yname]))
+        if nx * ny != self.n:
+            raise ValueError("{:d} cases don't fill a {:d} x {:d} grid of {:} and {:}".format(
+                             self.n, nx, ny, xname, yname))
+        table = self.sort(xname, yname)
+        return [table[name].reshape(nx, ny) for name in (xname, yname, zname)]
@@ -0,0 +1,121 @@
+"""
+lcoe_csm_checkpoint.py
+
+Durable, append-only checkpoints of completed cases.
+
+CheckpointRecorder implements OpenMDAO's ICaseRecorder and can be used in a
+driver's recorders list (next to, or instead of, ColumnarCaseRecorder).  Every case is appended to a JSON Lines
+file as soon as it is recorded and the file is flushed and fsync'ed, so a
+crash, OOM kill or preemption loses at most the case being written.  When
+opened with append=True the cases already in the file are loaded first
+(a partial last line from an interrupted write is dropped), which is how
+csmDOEDemo -resume skips finished cases and csmOptDemo -resume continues
+from the last design recorded.
+
+    ckpt = CheckpointRecorder('doeCheckpoint.jsonl', columns, append=True)
+    done = ckpt.doneKeys(['lcoe.rotorDiameter', 'lcoe.maxTipSpeed'])
+"""
+
+import os, json
+
+from lcoe_csm_recorder import implements, ICaseRecorder
+
+#-----------------------------------------
+
+def readCheckpoint(filename):
+    ''' return (cases, number of bytes of complete lines) from a checkpoint file; a missing file has no cases '''
+
+    cases = []
+    good = 0
+    if not os.path.exists(filename):
+        return cases, good
+    with open(filename, 'rb') as ifh:
+        for line in ifh:
+            if not line.endswith('\n'):
+                break      # interrupted write
+            try:
+                cases.append(json.loads(line))
+            except ValueError:
+                break
+            good += len(line)
+    return cases, good
+
+def caseKey(case, names):
+    ''' hashable key of the values of names in case, to 12 significant digits so that a design
+        computed slightly differently (e.g. by a DOE generator and by np.linspace) still matches '''
+
+    return tuple([float('{:.12g}'.format(float(case[name]))) for name in names])
+
+def _jsonValue(value):
+    # NumPy scalars and arrays as plain Python values
+    if hasattr(value, 'tolist'):
+        return value.tolist()
+    return value
+
+#-----------------------------------------
+
+class CheckpointRecorder(object):
+    ''' appends the named values of each case to a JSON Lines file, synced to disk '''
+
+    implements(ICaseRecorder)
+
+    def __init__(self, filename, columns, append=False, syncEvery=1):
+        ''' filename  : checkpoint file
+            columns   : case variable names to record
+            append    : keep (and load) the cases already in filename rather than starting a new file
+            syncEvery : fsync after this many cases (1 makes every recorded case durable) '''
+
+        self.filename = filename
+        self.columns = list(columns)
+        self.syncEvery = syncEvery
+        self.cases = []
+        if append:
+            self.cases, good = readCheckpoint(filename)
+            if os.path.exists(filename) and os.path.getsize(filename) > good:
+                with open(filename, 'r+b') as fh:
+                    fh.truncate(good)
+        self.previous = len(self.cases)
+        self.fh = open(filename, 'ab' if append else 'wb')
+        self.unsynced = 0
+
+    def startup(self):
+        ''' called by the driver before its first case; the file is opened in __init__ '''
+
+        pass
+
+    def record(self, case):
+        ''' append one case (anything indexable by column name) and make it durable '''
+
+        row = dict([(name, _jsonValue(case[name])) for name in self.columns])
+        self.fh.write(json.dumps(row, sort_keys=True) + '\n')
+        self.cases.append(row)
+        self.unsynced += 1
+        if self.unsynced >= self.syncEvery:
+            self.sync()
+
+    def sync(self):
+        self.fh.flush()
+        os.fsync(self.fh.fileno())
+        self.unsynced = 0
+
+    def close(self):
+        if not self.fh.closed:
+            self.sync()
+            self.fh.close()
+
+    def get_iterator(self):
+        ''' iterate over all cases in the checkpoint, including those loaded at open '''
+
+        return iter(list(self.cases))
+
+    def doneKeys(self, names):
+        ''' set of caseKey() of the recorded cases '''
+
+        return set([caseKey(case, names) for case in self.cases])
+
+    def best(self, objective):
+        ''' the recorded case with the smallest value of objective, or None '''
+
+        if len(self.cases) == 0:
+            return None
+        return min(self.cases, key=lambda case: case[objective])
@@ -0,0 +1,83 @@
+"""
+lcoe_csm_client.py
+
+Client for the LCOE evaluation service in lcoe_csm_server.py.
+
+    client = lcoeClient()                        # localhost:8642
+    res = client.evaluate({'rotorDiameter' : 130.0})
+    print res['lcoe']
+    many = client.evaluateMany([{'rotorDiameter' : d} for d in (120.0, 125.0, 130.0)])
+    print client.stats()['requests']['single']['p90']
+    client.close()
+
+A failed evaluation raises lcoeServiceError.  The client keeps one
+connection open and is not thread-safe; use one client per thread.
+"""
+
+import json, socket
+
+from lcoe_csm_server import DEFAULT_PORT
+
+#-----------------------------------------
+
+class lcoeServiceError(Exception):
+    pass
+
+class lcoeClient(object):
+    ''' connection to an lcoe_csm_server '''
+
+    def __init__(self, address=('127.0.0.1', DEFAULT_PORT), timeout=None):
+        ''' address : (host, port) of a TCP server, or the path of a Unix socket
+            timeout : socket timeout in seconds (None waits indefinitely) '''
+
+        if isinstance(address, basestring):
+            self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        else:
+            self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.sock.settimeout(timeout)
+        self.sock.connect(address)
+        self.rfile = self.sock.makefile('rb')
+        self.nextId = 0
+
+    def request(self, request):
+        ''' send one request dict and return the reply dict '''
+
+        self.nextId += 1
+        request['id'] = self.nextId
+        self.sock.sendall(json.dumps(request) + '\n')
+        line = self.rfile.readline()
+        if len(line) == 0:
+            raise lcoeServiceError('connection closed by server')
+        reply = json.loads(line)
+        if 'error' in reply:
+            raise lcoeServiceError(reply['error'])
+        return reply
+
+    def evaluate(self, inputs, outputs=None):
+        ''' evaluate one design point; returns {output : value} '''
+
+        request = {'inputs' : inputs}
+        if outputs is not None:
+            request['outputs'] = list(outputs)
+        res = self.request(request)['results']
+        if 'error' in res:
+            raise lcoeServiceError(res['error'])
+        return res
+
+    def evaluateMany(self, cases, outputs=None):
+        ''' evaluate a list of design points in one request; returns a list of {output : value}
+            dicts in case order (a failed case has only an 'error' entry) '''
+
+        request = {'cases' : list(cases)}
+        if outputs is not None:
+            request['outputs'] = list(outputs)
+        return self.request(request)['results']
+
+    def stats(self):
+        ''' server latency and queue-depth statistics '''
+
+        return self.request({'stats' : True})['stats']
+
+    def close(self):
+        self.rfile.close()
+        self.sock.close()
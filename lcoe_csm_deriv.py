@@ -0,0 +1,102 @@
+"""
+lcoe_csm_deriv.py
+
+Derivatives of lcoe_csm_assembly outputs w.r.t. its design variables,
+chained through the aep1 -> tcc -> bos -> om -> fin connections.
+
+Each component contributes the partial derivatives of the outputs that
+feed other workflow components (or are requested) w.r.t. its connected
+inputs.  Components that provide their own derivatives (list_deriv_vars /
+provideJ) are used as-is; any other component, aep1 included, is
+finite-differenced on its own, so a perturbation never re-runs the rest
+of the workflow.  The component Jacobians are then combined by the chain
+rule in workflow order.
+"""
+
+import numpy as np
+
+# design variables and outputs used by lcoe_csm_assembly.provideJ()
+DERIV_INPUTS = ['rotorDiameter', 'maxTipSpeed', 'ratedPower', 'hubHeight']
+DERIV_OUTPUTS = ['lcoe']
+
+#-----------------------------------------
+
+def lcoeGradient(lcoe, wrt=DERIV_INPUTS, of=DERIV_OUTPUTS, step=1.0e-6):
+    ''' return the Jacobian d(of)/d(wrt) (shape len(of) x len(wrt)) at the current, executed point of lcoe '''
+
+    nwrt = len(wrt)
+
+    # derivatives of connected component inputs w.r.t. the design variables
+    dIns = {}
+    for i, name in enumerate(wrt):
+        seed = np.zeros(nwrt)
+        seed[i] = 1.0
+        for src, dest in lcoe._connections:
+            if src == name:
+                dIns[dest] = seed
+        if name in lcoe._passthroughs:
+            dIns[lcoe._passthroughs[name]] = seed
+
+    # outputs needed from each component: those connected to an input of another workflow component
+    # (not output passthroughs such as powerCurve or the vartrees) and the requested ones
+    workflow = list(lcoe.driver.workflow.__iter__())
+    names = set([comp.name for comp in workflow])
+    needed = {}
+    for src, dest in lcoe._connections:
+        if '.' in src and '.' in dest and dest.split('.')[0] in names:
+            needed.setdefault(src.split('.')[0], set()).add(src)
+    for name in of:
+        path = lcoe._passthroughs[name]
+        needed.setdefault(path.split('.')[0], set()).add(path)
+
+    dOuts = {}
+    for comp in workflow:
+        prefix = comp.name + '.'
+        ins = sorted([path for path in dIns if path.startswith(prefix)])
+        outs = sorted(needed.get(comp.name, ()))
+        if len(ins) == 0 or len(outs) == 0:
+            continue
+
+        J = componentJacobian(comp, [path[len(prefix):] for path in ins],
+                              [path[len(prefix):] for path in outs], step)
+        dComp = J.dot(np.array([dIns[path] for path in ins]))
+
+        for k, path in enumerate(outs):
+            dOuts[path] = dComp[k]
+            for src, dest in lcoe._connections:
+                if src == path:
+                    dIns[dest] = dComp[k]
+
+    return np.array([dOuts.get(lcoe._passthroughs[name], np.zeros(nwrt)) for name in of])
+
+#-----------------------------------------
+
+def componentJacobian(comp, ins, outs, step=1.0e-6):
+    ''' return d(outs)/d(ins) for a single component (shape len(outs) x len(ins))
+
+        uses the component's own provideJ() if it covers ins and outs, otherwise forward
+        differences that run only this component '''
+
+    if hasattr(comp, 'provideJ') and hasattr(comp, 'list_deriv_vars'):
+        cins, couts = comp.list_deriv_vars()
+        if all([name in cins for name in ins]) and all([name in couts for name in outs]):
+            if hasattr(comp, 'linearize'):
+                comp.linearize()
+            J = np.asarray(comp.provideJ())
+            return J[np.ix_([list(couts).index(name) for name in outs],
+                            [list(cins).index(name) for name in ins])]
+
+    base = np.array([comp.get(name) for name in outs], dtype=float)
+    J = np.zeros((len(outs), len(ins)))
+    for j, name in enumerate(ins):
+        x = comp.get(name)
+        h = step * max(abs(x), 1.0)
+        comp.set(name, x + h, force=True)
+        comp.run()
+        J[:, j] = (np.array([comp.get(o) for o in outs], dtype=float) - base) / h
+        comp.set(name, x, force=True)
+
+    # leave the component's outputs at the unperturbed point
+    comp.run()
+
+    return J
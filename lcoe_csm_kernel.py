@@ -0,0 +1,829 @@
+"""
+lcoe_csm_kernel.py
+
+OpenMDAO-free LCOE kernel: the cost and scaling equations of the
+aep1/tcc/bos/om/fin chain of lcoe_csm_assembly as vectorized NumPy
+functions.
+
+Every stage takes a dict of {input name : array} (the assembly inputs,
+broadcast together, plus the outputs of the earlier stages) and returns a
+dict of output arrays, so a whole DOE or site table is evaluated in a few
+array operations per stage:
+
+    res = lcoeKernelBatch({'rotorDiameter' : np.linspace(110.,145.,1000)})
+    res = lcoeKernel({'rotorDiameter' : 130.0})
+
+lcoe_csm_batch.lcoeBatch() and the -batch command of lcoe_csm_assembly
+use the kernel (kernelStream() for the streamed scenarios) whenever the
+requested outputs are kernel outputs.
+
+The cost stages compute their line items (blades, hub, gearbox, ...,
+foundation, O&M) in the model's reference-year dollars and escalate each
+one to the project year and month with the CSM's PPI tables, shipped as
+module data in lcoe_csm_ppi.  The input defaults are module data too, so
+evaluating the kernel imports only NumPy; a date the tables do not cover
+raises ValueError.
+
+An lcoeCalibration holds the input defaults and the factor of every line
+item per (year, month, configuration) group.  By default the factors are
+the PPI escalators; reference=True reports costs in reference-year
+dollars (every factor 1).  Against an installed framework,
+
+    python lcoe_csm_kernel.py -calibrate[FILE] [-yearsY1,Y2,...] [-monthsM1,M2,...]
+
+runs the twister tcc/bos/om/fin components standalone at random points
+of each group, fits the line item factors by least squares (rejecting a
+fit whose residual exceeds CALIBRATION_TOL), reports how far they are
+from the PPI escalators and saves them with the assembly's defaults:
+
+    res = lcoeKernel({'rotorDiameter' : 130.0}, calibration=lcoeCalibration.load('lcoeKernel.json'))
+"""
+
+import sys, math, json
+import numpy as np
+
+from lcoe_csm_batch import BATCH_INPUTS, BATCH_OUTPUTS, broadcastInputs
+from lcoe_csm_schema import bindColumns, convertValue
+from lcoe_csm_ppi import escalation
+
+# scalar outputs the kernel can return
+KERNEL_OUTPUTS = ['lcoe', 'coe', 'aep', 'aepPerTurbine', 'capacityFactor', 'ratedWindSpeed', 'ratedRotorSpeed',
+                  'maxEfficiency', 'turbineCost', 'turbineMass', 'BOScost', 'OnMcost',
+                  'preventativeMaintenanceCost', 'correctiveMaintenanceCost', 'landLeaseCost']
+
+# power curve bins of aep1 (m/s)
+WIND_SPEEDS = np.arange(161) * 0.25
+HOURS_PER_YEAR = 8760.0
+
+# drivetrain loss coefficients (constant, linear, quadratic) by drivetrainDesign 1..4
+DRIVETRAIN_LOSSES = np.array([[0.0,     0.0,     0.0],
+                              [0.01289, 0.08510, 0.0],
+                              [0.01331, 0.03655, 0.06107],
+                              [0.01547, 0.04463, 0.05790],
+                              [0.01007, 0.02000, 0.06899]])
+
+# finance parameters of fin that are not assembly inputs
+TAX_RATE = 0.4
+DISCOUNT_RATE = 0.07
+
+# inputs of each twister component as connected in lcoe_csm_assembly
+STAGE_INPUTS = {
+    'tcc' : ['rotorDiameter', 'maxTipSpeed', 'ratedWindSpeed', 'maxEfficiency', 'ratedPower', 'drivetrainDesign',
+             'hubHeight', 'altitude', 'seaDepth', 'year', 'month', 'bladeNumber', 'advancedBlade',
+             'thrustCoefficient', 'crane', 'advancedBedplate'],
+    'bos' : ['rotorDiameter', 'ratedPower', 'hubHeight', 'seaDepth', 'turbineNumber', 'year', 'month', 'turbineCost'],
+    'om'  : ['ratedPower', 'seaDepth', 'turbineNumber', 'year', 'month', 'aep'],
+    'fin' : ['ratedPower', 'turbineNumber', 'turbineCost', 'aep', 'BOScost', 'preventativeMaintenanceCost',
+             'correctiveMaintenanceCost', 'landLeaseCost', 'fixedChargeRate', 'constructionTime', 'projectLifetime'],
+}
+
+# inputs that select a calibration group (escalation depends on the date and the configuration)
+STAGE_GROUPS = {
+    'tcc' : ['year', 'month', 'offshore', 'advancedBlade', 'drivetrainDesign'],
+    'bos' : ['year', 'month', 'depthClass'],
+    'om'  : ['year', 'month', 'offshore'],
+    'fin' : [],
+}
+
+# twister component of each stage and where its outputs live
+STAGE_COMPONENTS = {
+    'tcc' : ('twister.components.tcc_csm_component', 'tcc_csm_component'),
+    'bos' : ('twister.components.bos_csm_component', 'bos_csm_component'),
+    'om'  : ('twister.components.om_csm_component', 'om_csm_component'),
+    'fin' : ('twister.components.fin_csm_component', 'fin_csm_component'),
+}
+OUTPUT_PATHS = {
+    'preventativeMaintenanceCost' : 'plantOM.preventativeMaintenanceCost',
+    'correctiveMaintenanceCost'   : 'plantOM.correctiveMaintenanceCost',
+    'landLeaseCost'               : 'plantOM.landLeaseCost',
+}
+
+# ranges the calibration samples (upstream outputs included); group inputs are set per group
+SAMPLE_RANGES = {
+    'rotorDiameter'     : (60.0, 160.0),
+    'maxTipSpeed'       : (60.0, 95.0),
+    'ratedWindSpeed'    : (9.0, 14.0),
+    'maxEfficiency'     : (0.88, 0.96),
+    'ratedPower'        : (1000.0, 8000.0),
+    'hubHeight'         : (60.0, 140.0),
+    'altitude'          : (0.0, 1500.0),
+    'thrustCoefficient' : (0.3, 0.9),
+    'bladeNumber'       : (2, 4),
+    'crane'             : (0, 1),
+    'advancedBedplate'  : (0, 2),
+    'turbineNumber'     : (10, 200),
+    'turbineCost'       : (1.0e6, 1.0e7),
+    'aep'               : (1.0e7, 1.0e9),
+    'BOScost'           : (1.0e7, 1.0e9),
+    'preventativeMaintenanceCost' : (1.0e5, 1.0e7),
+    'correctiveMaintenanceCost'   : (1.0e5, 1.0e7),
+    'landLeaseCost'     : (1.0e4, 1.0e6),
+    'fixedChargeRate'   : (0.08, 0.14),
+    'constructionTime'  : (0.5, 3.0),
+    'projectLifetime'   : (15.0, 30.0),
+}
+AEP_INPUTS = ['rotorDiameter', 'maxTipSpeed', 'ratedPower', 'maxPowerCoefficient', 'optTipSpeedRatio', 'cutInWindSpeed',
+              'cutOutWindSpeed', 'drivetrainDesign', 'hubHeight', 'altitude', 'airDensity', 'windSpeed50m',
+              'weibullK', 'shearExponent', 'soilingLosses', 'arrayLosses', 'availability', 'turbineNumber']
+# inputs used as table indices or flags; every other input is used as a float
+INDEX_INPUTS = ['drivetrainDesign', 'advancedBedplate']
+INT_INPUTS = ['drivetrainDesign', 'year', 'month', 'bladeNumber', 'turbineNumber', 'advancedBedplate']
+BOOL_INPUTS = ['advancedBlade', 'crane']
+SEA_DEPTHS = {1 : (0.0, 0.0), 2 : (1.0, 29.0), 3 : (30.0, 59.0), 4 : (60.0, 200.0)}
+
+# relative residual above which a calibration fit is rejected
+CALIBRATION_TOL = 1.0e-6
+
+# values of the inputs a call does not give: the defaults of lcoe_csm_assembly, and the CSM 5-MW
+# reference turbine and plant for the inputs the assembly passes through to its components
+INPUT_DEFAULTS = {
+    'rotorDiameter' : 126.0, 'maxTipSpeed' : 80.0, 'bladeNumber' : 3, 'advancedBlade' : False,
+    'maxPowerCoefficient' : 0.488, 'optTipSpeedRatio' : 7.525, 'cutInWindSpeed' : 3.0, 'cutOutWindSpeed' : 25.0,
+    'thrustCoefficient' : 0.5, 'ratedPower' : 5000.0, 'drivetrainDesign' : 1, 'crane' : True,
+    'advancedBedplate' : 0, 'hubHeight' : 90.0, 'windSpeed50m' : 8.02, 'weibullK' : 2.15, 'shearExponent' : 0.2,
+    'seaDepth' : 0.0, 'altitude' : 0.0, 'airDensity' : 0.0, 'year' : 2009, 'month' : 12, 'turbineNumber' : 50,
+    'soilingLosses' : 0.0, 'arrayLosses' : 0.1, 'availability' : 0.941, 'fixedChargeRate' : 0.12,
+    'constructionTime' : 1.0, 'projectLifetime' : 20.0,
+}
+
+# PPI escalator (code of lcoe_csm_ppi, reference year, reference month) of every cost line item
+TCC_ESCALATORS = {
+    'bladeMaterial' : ('BLD', 2002, 9), 'bladeLabor' : ('BLL', 2002, 9), 'pitch' : ('PMB', 2002, 9),
+    'hub' : ('HUB', 2002, 9), 'spinner' : ('NAC', 2002, 9), 'lowSpeedShaft' : ('LSS', 2002, 9),
+    'bearings' : ('BRN', 2002, 9), 'gearbox' : ('GRB', 2002, 9), 'brake' : ('BRK', 2002, 9),
+    'generator' : ('GEN', 2002, 9), 'VSElectronics' : ('VSE', 2002, 9), 'yaw' : ('YAW', 2002, 9),
+    'HVAC' : ('HYD', 2002, 9), 'cabling' : ('ELC', 2002, 9), 'controls' : ('CTL', 2002, 9),
+    'nacelleCover' : ('NAC', 2002, 9), 'mainframe' : ('MFM', 2002, 9), 'tower' : ('TWR', 2002, 9),
+}
+ADVANCED_BLADE_ESCALATOR = ('BLA', 2003, 9)
+# by depth class; a line item is zero in the classes it does not list, None is not escalated
+BOS_ESCALATORS = {
+    'foundation'       : {1 : ('FND', 2002, 9)},
+    'monopile'         : {2 : ('MPF', 2003, 9)},
+    'transitional'     : {3 : ('OAI', 2003, 9)},
+    'permits'          : {1 : ('LPM', 2002, 3), 2 : ('OPM', 2003, 9), 3 : ('OPM', 2003, 9)},
+    'electrical'       : {1 : ('LEL', 2002, 9), 2 : ('OEL', 2003, 9), 3 : ('OEL', 2003, 9)},
+    'roads'            : {1 : ('RDC', 2002, 9)},
+    'installation'     : {1 : ('LAI', 2002, 9), 2 : ('OAI', 2003, 9), 3 : ('OAI', 2003, 9)},
+    'supportInstall'   : {3 : ('OAI', 2003, 9)},
+    'transportation'   : {1 : ('TPT', 2002, 9), 2 : ('TPT', 2002, 9), 3 : ('TPT', 2002, 9)},
+    'supportTransport' : {3 : ('OAI', 2003, 9)},
+    'personnelAccess'  : {2 : ('PAE', 2003, 9), 3 : ('PAE', 2003, 9)},
+    'portStaging'      : {2 : ('STP', 2003, 9), 3 : ('STP', 2003, 9)},
+    'scour'            : {2 : ('STP', 2003, 9), 3 : ('STP', 2003, 9)},
+    'suretyTurbine'    : {2 : None, 3 : None},
+}
+# (land, offshore)
+OM_ESCALATORS = {
+    'preventativeMaintenanceCost' : {'maintenance' : (('LOM', 2002, 9), ('OOM', 2003, 9))},
+    'correctiveMaintenanceCost'   : {'replacement' : (('LLR', 2002, 9), ('OLR', 2003, 9))},
+    'landLeaseCost'               : {'lease' : (('LSE', 2002, 9), ('LSE', 2002, 9))},
+}
+
+#-----------------------------------------
+
+def standardAirDensity(altitude, hubHeight):
+    ''' air density (kg/m**3) of the standard atmosphere at altitude + hubHeight '''
+
+    z = altitude + hubHeight
+    return (101300.0 * (1.0 - 0.0065 * z / 288.15)**(9.80665 / (0.0065 * 287.15))
+            / (287.15 * (288.15 - 0.0065 * z)))
+
+def depthClass(seaDepth):
+    ''' BOS plant type: 1 land, 2 offshore < 30 m, 3 offshore < 60 m, 4 deeper '''
+
+    seaDepth = np.asarray(seaDepth)
+    return np.select([seaDepth == 0.0, seaDepth < 30.0, seaDepth < 60.0], [1, 2, 3], 4)
+
+def _columns(x, names):
+    ''' the named entries of x as 1-d arrays of one length, typed as the equations use them '''
+
+    cols = np.broadcast_arrays(*[np.atleast_1d(np.asarray(x[name])) for name in names])
+    typed = {}
+    for name, col in zip(names, cols):
+        if name in INDEX_INPUTS:
+            typed[name] = np.rint(col).astype(int)
+        elif name in BOOL_INPUTS:
+            typed[name] = col.astype(bool)
+        else:
+            typed[name] = col.astype(float)
+    return typed
+
+def _groupColumns(stage, x):
+    cols = []
+    for name in STAGE_GROUPS[stage]:
+        if name == 'offshore':
+            cols.append(x['seaDepth'] > 0.0)
+        elif name == 'depthClass':
+            cols.append(depthClass(x['seaDepth']))
+        else:
+            cols.append(x[name])
+    return [c.astype(int) for c in cols]
+
+#-----------------------------------------
+
+def rotorCurve(x):
+    ''' rated operating point of aep1: dict of arrays with the hub power, torque constant and the
+        region 2 / 2.5 transition (omegaT) used by the power curve '''
+
+    RD, tip, MR = x['rotorDiameter'], x['maxTipSpeed'], x['ratedPower']
+    cp, tsr = x['maxPowerCoefficient'], x['optTipSpeedRatio']
+    rho = np.where(x['airDensity'] == 0.0, standardAirDensity(x['altitude'], x['hubHeight']), x['airDensity'])
+
+    c, l, q = DRIVETRAIN_LOSSES[x['drivetrainDesign']].T
+    maxEff = 1.0 - (c + l + q)
+    ratedHubPower = MR / maxEff
+
+    omegaM = tip / (RD / 2.0)
+    omega0 = omegaM / 1.05
+    Tm = ratedHubPower * 1000.0 / omegaM
+    ratedRPM = (30.0 / math.pi) * omegaM
+
+    kTorque = rho * math.pi * RD**5 * cp / (64.0 * tsr**3)
+    b = -Tm / (omegaM - omega0)
+    cc = Tm * omega0 / (omegaM - omega0)
+    disc = b**2 - 4.0 * kTorque * cc
+    feasible = disc > 0.0
+    omegaT = -(b / (2.0 * kTorque)) - np.sqrt(np.maximum(disc, 0.0)) / (2.0 * kTorque)
+    windOmegaT = np.where(feasible, omegaT * RD / (2.0 * tsr), ratedRPM)
+    pwrOmegaT = np.where(feasible, kTorque * omegaT**3 / 1000.0, MR)
+
+    d = rho * math.pi * RD**2 * 0.25 * cp
+    ratedWS = 0.33 * (2.0 * ratedHubPower * 1000.0 / d)**(1.0 / 3.0) + \
+              0.67 * ((ratedHubPower - pwrOmegaT) * 1000.0 / (1.5 * d * windOmegaT**2) + windOmegaT)
+
+    return {'airDensity' : rho, 'maxEfficiency' : maxEff, 'ratedHubPower' : ratedHubPower,
+            'ratedRotorSpeed' : ratedRPM, 'kTorque' : kTorque, 'feasible' : feasible,
+            'windOmegaT' : windOmegaT, 'pwrOmegaT' : pwrOmegaT, 'ratedWindSpeed' : ratedWS,
+            'losses' : (c, l, q)}
+
+def powerCurves(x, rotor, s=slice(None)):
+    ''' power after drivetrain losses (kW) at WIND_SPEEDS for the points s: array (npts, len(WIND_SPEEDS)) '''
+
+    col = lambda a: a[s][:, np.newaxis]
+    v = WIND_SPEEDS[np.newaxis, :]
+    RD, tsr, MR = col(x['rotorDiameter']), col(x['optTipSpeedRatio']), col(x['ratedPower'])
+    Phub, k = col(rotor['ratedHubPower']), col(rotor['kTorque'])
+    wT, pT, Vr = col(rotor['windOmegaT']), col(rotor['pwrOmegaT']), col(rotor['ratedWindSpeed'])
+    c, l, q = [col(a) for a in rotor['losses']]
+
+    region2 = k * (v * tsr / (RD / 2.0))**3 / 1000.0
+    region25 = (Phub - pT) / (Vr - wT) * (v - wT) + pT
+    ideal = np.where(col(rotor['feasible']) & (v > wT), region25, region2)
+    ideal = np.where((v >= col(x['cutOutWindSpeed'])) | (v <= col(x['cutInWindSpeed'])), 0.0, ideal)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        Pbar = ideal / Phub
+        eff = np.where(ideal > 0.0, 1.0 - (c / Pbar + l + q * Pbar), 0.0)
+    return np.minimum(ideal * eff, MR)
+
+def powerCurve(x):
+    ''' aep1's power curve after drivetrain losses (kW) at WIND_SPEEDS: array (npts, len(WIND_SPEEDS)) '''
+
+    x = _columns(x, AEP_INPUTS)
+    return powerCurves(x, rotorCurve(x))
+
+def aepKernel(x, chunkSize=10000):
+    ''' aep1: rated operating point, power curve and Weibull AEP
+        returns dict of arrays: ratedWindSpeed, ratedRotorSpeed, maxEfficiency, aep, aepPerTurbine, capacityFactor '''
+
+    x = _columns(x, AEP_INPUTS)
+    rotor = rotorCurve(x)
+    n = len(rotor['ratedWindSpeed'])
+    K = x['weibullK']
+    uhub = (x['hubHeight'] / 50.0)**x['shearExponent'] * x['windSpeed50m']
+    L = uhub / np.vectorize(math.gamma)(1.0 + 1.0 / K)
+
+    # the bin at 0 m/s never produces power (cutInWindSpeed >= 0)
+    v = WIND_SPEEDS[np.newaxis, 1:]
+    energy = np.zeros(n)
+    for i in range(0, n, chunkSize):
+        s = slice(i, i + chunkSize)
+        k, lam = K[s][:, np.newaxis], L[s][:, np.newaxis]
+        pdf = (k / lam) * (v / lam)**(k - 1.0) * np.exp(-(v / lam)**k)
+        energy[s] = (powerCurves(x, rotor, s)[:, 1:] * pdf).sum(axis=1) * 0.25
+
+    aepPerTurbine = energy * HOURS_PER_YEAR * (1.0 - x['soilingLosses']) * (1.0 - x['arrayLosses']) \
+                    * x['availability']
+    return {'ratedWindSpeed' : rotor['ratedWindSpeed'], 'ratedRotorSpeed' : rotor['ratedRotorSpeed'],
+            'maxEfficiency' : rotor['maxEfficiency'], 'aepPerTurbine' : aepPerTurbine,
+            'aep' : aepPerTurbine * x['turbineNumber'],
+            'capacityFactor' : aepPerTurbine / (HOURS_PER_YEAR * x['ratedPower'])}
+
+#-----------------------------------------
+# cost line items in reference-year dollars: {output : {line item : array}}, plus unescalated outputs
+
+def tccLines(x):
+    ''' tcc line items (per turbine) and the turbine masses '''
+
+    RD, MR, hh, nb = x['rotorDiameter'], x['ratedPower'], x['hubHeight'], x['bladeNumber']
+    design = x['drivetrainDesign']
+    offshore = x['seaDepth'] > 0.0
+    R = RD / 2.0
+
+    # rotor
+    advanced = x['advancedBlade']
+    bladeMass = np.where(advanced, 0.4948 * R**2.53, 0.1452 * R**2.9158)
+    bladeMaterial = nb * (0.4019376 * R**3 + np.where(advanced, -21051.045983, -955.24267)) / (1.0 - 0.28)
+    bladeLabor = nb * 2.7445 * R**2.5025 / (1.0 - 0.28)
+    pitchMass = (0.1295 * bladeMass * nb + 491.31) * 1.328 + 555.0
+    hubMass = 0.95402537 * bladeMass + 5680.272238
+    spinnerMass = 18.5 * RD - 520.5
+    rotorMass = nb * bladeMass + hubMass + pitchMass + spinnerMass
+
+    # rated loads from the aep1 outputs (tcc sees altitude but not airDensity)
+    torque = MR / x['maxEfficiency'] / (x['maxTipSpeed'] / R) * 1000.0
+    thrust = standardAirDensity(x['altitude'], hh) * x['thrustCoefficient'] * math.pi * RD**2 \
+             * x['ratedWindSpeed']**2 / 8.0
+
+    # nacelle
+    lenShaft = 0.03 * RD
+    bendMom = 1.25 * 9.81 * rotorMass * lenShaft / 5.0
+    outDiam = ((32.0 / math.pi) / (1.0 - 0.1**4) * 3.25
+               * np.sqrt((torque * 3.0 / 371000000.0)**2 + (bendMom / 71070000.0)**2))**(1.0 / 3.0)
+    lssMass = 1.25 * (math.pi / 4.0) * outDiam**2 * (1.0 - 0.1**2) * lenShaft * 7860.0
+
+    gearboxMass = np.array([0.0, 65.601, 81.63967335, 129.1702924, 0.0])[design] * \
+                  (torque / 1000.0)**np.array([0.0, 0.759, 0.7738, 0.7738, 0.0])[design]
+    gearbox = np.array([0.0, 16.45, 74.101, 15.25697015, 0.0])[design] * \
+              MR**np.array([0.0, 1.2491, 1.002, 1.2491, 0.0])[design]
+    generatorMass = np.where(design < 4, np.array([0.0, 6.4737, 10.50972, 5.343902, 0.0])[design] * MR**0.9223,
+                             37.684 * torque)
+    generator = np.array([0.0, 65.0, 54.72533, 48.02963, 219.3333])[design] * MR
+    bearingMass = 2.0 * (0.00012266667 * RD**3.5 - 0.0003036 * RD**2.5)
+    brake = 1.9894 * MR - 0.1141
+    yawMass = 1.6 * 0.0009 * RD**3.314
+    cover = 11.537 * MR + 3849.7
+
+    weightFac = np.array([2.86, 2.40, 0.71])[x['advancedBedplate']]
+    towerTopDiam = (12.29 * RD + 2648.0) / 1000.0
+    modularMass = weightFac * (0.00368 * torque + 0.00158 * thrust * towerTopDiam
+                               + 0.015 * rotorMass * towerTopDiam + 100.0 * 0.5 * (1.5874 * 0.052 * RD)**2)
+    bedplateMass = np.where((design == 1) | (design == 4), modularMass,
+                            np.array([0.0, 22448.0, 1.2949, 1.7208, 22448.0])[design] *
+                            RD**np.array([0.0, 0.0, 1.9525, 1.9525, 0.0])[design])
+    platformsMass = 0.125 * bedplateMass
+    crane = x['crane']
+    mainframe = 1.7 * np.array([0.0, 9.4885, 303.96, 17.923, 627.28])[design] * \
+                RD**np.array([0.0, 1.9525, 1.0669, 1.6716, 0.85])[design] + \
+                8.7 * platformsMass + np.where(crane, 12000.0, 0.0)
+    nacelleMass = lssMass + bearingMass + gearboxMass + 0.1 * brake + generatorMass + yawMass + \
+                  bedplateMass + platformsMass + np.where(crane, 3000.0, 0.0) + 0.08 * MR + 0.111111 * cover
+
+    # tower
+    towerMass = 0.397251147546925 * math.pi * R**2 * hh - 1414.381881
+
+    marine = np.where(offshore, 1.1, 1.0)
+    lines = {'bladeMaterial' : bladeMaterial, 'bladeLabor' : bladeLabor,
+             'pitch' : 2.28 * 0.2106 * RD**2.6576, 'hub' : 4.25 * hubMass, 'spinner' : 5.57 * spinnerMass,
+             'lowSpeedShaft' : 0.0998 * RD**2.8873, 'bearings' : 17.6 * bearingMass, 'gearbox' : gearbox,
+             'brake' : brake, 'generator' : generator, 'VSElectronics' : 79.32 * MR,
+             'yaw' : 2.0 * 0.0339 * RD**2.9637, 'HVAC' : 12.0 * MR, 'cabling' : 40.0 * MR,
+             'controls' : np.where(offshore, 55900.0, 35000.0), 'nacelleCover' : cover,
+             'mainframe' : mainframe, 'tower' : 1.5 * towerMass}
+    for name in lines:
+        lines[name] = lines[name] * marine
+    return {'turbineCost' : lines}, {'turbineMass' : rotorMass + nacelleMass + towerMass}
+
+def bosLines(x):
+    ''' bos line items for the plant (the offshore surety bond is 3% of turbine and BOS cost) '''
+
+    RD, MR, hh = x['rotorDiameter'], x['ratedPower'], x['hubHeight']
+    N = x['turbineNumber']
+    cls = depthClass(x['seaDepth'])
+    land = cls == 1
+    offshore = cls > 1
+    on = lambda mask, a: np.where(mask, a, 0.0) * np.ones(len(cls))
+
+    transport = MR * (1.581e-5 * MR**2 - 0.0375 * MR + 54.7)
+    lines = {
+        'foundation'     : on(land, 303.23 * (hh * math.pi * (RD / 2.0)**2)**0.4037),
+        'monopile'       : on(cls == 2, 300.0 * MR),
+        'transitional'   : on(cls == 3, 450.0 * MR),
+        'permits'        : on(land, 0.000994 * MR**2 + 20.31 * MR) + on(offshore, 37.0 * MR),
+        'electrical'     : on(land, MR * (3.49e-6 * MR**2 - 0.0221 * MR + 109.7)) +
+                           on(cls == 2, 260.0 * MR) + on(cls == 3, 290.0 * MR),
+        'roads'          : on(land, MR * (2.17e-6 * MR**2 - 0.0145 * MR + 69.54)),
+        'installation'   : on(land, 1.965 * (hh * RD)**1.1736) + on(offshore, 100.0 * MR),
+        'supportInstall' : on(cls == 3, 330.0 * MR),
+        'transportation' : on(land | (cls == 2), transport) + on(cls == 3, 77.0 * MR),
+        'supportTransport' : on(cls == 3, 25.0 * MR),
+        'personnelAccess' : on(offshore, 60000.0),
+        'portStaging'    : on(offshore, 20.0 * MR),
+        'scour'          : on(offshore, 55.0 * MR),
+    }
+    surety = np.where(offshore, 1.03, 1.0)
+    for name in lines:
+        lines[name] = lines[name] * surety * N
+    lines['suretyTurbine'] = on(offshore, 0.03 * x['turbineCost']) * N
+    return {'BOScost' : lines}, {}
+
+def omLines(x):
+    ''' om line items: preventative maintenance, levelized replacement and land lease '''
+
+    offshore = x['seaDepth'] > 0.0
+    aep = x['aep']
+    return {'preventativeMaintenanceCost' : {'maintenance' : np.where(offshore, 0.02, 0.007) * aep},
+            'correctiveMaintenanceCost'   : {'replacement' : np.where(offshore, 17.0, 10.7) * x['ratedPower']
+                                                              * x['turbineNumber']},
+            'landLeaseCost'               : {'lease' : 0.00108 * aep}}, {}
+
+def finLines(x):
+    ''' fin: coe and lcoe from the installed capital cost, O&M and AEP '''
+
+    aep = x['aep']
+    turbines = x['turbineCost'] * x['turbineNumber'] / aep
+    bos = x['BOScost'] / aep
+    opex = (x['preventativeMaintenanceCost'] + x['correctiveMaintenanceCost'] + x['landLeaseCost']) / aep
+    r = DISCOUNT_RATE
+    amort = (1.0 + 0.5 * ((1.0 + r)**x['constructionTime'] - 1.0)) * (r / (1.0 - (1.0 + r)**(-x['projectLifetime'])))
+    fcr = x['fixedChargeRate']
+    return {'coe'  : {'turbines' : fcr * turbines, 'BOS' : fcr * bos, 'OnM' : (1.0 - TAX_RATE) * opex},
+            'lcoe' : {'turbines' : amort * turbines, 'BOS' : amort * bos, 'OnM' : opex}}, {}
+
+STAGE_LINES = {'tcc' : tccLines, 'bos' : bosLines, 'om' : omLines, 'fin' : finLines}
+
+#-----------------------------------------
+
+def _stage(stage, x, calibration):
+    ''' outputs of a cost stage: its line items times the factors of each point's group '''
+
+    if calibration is None:
+        calibration = defaultCalibration()
+    x = _columns(x, STAGE_INPUTS[stage])
+    n = len(x['ratedPower'])
+    lines, extra = STAGE_LINES[stage](x)
+    res = dict(extra)
+    cols = _groupColumns(stage, x)
+    if cols:
+        groups, inverse = np.unique(np.column_stack(cols), axis=0, return_inverse=True)
+        inverse = inverse.ravel()
+    else:
+        groups, inverse = [()], np.zeros(n, dtype=int)
+
+    for out in lines:
+        res[out] = np.zeros(n)
+    for g in range(len(groups)):
+        factors = calibration.factorsFor(stage, tuple([int(v) for v in groups[g]]))
+        sel = inverse == g
+        for out in lines:
+            for name, value in lines[out].items():
+                res[out][sel] += factors[out][name] * value[sel]
+    return res
+
+def tccKernel(x, calibration=None):
+    ''' tcc: turbineCost and turbineMass; x holds the assembly inputs and aepKernel() outputs '''
+
+    return _stage('tcc', x, calibration)
+
+def bosKernel(x, calibration=None):
+    ''' bos: BOScost; x holds the assembly inputs and turbineCost '''
+
+    return _stage('bos', x, calibration)
+
+def omKernel(x, calibration=None):
+    ''' om: the three O&M costs and their sum OnMcost; x holds the assembly inputs and aep '''
+
+    res = _stage('om', x, calibration)
+    res['OnMcost'] = res['preventativeMaintenanceCost'] + res['correctiveMaintenanceCost'] + res['landLeaseCost']
+    return res
+
+def finKernel(x, calibration=None):
+    ''' fin: coe and lcoe; x holds the assembly inputs and the outputs of the other stages '''
+
+    return _stage('fin', x, calibration)
+
+def lcoeKernelColumns(x, calibration=None):
+    ''' run aep1, tcc, bos, om and fin on a dict of full, typed input columns
+        returns x updated with every stage output '''
+
+    x = dict(x)
+    x.update(aepKernel(x))
+    x.update(tccKernel(x, calibration))
+    x.update(bosKernel(x, calibration))
+    x.update(omKernel(x, calibration))
+    x.update(finKernel(x, calibration))
+    return x
+
+#-----------------------------------------
+
+class lcoeCalibration(object):
+    ''' input defaults and per-group line item factors for the kernel '''
+
+    def __init__(self, defaults=None, factors=None, reference=False, samples=None, seed=0):
+        ''' defaults  : {input name : value} for inputs a call does not give (None: INPUT_DEFAULTS)
+            factors   : {stage : {group key : {output : {line item : factor}}}} fitted by calibrate()
+            reference : every factor is 1 (costs in reference-year dollars)
+            samples   : component runs per group fit (None: three per line item)
+            seed      : seed of the sample points
+
+            groups without fitted factors are escalated with the PPI tables of lcoe_csm_ppi '''
+
+        self.defaults = dict(INPUT_DEFAULTS) if defaults is None else defaults
+        self.factors = dict([(stage, {}) for stage in STAGE_LINES])
+        if factors is not None:
+            for stage in factors:
+                self.factors[stage].update(factors[stage])
+        self.reference = reference
+        self.samples = samples
+        self.seed = seed
+        self.components = {}
+        self.escalated = dict([(stage, {}) for stage in STAGE_LINES])
+
+    def inputDefaults(self):
+        return self.defaults
+
+    def factorsFor(self, stage, key):
+        ''' {output : {line item : factor}} of a group: fitted, or else escalated with the PPI tables '''
+
+        if key in self.factors[stage]:
+            return self.factors[stage][key]
+        if key not in self.escalated[stage]:
+            self.escalated[stage][key] = escalationFactors(stage, key, self.reference)
+        return self.escalated[stage][key]
+
+    def calibrate(self, years=None, months=None):
+        ''' fit every group of the given years and months (default: those of the input defaults) against
+            the installed twister components; returns the largest relative difference of the components'
+            outputs from the kernel escalated with the PPI tables (dates past the tables are not compared) '''
+
+        years = years or [self.defaults['year']]
+        months = months or [self.defaults['month']]
+        keys = [('fin', ())]
+        for year in years:
+            for month in months:
+                for offshore in (0, 1):
+                    keys.append(('om', (year, month, offshore)))
+                    for blade in (0, 1):
+                        for design in (1, 2, 3, 4):
+                            keys.append(('tcc', (year, month, offshore, blade, design)))
+                for cls in (1, 2, 3):
+                    keys.append(('bos', (year, month, cls)))
+
+        worst = 0.0
+        for stage, key in keys:
+            self.factors[stage][key], err = self._fit(stage, key)
+            worst = max(worst, err)
+        return worst
+
+    #-----------------------------------------
+
+    def _sample(self, stage, key, m):
+        ''' m random component input points of a group '''
+
+        rng = np.random.RandomState(self.seed)
+        x = {}
+        for name in STAGE_INPUTS[stage]:
+            if name in SAMPLE_RANGES:
+                low, high = SAMPLE_RANGES[name]
+                x[name] = rng.randint(low, high + 1, m) if name in INT_INPUTS + BOOL_INPUTS else rng.uniform(low, high, m)
+        group = dict(zip(STAGE_GROUPS[stage], key))
+        for name in ('year', 'month', 'advancedBlade', 'drivetrainDesign'):
+            if name in group:
+                x[name] = np.repeat(group[name], m)
+        if 'offshore' in group:
+            x['seaDepth'] = rng.uniform(1.0, 200.0, m) * group['offshore']
+        elif 'depthClass' in group:
+            x['seaDepth'] = rng.uniform(*(SEA_DEPTHS[group['depthClass']] + (m,)))
+        return x
+
+    def _component(self, stage):
+        if stage not in self.components:
+            module, name = STAGE_COMPONENTS[stage]
+            self.components[stage] = getattr(__import__(module, fromlist=[name]), name)()
+        return self.components[stage]
+
+    def _fit(self, stage, key):
+        ''' run the stage's twister component at sample points of the group and fit the line item factors
+            returns (factors, relative difference of the component from the PPI escalated kernel) '''
+
+        nlines = sum([len(v) for v in STAGE_LINES[stage](_columns(self._sample(stage, key, 1), STAGE_INPUTS[stage]))[0].values()])
+        m = self.samples or 3 * nlines + 4
+        x = _columns(self._sample(stage, key, m), STAGE_INPUTS[stage])
+        lines, extra = STAGE_LINES[stage](x)
+
+        comp = self._component(stage)
+        targets = dict([(out, np.zeros(m)) for out in list(lines) + list(extra)])
+        for i in range(m):
+            for name in STAGE_INPUTS[stage]:
+                value = x[name][i]
+                if name in BOOL_INPUTS:
+                    value = bool(value)
+                elif name in INT_INPUTS:
+                    value = int(value)
+                else:
+                    value = float(value)
+                setattr(comp, name, value)
+            comp.run()
+            for out in targets:
+                obj = comp
+                for part in OUTPUT_PATHS.get(out, out).split('.'):
+                    obj = getattr(obj, part)
+                targets[out][i] = obj
+
+        try:
+            tables = escalationFactors(stage, key)
+        except ValueError:
+            tables = None
+        factors = {}
+        worst = 0.0
+        for out in lines:
+            names = sorted(lines[out])
+            A = np.column_stack([lines[out][name] for name in names])
+            scale = np.sqrt((A**2).sum(axis=0))
+            scale[scale == 0.0] = 1.0
+            f = np.linalg.lstsq(A / scale, targets[out], rcond=None)[0] / scale
+            _checkFit(stage, key, out, A.dot(f), targets[out])
+            factors[out] = dict(zip(names, f.tolist()))
+            if tables:
+                escalated = A.dot([tables[out][name] for name in names])
+                worst = max(worst, np.abs(escalated - targets[out]).max() / max(np.abs(targets[out]).max(), 1e-300))
+        for out in extra:
+            _checkFit(stage, key, out, extra[out], targets[out])
+        return factors, worst
+
+    #-----------------------------------------
+
+    def save(self, filename):
+        ''' write the defaults and factors as JSON '''
+
+        factors = dict([(stage, [[list(key), self.factors[stage][key]] for key in sorted(self.factors[stage])])
+                        for stage in self.factors])
+        with open(filename, 'w') as ofh:
+            json.dump({'defaults' : self.inputDefaults(), 'factors' : factors, 'reference' : self.reference},
+                      ofh, indent=1, sort_keys=True)
+
+    @classmethod
+    def load(cls, filename):
+        with open(filename) as ifh:
+            data = json.load(ifh)
+        factors = dict([(stage, dict([(tuple(key), f) for key, f in data['factors'][stage]]))
+                        for stage in data['factors']])
+        return cls(data['defaults'], factors, data.get('reference', False))
+
+def _checkFit(stage, key, out, predicted, target):
+    err = np.abs(predicted - target).max() / max(np.abs(target).max(), 1e-300)
+    if not err <= CALIBRATION_TOL:
+        raise ValueError("kernel {:}.{:} does not reproduce the twister component for group {:} "
+                         "(relative residual {:.2e})".format(stage, out, key, err))
+
+def escalationFactors(stage, key, reference=False):
+    ''' {output : {line item : factor}} of a group from the PPI tables (every factor 1 for reference);
+        raises ValueError for a date the tables do not cover '''
+
+    group = dict(zip(STAGE_GROUPS[stage], key))
+    if stage == 'tcc':
+        items = dict(TCC_ESCALATORS)
+        if group['advancedBlade']:
+            items['bladeMaterial'] = ADVANCED_BLADE_ESCALATOR
+        items = {'turbineCost' : items}
+    elif stage == 'bos':
+        if group['depthClass'] not in (1, 2, 3):
+            raise ValueError("the CSM has no BOS equations for seaDepth >= {:.0f} m".format(SEA_DEPTHS[4][0]))
+        items = {'BOScost' : dict([(name, BOS_ESCALATORS[name].get(group['depthClass'], 0.0))
+                                   for name in BOS_ESCALATORS])}
+    elif stage == 'om':
+        items = dict([(out, dict([(name, OM_ESCALATORS[out][name][group['offshore']]) for name in OM_ESCALATORS[out]]))
+                      for out in OM_ESCALATORS])
+    else:
+        items = {'coe' : {'turbines' : None, 'BOS' : None, 'OnM' : None},
+                 'lcoe' : {'turbines' : None, 'BOS' : None, 'OnM' : None}}
+
+    factors = {}
+    for out in items:
+        factors[out] = {}
+        for name, esc in items[out].items():
+            if esc == 0.0:
+                factors[out][name] = 0.0
+            elif esc is None or reference:
+                factors[out][name] = 1.0
+            else:
+                code, refYear, refMonth = esc
+                try:
+                    factors[out][name] = escalation(code, group['year'], group['month'], refYear, refMonth)
+                except ValueError, err:
+                    raise ValueError("{:} (no {:} cost escalation for {:}/{:}; use reference=True for reference-year "
+                                     "dollars)".format(err, stage, group['year'], group['month']))
+    return factors
+
+# per-process calibration, created on first use
+_calibration = None
+
+def defaultCalibration():
+    global _calibration
+    if _calibration is None:
+        _calibration = lcoeCalibration()
+    return _calibration
+
+#-----------------------------------------
+
+def lcoeKernelBatch(inputs, outputs=BATCH_OUTPUTS, calibration=None):
+    ''' evaluate the kernel at every point of the broadcast input arrays
+
+        inputs      : dict of {input name : scalar or array}; inputs not given take the calibration defaults
+        outputs     : names of the outputs to return (any of KERNEL_OUTPUTS)
+        calibration : an lcoeCalibration (None uses the process's: INPUT_DEFAULTS and the PPI tables)
+
+        returns dict of {output name : array} '''
+
+    for name in outputs:
+        if name not in KERNEL_OUTPUTS:
+            raise ValueError("'{:}' is not an output of the kernel".format(name))
+    names, pts = broadcastInputs(inputs)
+    if calibration is None:
+        calibration = defaultCalibration()
+
+    defaults = calibration.inputDefaults()
+    columns = dict([(name, np.repeat(float(defaults[name]), len(pts))) for name in BATCH_INPUTS])
+    for j, name in enumerate(names):
+        columns[name] = pts[:, j]
+    res = lcoeKernelColumns(bindColumns(columns), calibration)
+    return dict([(name, res[name]) for name in outputs])
+
+def lcoeKernel(inputs=None, outputs=BATCH_OUTPUTS, calibration=None):
+    ''' evaluate one design point
+
+        inputs : dict of {input name : value}; inputs not given take the calibration defaults
+        returns dict of {output name : value} '''
+
+    res = lcoeKernelBatch(inputs or {}, outputs, calibration)
+    return dict([(name, float(res[name][0])) for name in outputs])
+
+def kernelStream(cases, outputs=BATCH_OUTPUTS, inputs=None, calibration=None, chunkSize=256):
+    ''' evaluate an iterable of case dicts in vectorized chunks of chunkSize and yield
+        (case index, output values, error message) in case order, like lcoePool.stream()
+
+        inputs : dict of inputs applied under every case (like the pool workers' assembly inputs)
+        a case that is not a dict or names an unknown or out-of-bounds input is reported as an error '''
+
+    for name in outputs:
+        if name not in KERNEL_OUTPUTS:
+            raise ValueError("'{:}' is not an output of the kernel".format(name))
+    if calibration is None:
+        calibration = defaultCalibration()
+    defaults = dict(calibration.inputDefaults())
+    for name in (inputs or {}):
+        defaults[name] = convertValue(name, inputs[name])
+
+    def evaluate(chunk):
+        valid = [case for index, case, err in chunk if err is None]
+        if len(valid):
+            res = lcoeKernelBatch(dict([(name, [case.get(name, defaults[name]) for case in valid])
+                                        for name in BATCH_INPUTS]), outputs, calibration)
+        k = 0
+        for index, case, err in chunk:
+            if err is None:
+                yield index, [float(res[name][k]) for name in outputs], None
+                k += 1
+            else:
+                yield index, None, err
+
+    chunk = []
+    for index, case in enumerate(cases):
+        try:
+            if not isinstance(case, dict):
+                raise ValueError(str(case))
+            chunk.append((index, dict([(name, convertValue(name, case[name])) for name in case]), None))
+        except Exception, err:
+            chunk.append((index, None, '{:}: {:}'.format(err.__class__.__name__, err)))
+        if len(chunk) == chunkSize:
+            for res in evaluate(chunk):
+                yield res
+            chunk = []
+    for res in evaluate(chunk):
+        yield res
+
+#-----------------------------------------
+
+def main():
+    ''' fit a calibration against the installed framework and save it '''
+
+    filename = None
+    years = months = None
+    for arg in sys.argv[1:]:
+        if arg.startswith('-help'):
+            sys.stderr.write(__doc__)
+            exit()
+        elif arg.startswith('-calibrate'):
+            filename = arg[10:] or 'lcoeKernel.json'
+        elif arg.startswith('-years'):
+            years = [int(v) for v in arg[6:].split(',')]
+        elif arg.startswith('-months'):
+            months = [int(v) for v in arg[7:].split(',')]
+        else:
+            sys.stderr.write("\nUnrecognized argument '{:}'\n\n".format(arg))
+    if filename is None:
+        sys.stderr.write(__doc__)
+        exit()
+
+    from lcoe_csm_assembly import lcoe_csm_assembly
+    from lcoe_csm_cache import fullInputs
+    cal = lcoeCalibration(fullInputs(lcoe_csm_assembly()))
+    worst = cal.calibrate(years, months)
+    sys.stderr.write("  components differ from the PPI escalated kernel by {:.2e} at most\n".format(worst))
+    cal.save(filename)
+    sys.stderr.write("  ...saved {:}\n".format(filename))
+
+if __name__=="__main__":
+
+    main()
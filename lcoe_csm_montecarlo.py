@@ -0,0 +1,358 @@
+"""
+lcoe_csm_montecarlo.py
+
+Monte Carlo uncertainty propagation through lcoe_csm_assembly with
+bounded-memory streaming statistics.
+
+Uncertain inputs are given as distributions:
+
+    dists = {'windSpeed50m'  : ('normal', 8.35, 0.4),
+             'weibullK'      : ('uniform', 1.8, 2.4),
+             'availability'  : ('triangular', 0.92, 0.94, 0.97),
+             'soilingLosses' : ('uniform', 0.0, 0.04),
+             'year'          : ('choice', [2009, 2010, 2011, 2012])}
+    stats = monteCarlo(dists, nsamples=10**6, nproc=8)
+    printSummary(stats)
+
+Samples are drawn and evaluated in chunks, on one assembly or on the
+warm workers of an lcoePool, and each chunk is reduced to a
+MonteCarloStats: running mean/variance (merged with Chan's formulas), a
+relative-error quantile sketch and a fixed-edge histogram per output.
+Only these summaries are kept, so memory does not grow with the number of
+samples, and the counts of the sketches and histograms from different
+workers merge exactly.  The samples of chunk c depend only on (seed, c),
+so a run gives the same statistics however it is split across workers.
+
+USAGE: python lcoe_csm_montecarlo.py [-nN] [-chunkN] [-npN] [-seedN]
+"""
+
+import sys, math
+import numpy as np
+
+from lcoe_csm_schema import SCHEMA
+
+# outputs summarised by default
+MC_OUTPUTS = ['lcoe', 'aep', 'turbineCost', 'BOScost', 'OnMcost']
+
+# example input uncertainty about the assembly defaults; 'year' stands in for cost escalation
+DEFAULT_DISTS = {
+    'windSpeed50m'  : ('normal', 8.35, 0.4),
+    'weibullK'      : ('uniform', 1.8, 2.4),
+    'availability'  : ('triangular', 0.92, 0.94, 0.97),
+    'soilingLosses' : ('uniform', 0.0, 0.04),
+    'year'          : ('choice', [2009, 2010, 2011, 2012]),
+}
+
+#-----------------------------------------
+
+class RunningStats(object):
+    ''' count, mean, variance, min and max of a stream of values '''
+
+    def __init__(self):
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+
+    def _combine(self, n, mean, m2):
+        # Chan et al. pairwise update
+        total = self.n + n
+        delta = mean - self.mean
+        self.mean += delta * n / float(total)
+        self.m2 += m2 + delta * delta * self.n * n / float(total)
+        self.n = total
+
+    def add(self, x):
+        x = np.asarray(x, dtype=float).ravel()
+        if len(x) == 0:
+            return
+        mean = x.mean()
+        self._combine(len(x), mean, ((x - mean)**2).sum())
+        self.min = min(self.min, x.min())
+        self.max = max(self.max, x.max())
+
+    def merge(self, other):
+        if other.n == 0:
+            return
+        self._combine(other.n, other.mean, other.m2)
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def variance(self):
+        return self.m2 / (self.n - 1) if self.n > 1 else 0.0
+
+    def std(self):
+        return math.sqrt(self.variance())
+
+class QuantileSketch(object):
+    ''' mergeable quantile sketch with bounded relative error (DDSketch): values are counted in
+        logarithmic buckets, so any quantile is returned within relativeAccuracy of the true value '''
+
+    def __init__(self, relativeAccuracy=0.01, maxBuckets=2048):
+        self.relativeAccuracy = relativeAccuracy
+        self.gamma = (1.0 + relativeAccuracy) / (1.0 - relativeAccuracy)
+        self.logGamma = math.log(self.gamma)
+        self.maxBuckets = maxBuckets
+        self.pos = {}   # bucket key -> count for positive values
+        self.neg = {}   # bucket key -> count for negative values (by magnitude)
+        self.zeros = 0
+        self.count = 0
+
+    def _addTo(self, store, x):
+        keys, counts = np.unique(np.ceil(np.log(x) / self.logGamma).astype(int), return_counts=True)
+        for k, c in zip(keys.tolist(), counts.tolist()):
+            store[k] = store.get(k, 0) + c
+        self._collapse(store)
+
+    def _collapse(self, store):
+        # fold the smallest magnitudes into one bucket; only the lowest quantiles lose accuracy
+        if len(store) > self.maxBuckets:
+            keys = sorted(store)
+            lowest = keys[len(keys) - self.maxBuckets]
+            for k in keys[:len(keys) - self.maxBuckets]:
+                store[lowest] += store.pop(k)
+
+    def add(self, x):
+        x = np.asarray(x, dtype=float).ravel()
+        self._addTo(self.pos, x[x > 0])
+        self._addTo(self.neg, -x[x < 0])
+        self.zeros += int((x == 0).sum())
+        self.count += len(x)
+
+    def merge(self, other):
+        if other.gamma != self.gamma:
+            raise ValueError("can't merge quantile sketches of different accuracy")
+        for store, ostore in ((self.pos, other.pos), (self.neg, other.neg)):
+            for k, c in ostore.items():
+                store[k] = store.get(k, 0) + c
+            self._collapse(store)
+        self.zeros += other.zeros
+        self.count += other.count
+
+    def _value(self, k):
+        return 2.0 * self.gamma**k / (self.gamma + 1.0)
+
+    def quantile(self, q):
+        if self.count == 0:
+            return np.nan
+        rank = q * (self.count - 1)
+        seen = 0
+        for k in sorted(self.neg, reverse=True):
+            seen += self.neg[k]
+            if seen > rank:
+                return -self._value(k)
+        seen += self.zeros
+        if seen > rank:
+            return 0.0
+        for k in sorted(self.pos):
+            seen += self.pos[k]
+            if seen > rank:
+                return self._value(k)
+        return self._value(max(self.pos))
+
+class Histogram(object):
+    ''' counts of values in fixed bins, plus the numbers below and above the edges '''
+
+    def __init__(self, edges):
+        self.edges = np.asarray(edges, dtype=float)
+        self.counts = np.zeros(len(self.edges) - 1, dtype=np.int64)
+        self.under = 0
+        self.over = 0
+
+    def add(self, x):
+        x = np.asarray(x, dtype=float).ravel()
+        self.counts += np.histogram(x, self.edges)[0]
+        self.under += int((x < self.edges[0]).sum())
+        self.over += int((x > self.edges[-1]).sum())
+
+    def merge(self, other):
+        if not np.array_equal(self.edges, other.edges):
+            raise ValueError("can't merge histograms with different bin edges")
+        self.counts += other.counts
+        self.under += other.under
+        self.over += other.over
+
+def histogramEdges(x, bins=50, margin=0.5):
+    ''' bin edges spanning the values x widened by margin times their range on each side '''
+
+    lo, hi = np.min(x), np.max(x)
+    pad = margin * (hi - lo) if hi > lo else max(abs(lo), 1.0) * 0.01
+    return np.linspace(lo - pad, hi + pad, bins + 1)
+
+#-----------------------------------------
+
+class MonteCarloStats(object):
+    ''' streaming statistics (RunningStats, QuantileSketch, Histogram) of each output '''
+
+    def __init__(self, outputs, edges, relativeAccuracy=0.01):
+        self.outputs = list(outputs)
+        self.stats = dict([(name, RunningStats()) for name in outputs])
+        self.sketches = dict([(name, QuantileSketch(relativeAccuracy)) for name in outputs])
+        self.hists = dict([(name, Histogram(edges[name])) for name in outputs])
+
+    def add(self, results):
+        ''' add a chunk of results given as {output name : array} '''
+
+        for name in self.outputs:
+            self.stats[name].add(results[name])
+            self.sketches[name].add(results[name])
+            self.hists[name].add(results[name])
+
+    def merge(self, other):
+        for name in self.outputs:
+            self.stats[name].merge(other.stats[name])
+            self.sketches[name].merge(other.sketches[name])
+            self.hists[name].merge(other.hists[name])
+
+    def summary(self, name, quantiles=(0.1, 0.5, 0.9)):
+        ''' dict of n, mean, std, min, max and the requested quantiles (keys q10, q50, ...) of output name '''
+
+        st = self.stats[name]
+        res = {'n' : st.n, 'mean' : st.mean, 'std' : st.std(), 'min' : st.min, 'max' : st.max}
+        for q in quantiles:
+            res['q{:g}'.format(100 * q)] = self.sketches[name].quantile(q)
+        return res
+
+#-----------------------------------------
+
+def sampleInputs(dists, n, rng):
+    ''' draw n samples of each input in dists, clipped to the input's bounds
+        returns {input name : array} '''
+
+    samples = {}
+    for name in sorted(dists):
+        if name not in SCHEMA:
+            raise ValueError("'{:}' is not an input of lcoe_csm_assembly".format(name))
+        dist = dists[name]
+        kind = dist[0]
+        if kind == 'normal':
+            x = rng.normal(dist[1], dist[2], n)
+        elif kind == 'lognormal':
+            x = rng.lognormal(dist[1], dist[2], n)
+        elif kind == 'uniform':
+            x = rng.uniform(dist[1], dist[2], n)
+        elif kind == 'triangular':
+            x = rng.triangular(dist[1], dist[2], dist[3], n)
+        elif kind == 'choice':
+            x = rng.choice(np.asarray(dist[1], dtype=float), n, p=dist[2] if len(dist) > 2 else None)
+        else:
+            raise ValueError("unknown distribution '{:}' for {:}".format(kind, name))
+        spec = SCHEMA[name]
+        samples[name] = np.clip(x, spec.low, spec.high)
+    return samples
+
+def _chunkRng(seed, chunk):
+    return np.random.RandomState([seed, chunk])
+
+def _chunkStats(args):
+    ''' pool task: draw chunk number chunk, evaluate it on this worker's assembly and return its stats '''
+
+    from lcoe_csm_pool import _evalCase
+    dists, chunk, n, seed, outputs, edges, relativeAccuracy = args
+    samples = sampleInputs(dists, n, _chunkRng(seed, chunk))
+    names = sorted(samples)
+    results = dict([(name, np.zeros(n)) for name in outputs])
+    for i in range(n):
+        index, vals = _evalCase((i, dict([(name, samples[name][i]) for name in names]), outputs))
+        for j, name in enumerate(outputs):
+            results[name][i] = vals[j]
+    stats = MonteCarloStats(outputs, edges, relativeAccuracy)
+    stats.add(results)
+    return stats
+
+def monteCarlo(dists, nsamples=100000, outputs=MC_OUTPUTS, chunkSize=10000, nproc=1, inputs=None,
+               seed=0, bins=50, edges=None, relativeAccuracy=0.01, progress=None):
+    ''' propagate the input distributions dists through the assembly
+
+        dists     : dict of {input name : (kind, parameters...)}, kind one of normal, lognormal,
+                    uniform, triangular, choice (values[, probabilities])
+        chunkSize : samples drawn and evaluated at a time
+        nproc     : 1 evaluates the chunks on one assembly, otherwise on an lcoePool of nproc workers
+        inputs    : defaults for the inputs without distributions
+        edges     : {output name : bin edges}; by default set from the first chunk
+        progress  : optional function called with (samples done, nsamples) after each chunk
+
+        returns a MonteCarloStats '''
+
+    from lcoe_csm_batch import lcoeBatch
+    from lcoe_csm_assembly import lcoe_csm_assembly
+
+    nchunks = (nsamples + chunkSize - 1) // chunkSize
+    sizes = [min(chunkSize, nsamples - c * chunkSize) for c in range(nchunks)]
+
+    # the first chunk is evaluated here so that its values can fix the histogram edges
+    lcoe = lcoe_csm_assembly(inputs)
+    first = lcoeBatch(sampleInputs(dists, sizes[0], _chunkRng(seed, 0)), outputs, lcoe)
+    if edges is None:
+        edges = dict([(name, histogramEdges(first[name], bins)) for name in outputs])
+    stats = MonteCarloStats(outputs, edges, relativeAccuracy)
+    stats.add(first)
+    done = sizes[0]
+    if progress is not None:
+        progress(done, nsamples)
+
+    if nproc == 1:
+        for c in range(1, nchunks):
+            stats.add(lcoeBatch(sampleInputs(dists, sizes[c], _chunkRng(seed, c)), outputs, lcoe))
+            done += sizes[c]
+            if progress is not None:
+                progress(done, nsamples)
+        return stats
+
+    from lcoe_csm_pool import lcoePool
+    pool = lcoePool(nproc, inputs)
+    try:
+        tasks = [(dists, c, sizes[c], seed, outputs, edges, relativeAccuracy) for c in range(1, nchunks)]
+        for part in pool.pool.imap_unordered(_chunkStats, tasks):
+            stats.merge(part)
+            done += part.stats[outputs[0]].n
+            if progress is not None:
+                progress(done, nsamples)
+    finally:
+        pool.close()
+    return stats
+
+#-----------------------------------------
+
+def printSummary(stats, ofh=sys.stdout):
+    ''' print mean, standard deviation and 10/50/90% quantiles of each output '''
+
+    ofh.write('{:12s} {:>10s} {:>12s} {:>12s} {:>12s} {:>12s} {:>12s}\n'.format(
+              'output', 'n', 'mean', 'std', 'q10', 'q50', 'q90'))
+    for name in stats.outputs:
+        s = stats.summary(name)
+        ofh.write('{:12s} {:10d} {:12.5g} {:12.5g} {:12.5g} {:12.5g} {:12.5g}\n'.format(
+                  name, s['n'], s['mean'], s['std'], s['q10'], s['q50'], s['q90']))
+
+def main():
+
+    nsamples = 100000
+    chunkSize = 10000
+    nproc = 1
+    seed = 0
+    for arg in sys.argv[1:]:
+        if arg.startswith('-help'):
+            sys.stderr.write(__doc__)
+            exit()
+        elif arg.startswith('-np'):
+            nproc = int(arg[3:])
+        elif arg.startswith('-n'):
+            nsamples = int(float(arg[2:]))
+        elif arg.startswith('-chunk'):
+            chunkSize = int(arg[6:])
+        elif arg.startswith('-seed'):
+            seed = int(arg[5:])
+        else:
+            sys.stderr.write("\nUnrecognized argument '{:}'\n\n".format(arg))
+
+    def progress(done, total):
+        sys.stderr.write("  {:d} of {:d} samples\r".format(done, total))
+
+    stats = monteCarlo(DEFAULT_DISTS, nsamples, chunkSize=chunkSize, nproc=nproc, seed=seed, progress=progress)
+    sys.stderr.write('\n')
+    printSummary(stats)
+
+if __name__=="__main__":
+
+    main()
@@ -0,0 +1,144 @@
+"""
+lcoe_csm_multistart.py
+
+Parallel multi-start optimization with csmOptDemo.lcoeOpt.
+
+Starting designs are drawn as a Latin hypercube over the lcoeOpt design
+variable bounds and each start is run by a CONMIN lcoeOpt in a pool of
+worker processes (each worker builds one lcoeOpt and reuses it for all of
+its starts).  Converged optima closer than tol (as a fraction of the
+bounds) are merged, and the best optimum is returned together with the
+trajectory of every start.
+
+    res = multiStart(nstarts=16, nproc=8)
+    print res['best']['lcoe'], res['best']['x']
+"""
+
+import time
+import multiprocessing
+import numpy as np
+
+from lcoe_csm_recorder import implements, ICaseRecorder
+
+# per-process optimization problem, created by _initWorker()
+_opt = None
+_names = None
+
+#-----------------------------------------
+
+class TrajectoryRecorder(object):
+    ''' case recorder keeping the named values of each case in memory, for short optimizer runs '''
+
+    implements(ICaseRecorder)
+
+    def __init__(self, columns):
+        self.columns = list(columns)
+        self.rows = []
+
+    def startup(self):
+        pass
+
+    def record(self, case):
+        self.rows.append([case[name] for name in self.columns])
+
+    def close(self):
+        pass
+
+    def get_iterator(self):
+        return iter([dict(zip(self.columns, row)) for row in self.rows])
+
+def designBounds(rpopt=False):
+    ''' (design variable names, low, high) of lcoeOpt '''
+
+    import csmOptDemo
+    if rpopt:
+        return ['rotorDiameter', 'ratedPower'], [csmOptDemo.rdBounds[0], csmOptDemo.rpBounds[0]], \
+               [csmOptDemo.rdBounds[1], csmOptDemo.rpBounds[1]]
+    return ['rotorDiameter', 'maxTipSpeed'], [csmOptDemo.rdBounds[0], csmOptDemo.tsBounds[0]], \
+           [csmOptDemo.rdBounds[1], csmOptDemo.tsBounds[1]]
+
+def latinHypercube(low, high, n, seed=0):
+    ''' n points stratified in each dimension between low and high, shape (n, len(low)) '''
+
+    rng = np.random.RandomState(seed)
+    low = np.asarray(low, dtype=float)
+    high = np.asarray(high, dtype=float)
+    u = np.column_stack([(rng.permutation(n) + rng.rand(n)) / n for j in range(len(low))])
+    return low + u * (high - low)
+
+#-----------------------------------------
+
+def _initWorker(rpopt, smdir):
+    ''' build this worker's lcoeOpt with the csmOptDemo options of the parent '''
+
+    global _opt, _names
+    import csmOptDemo
+    csmOptDemo.rpopt = rpopt
+    csmOptDemo.smdir = smdir
+    # workers must not share the demo's column files or checkpoint file
+    csmOptDemo.caseDir = None
+    csmOptDemo.checkpointFile = None
+    _opt = csmOptDemo.lcoeOpt()
+    _opt.driver.iprint = 0
+    if hasattr(_opt.lcoe, 'quiet'):
+        _opt.lcoe.quiet = True
+    _names = designBounds(rpopt)[0]
+
+def _runStart(args):
+    ''' run lcoeOpt from one starting design; returns a result dict '''
+
+    index, start = args
+    columns = ['Objective'] + ['lcoe.' + name for name in _names]
+    recorder = TrajectoryRecorder(columns)
+    _opt.driver.recorders = [recorder]
+    for name, x in zip(_names, start):
+        setattr(_opt.lcoe, name, float(x))
+
+    tt = time.time()
+    _opt.run()
+    return {'index' : index, 'start' : list(start),
+            'x' : [getattr(_opt.lcoe, name) for name in _names], 'lcoe' : _opt.lcoe.lcoe,
+            'trajectory' : recorder.rows, 'seconds' : time.time() - tt}
+
+#-----------------------------------------
+
+def uniqueOptima(results, low, high, tol=0.01):
+    ''' group the final designs of results lying within tol (fraction of the bounds) of each other
+        returns a list of {'x', 'lcoe', 'starts'} dicts, best first '''
+
+    span = np.asarray(high, dtype=float) - np.asarray(low, dtype=float)
+    optima = []
+    for res in sorted(results, key=lambda r: r['lcoe']):
+        x = np.asarray(res['x']) / span
+        for opt in optima:
+            if np.max(np.abs(x - np.asarray(opt['x']) / span)) < tol:
+                opt['starts'].append(res['index'])
+                break
+        else:
+            optima.append({'x' : res['x'], 'lcoe' : res['lcoe'], 'starts' : [res['index']]})
+    return optima
+
+def multiStart(nstarts=8, nproc=None, rpopt=False, smdir=None, seed=0, tol=0.01):
+    ''' run lcoeOpt from nstarts Latin hypercube starting designs on nproc worker processes
+
+        returns dict with
+          names   : design variable names
+          best    : the best optimum ({'x', 'lcoe', 'starts'})
+          optima  : all distinct optima, best first
+          results : per-start dicts (start, x, lcoe, trajectory rows of [Objective, design...], seconds) '''
+
+    names, low, high = designBounds(rpopt)
+    starts = latinHypercube(low, high, nstarts, seed)
+    if nproc is None:
+        nproc = multiprocessing.cpu_count()
+    nproc = min(nproc, nstarts)
+
+    pool = multiprocessing.Pool(nproc, _initWorker, (rpopt, smdir))
+    try:
+        results = pool.map(_runStart, list(enumerate(starts.tolist())), 1)
+    finally:
+        pool.close()
+        pool.join()
+
+    optima = uniqueOptima(results, low, high, tol)
+    return {'names' : names, 'best' : optima[0], 'optima' : optima, 'results' : results}
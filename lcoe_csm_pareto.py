@@ -0,0 +1,461 @@
+"""
+lcoe_csm_pareto.py
+
+Multi-objective studies of lcoe_csm_assembly.
+
+Objectives are assembly outputs, or derived values from DERIVED, to be
+minimized; a leading '-' maximizes instead:
+
+    objectives = ['lcoe', 'turbineMass', 'capitalCost', '-capacityFactor']
+
+paretoFront() returns the non-dominated points of an (N, k) objective
+matrix: a sort and running-minimum sweep for two objectives, and Kung's
+divide-and-conquer algorithm for three or more, whose merge is itself a
+divide and conquer over k-1 objectives ending in a staircase sweep, so
+O(N log N) for three objectives and O(N log^(k-2) N) beyond.
+nonDominatedRanks() assigns every front number in one pass in the same
+way (Jensen's algorithm, generalized to ties by Fortin et al.) rather
+than peeling off one front at a time.  paretoSweep() evaluates a Latin
+hypercube design sample and extracts its front; nsga2() is an NSGA-II
+search (non-dominated ranking, crowding distance, SBX crossover and
+polynomial mutation) that evaluates each generation as one batch, on one
+assembly or on a persistent lcoePool.
+
+USAGE: python lcoe_csm_pareto.py [-nsga] [-nN] [-genN] [-npN] [-objNAME,NAME,...]
+"""
+
+import sys, bisect
+import numpy as np
+
+from lcoe_csm_adaptive import batchEvaluator, poolEvaluator
+from lcoe_csm_multistart import latinHypercube
+
+# derived objectives: (assembly outputs needed, function of {output : array})
+DERIVED = {
+    'capitalCost' : (['turbineCost', 'BOScost', 'turbineNumber'],
+                     lambda v: v['turbineCost'] * v['turbineNumber'] + v['BOScost']),
+}
+
+DEFAULT_OBJECTIVES = ['lcoe', 'turbineMass', 'capitalCost', '-capacityFactor']
+
+DEFAULT_RANGES = {
+    'rotorDiameter' : (110.0, 145.0),
+    'maxTipSpeed'   : (75.0, 100.0),
+    'ratedPower'    : (4500.0, 5500.0),
+    'hubHeight'     : (70.0, 120.0),
+}
+
+# below this many points (or pairs of points) the divide-and-conquer recursions compare all pairs directly
+KUNG_LEAF = 64
+
+#-----------------------------------------
+# non-dominated sorting (all objectives minimized)
+#
+# Both recursions work on the distinct rows in lexicographic order, so a row can only be
+# dominated by an earlier one, and identical rows share their front and rank.
+
+def _distinct(F):
+    ''' the distinct rows of F in lexicographic order, and the index of each row of F among them '''
+
+    U, inverse = np.unique(F, axis=0, return_inverse=True)
+    return U, inverse.reshape(-1)
+
+def _front2(U):
+    # a row is on the front if its second objective is below that of every earlier row
+    prev = np.concatenate([[np.inf], np.minimum.accumulate(U[:-1, 1])])
+    return np.flatnonzero(U[:, 1] < prev)
+
+def _dominated(B, T, weak=False, chunk=4096):
+    ''' mask of the rows of B dominated by some row of T (weakly, <= in every column, if weak) '''
+
+    out = np.zeros(len(B), dtype=bool)
+    for i in range(0, len(B), chunk):
+        b = B[i:i + chunk]
+        le = np.ones((len(b), len(T)), dtype=bool)
+        lt = np.zeros((len(b), len(T)), dtype=bool)
+        for j in range(B.shape[1]):
+            le &= T[:, j] <= b[:, j, np.newaxis]
+            if not weak:
+                lt |= T[:, j] < b[:, j, np.newaxis]
+        out[i:i + chunk] = np.any(le if weak else le & lt, axis=1)
+    return out
+
+def _covered(T, B):
+    ''' mask of the rows of B weakly dominated by some row of T '''
+
+    if len(T) == 0 or len(B) == 0:
+        return np.zeros(len(B), dtype=bool)
+    if T.shape[1] == 1:
+        return B[:, 0] >= T[:, 0].min()
+    if T.shape[1] == 2:
+        # staircase: the smallest second column of the rows of T up to each first column
+        s = np.argsort(T[:, 0], kind='mergesort')
+        stairs = np.minimum.accumulate(T[s, 1])
+        pos = np.searchsorted(T[s, 0], B[:, 0], side='right')
+        return (pos > 0) & (stairs[np.maximum(pos - 1, 0)] <= B[:, 1])
+    if len(T) * len(B) <= KUNG_LEAF**2:
+        return _dominated(B, T, weak=True)
+
+    # split T and B together at the median of the first column, rows of T first on ties: the
+    # upper half of T cannot cover the lower half of B, and the lower half of T covers a row in
+    # the upper half of B exactly when it does so in the remaining columns
+    nT = len(T)
+    tag = np.concatenate([np.zeros(nT, dtype=int), np.ones(len(B), dtype=int)])
+    order = np.lexsort((tag, np.concatenate([T[:, 0], B[:, 0]])))
+    low, high = order[:len(order) // 2], order[len(order) // 2:]
+    TL, TH = T[low[low < nT]], T[high[high < nT]]
+    BL, BH = low[low >= nT] - nT, high[high >= nT] - nT
+
+    out = np.zeros(len(B), dtype=bool)
+    out[BL] = _covered(TL, B[BL])
+    covered = _covered(TH, B[BH])
+    rest = ~covered
+    covered[rest] = _covered(TL[:, 1:], B[BH[rest], 1:])
+    out[BH] = covered
+    return out
+
+def _kung(U, idx):
+    # an earlier row dominates a later one exactly when it is <= in every objective but the first,
+    # so the merge is a weak dominance query in one dimension fewer
+    if len(idx) <= KUNG_LEAF:
+        return idx[~_dominated(U[idx], U[idx])]
+    half = len(idx) // 2
+    top = _kung(U, idx[:half])
+    bottom = _kung(U, idx[half:])
+    return np.concatenate([top, bottom[~_covered(U[top, 1:], U[bottom, 1:])]])
+
+def paretoFront(F):
+    ''' indices of the non-dominated rows of the (N, k) objective matrix F (minimization) '''
+
+    F = np.asarray(F, dtype=float)
+    if len(F) == 0:
+        return np.zeros(0, dtype=int)
+    U, inverse = _distinct(F)
+    if F.shape[1] == 1:
+        front = np.array([0])
+    elif F.shape[1] == 2:
+        front = _front2(U)
+    else:
+        front = _kung(U, np.arange(len(U)))
+    onFront = np.zeros(len(U), dtype=bool)
+    onFront[front] = True
+    return np.flatnonzero(onFront[inverse])
+
+def _stairStep(keys, levels, y, r):
+    # add (y, r) to a staircase of strictly increasing keys and levels, dropping the steps it hides
+    k = bisect.bisect_right(keys, y)
+    if k > 0 and levels[k - 1] >= r:
+        return
+    j = bisect.bisect_left(keys, y)
+    m = j
+    while m < len(keys) and levels[m] <= r:
+        m += 1
+    keys[j:m] = [y]
+    levels[j:m] = [r]
+
+def _sweepA(U, S, ranks):
+    # two objectives left: a row's rank is one above the highest rank of the earlier rows whose
+    # second objective is not larger
+    keys, levels = [], []
+    rs = ranks[S].tolist()
+    for i, y in enumerate(U[S, 1].tolist()):
+        k = bisect.bisect_right(keys, y)
+        if k > 0 and levels[k - 1] >= rs[i]:
+            rs[i] = levels[k - 1] + 1
+        _stairStep(keys, levels, y, rs[i])
+    ranks[S] = rs
+
+def _sweepB(U, L, H, ranks):
+    # as _sweepA, with only the rows of L on the staircase and only the rows of H ranked
+    keys, levels = [], []
+    isL = set(L.tolist())
+    for s in np.sort(np.concatenate([L, H])).tolist():
+        y = U[s, 1]
+        if s in isL:
+            _stairStep(keys, levels, y, ranks[s])
+        else:
+            k = bisect.bisect_right(keys, y)
+            if k > 0 and levels[k - 1] >= ranks[s]:
+                ranks[s] = levels[k - 1] + 1
+
+def _ranksA(U, S, k, ranks):
+    ''' finish the ranks of the rows S, which are equal in the objectives after k '''
+
+    if len(S) < 2:
+        return
+    if len(S) <= KUNG_LEAF:
+        # dom[i, j]: row j dominates row i; relax until no rank rises (one pass per front)
+        dom = np.ones((len(S), len(S)), dtype=bool)
+        for j in range(k + 1):
+            dom &= U[S, j] <= U[S, j, np.newaxis]
+        np.fill_diagonal(dom, False)
+        r = ranks[S]
+        while True:
+            raised = np.maximum(r, np.where(dom, r + 1, 0).max(axis=1))
+            if np.array_equal(raised, r):
+                break
+            r = raised
+        ranks[S] = r
+        return
+    if k == 1:
+        _sweepA(U, S, ranks)
+        return
+    values = U[S, k]
+    if values.min() == values.max():
+        _ranksA(U, S, k - 1, ranks)
+        return
+    # split at the median, keeping rows with the median value together on the smaller side
+    p = np.sort(values)[len(values) // 2]
+    if (values < p).sum() <= (values > p).sum():
+        low = values <= p
+    else:
+        low = values < p
+    _ranksA(U, S[low], k, ranks)
+    _ranksB(U, S[low], S[~low], k - 1, ranks)
+    _ranksA(U, S[~low], k, ranks)
+
+def _ranksB(U, L, H, k, ranks):
+    ''' raise the ranks of the rows H above those of the rows of L that dominate them; the ranks
+        of L are final and every row of L is <= every row of H in the objectives after k '''
+
+    if len(L) == 0 or len(H) == 0:
+        return
+    if len(L) * len(H) <= KUNG_LEAF**2:
+        le = np.ones((len(H), len(L)), dtype=bool)
+        for j in range(k + 1):
+            le &= U[L, j] <= U[H, j, np.newaxis]
+        ranks[H] = np.maximum(ranks[H], np.where(le, ranks[L] + 1, 0).max(axis=1))
+        return
+    if k == 1:
+        _sweepB(U, L, H, ranks)
+        return
+    lv, hv = U[L, k], U[H, k]
+    if lv.min() > hv.max():
+        return
+    if lv.max() <= hv.min():
+        _ranksB(U, L, H, k - 1, ranks)
+        return
+    # pivot at the median of H, above its minimum when H is not constant, so both halves shrink
+    hs = np.sort(hv)
+    p = hs[len(hs) // 2]
+    if p == hs[0] and hs[-1] > hs[0]:
+        p = hs[np.searchsorted(hs, hs[0], side='right')]
+    L1, L2 = L[lv <= p], L[lv > p]
+    H1, H2 = H[hv < p], H[hv >= p]
+    _ranksB(U, L1, H1, k, ranks)
+    _ranksB(U, L1, H2, k - 1, ranks)
+    _ranksB(U, L2, H2, k, ranks)
+
+def nonDominatedRanks(F):
+    ''' front number (0 = Pareto front) of each row of F, assigned in one divide-and-conquer pass
+        (Jensen's algorithm as generalized to ties by Fortin, Grenier and Parizeau) '''
+
+    F = np.asarray(F, dtype=float)
+    if len(F) == 0:
+        return np.zeros(0, dtype=int)
+    U, inverse = _distinct(F)
+    if F.shape[1] == 1:
+        ranks = np.arange(len(U))
+    else:
+        ranks = np.zeros(len(U), dtype=int)
+        _ranksA(U, np.arange(len(U)), F.shape[1] - 1, ranks)
+    return ranks[inverse]
+
+def crowdingDistance(F):
+    ''' NSGA-II crowding distance of each row of F within its front '''
+
+    n, k = F.shape
+    dist = np.zeros(n)
+    if n <= 2:
+        dist[:] = np.inf
+        return dist
+    for j in range(k):
+        s = np.argsort(F[:, j])
+        span = F[s[-1], j] - F[s[0], j]
+        dist[s[0]] = dist[s[-1]] = np.inf
+        if span > 0:
+            dist[s[1:-1]] += (F[s[2:], j] - F[s[:-2], j]) / span
+    return dist
+
+#-----------------------------------------
+# objectives
+
+def objectiveOutputs(objectives):
+    ''' assembly outputs needed to compute the objectives '''
+
+    outputs = []
+    for obj in objectives:
+        name = obj.lstrip('-')
+        for out in DERIVED[name][0] if name in DERIVED else [name]:
+            if out not in outputs:
+                outputs.append(out)
+    return outputs
+
+def objectiveMatrix(values, objectives):
+    ''' (N, k) matrix of objectives to minimize from {output name : array} '''
+
+    cols = []
+    for obj in objectives:
+        name = obj.lstrip('-')
+        col = DERIVED[name][1](values) if name in DERIVED else values[name]
+        cols.append(-np.asarray(col, dtype=float) if obj.startswith('-') else np.asarray(col, dtype=float))
+    return np.column_stack(cols)
+
+class _Evaluator(object):
+    ''' evaluates arrays of designs on one assembly or a persistent lcoePool '''
+
+    def __init__(self, outputs, nproc=1, inputs=None):
+        self.outputs = outputs
+        self.pool = None
+        if nproc > 1:
+            from lcoe_csm_pool import lcoePool
+            self.pool = lcoePool(nproc, inputs)
+            self.evaluate = poolEvaluator(self.pool, outputs)
+        else:
+            from lcoe_csm_assembly import lcoe_csm_assembly
+            lcoe = lcoe_csm_assembly(inputs)
+            lcoe.quiet = True
+            self.evaluate = batchEvaluator(outputs, lcoe)
+
+    def __call__(self, names, X):
+        vals = np.array(self.evaluate([dict(zip(names, x)) for x in X.tolist()]), dtype=float)
+        return dict([(name, vals[:, k]) for k, name in enumerate(self.outputs)])
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.close()
+
+def _bounds(ranges):
+    names = sorted(ranges)
+    return names, np.array([ranges[n][0] for n in names], dtype=float), np.array([ranges[n][1] for n in names], dtype=float)
+
+#-----------------------------------------
+
+def paretoSweep(ranges, objectives=DEFAULT_OBJECTIVES, n=1000, nproc=1, inputs=None, seed=0):
+    ''' evaluate a Latin hypercube sample of n designs over ranges ({input : (low, high)})
+        returns dict with names, X (n, ninputs), values ({output : array}), F and front (indices) '''
+
+    names, low, high = _bounds(ranges)
+    X = latinHypercube(low, high, n, seed)
+    evaluator = _Evaluator(objectiveOutputs(objectives), nproc, inputs)
+    try:
+        values = evaluator(names, X)
+    finally:
+        evaluator.close()
+    F = objectiveMatrix(values, objectives)
+    return {'names' : names, 'X' : X, 'values' : values, 'F' : F, 'front' : paretoFront(F)}
+
+def _sbx(p1, p2, rng, eta):
+    u = rng.rand(*p1.shape)
+    beta = np.where(u <= 0.5, (2 * u)**(1.0 / (eta + 1)), (1.0 / (2 * (1 - u)))**(1.0 / (eta + 1)))
+    c1 = 0.5 * ((1 + beta) * p1 + (1 - beta) * p2)
+    c2 = 0.5 * ((1 - beta) * p1 + (1 + beta) * p2)
+    return np.clip(c1, 0, 1), np.clip(c2, 0, 1)
+
+def _mutate(x, rng, eta, rate):
+    u = rng.rand(*x.shape)
+    delta = np.where(u < 0.5, (2 * u)**(1.0 / (eta + 1)) - 1, 1 - (2 * (1 - u))**(1.0 / (eta + 1)))
+    return np.clip(np.where(rng.rand(*x.shape) < rate, x + delta, x), 0, 1)
+
+def _select(F, count):
+    ''' indices of the count best rows of F by (rank, -crowding distance) '''
+
+    ranks = nonDominatedRanks(F)
+    crowd = np.zeros(len(F))
+    for r in np.unique(ranks):
+        members = np.flatnonzero(ranks == r)
+        crowd[members] = crowdingDistance(F[members])
+    return np.lexsort((-crowd, ranks))[:count], ranks, crowd
+
+def nsga2(ranges, objectives=DEFAULT_OBJECTIVES, popSize=100, generations=50, nproc=1, inputs=None,
+          seed=0, etaC=15.0, etaM=20.0, progress=None):
+    ''' NSGA-II search over ranges ({input : (low, high)}); each generation is evaluated as one batch
+        progress : optional function called with (generation, front size) after each generation
+        returns dict with names, X, values, F of the final population and front (indices) '''
+
+    rng = np.random.RandomState(seed)
+    names, low, high = _bounds(ranges)
+    k = len(names)
+    evaluator = _Evaluator(objectiveOutputs(objectives), nproc, inputs)
+    scale = lambda U: low + U * (high - low)
+    try:
+        U = latinHypercube(np.zeros(k), np.ones(k), popSize, seed)
+        values = evaluator(names, scale(U))
+        F = objectiveMatrix(values, objectives)
+        ranks, crowd = _select(F, popSize)[1:]
+
+        for gen in range(generations):
+            # binary tournaments on (rank, crowding distance), an even number for SBX pairs
+            nparents = popSize + popSize % 2
+            a = rng.randint(0, popSize, nparents)
+            b = rng.randint(0, popSize, nparents)
+            better = (ranks[a] < ranks[b]) | ((ranks[a] == ranks[b]) & (crowd[a] > crowd[b]))
+            parents = U[np.where(better, a, b)]
+            c1, c2 = _sbx(parents[0::2], parents[1::2], rng, etaC)
+            children = _mutate(np.vstack([c1, c2])[:popSize], rng, etaM, 1.0 / k)
+
+            childValues = evaluator(names, scale(children))
+            U = np.vstack([U, children])
+            values = dict([(name, np.concatenate([values[name], childValues[name]])) for name in values])
+            F = objectiveMatrix(values, objectives)
+
+            keep, ranks, crowd = _select(F, popSize)
+            U = U[keep]
+            values = dict([(name, values[name][keep]) for name in values])
+            F = F[keep]
+            ranks = ranks[keep]
+            crowd = crowd[keep]
+            if progress is not None:
+                progress(gen + 1, int((ranks == 0).sum()))
+    finally:
+        evaluator.close()
+
+    return {'names' : names, 'X' : scale(U), 'values' : values, 'F' : F, 'front' : np.flatnonzero(ranks == 0)}
+
+#-----------------------------------------
+
+def printFront(res, objectives, ofh=sys.stdout):
+    ''' print the designs and objective values of the Pareto front, sorted by the first objective '''
+
+    front = res['front'][np.argsort(res['F'][res['front'], 0])]
+    ofh.write(' '.join(['{:>14s}'.format(name[:14]) for name in res['names'] + objectives]) + '\n')
+    for i in front:
+        row = list(res['X'][i]) + [(-f if obj.startswith('-') else f) for f, obj in zip(res['F'][i], objectives)]
+        ofh.write(' '.join(['{:14.6g}'.format(v) for v in row]) + '\n')
+    ofh.write('{:d} of {:d} designs on the Pareto front\n'.format(len(front), len(res['F'])))
+
+def main():
+
+    useNSGA = False
+    n = 1000
+    generations = 50
+    nproc = 1
+    objectives = DEFAULT_OBJECTIVES
+    for arg in sys.argv[1:]:
+        if arg.startswith('-help'):
+            sys.stderr.write(__doc__)
+            exit()
+        elif arg.startswith('-nsga'):
+            useNSGA = True
+        elif arg.startswith('-np'):
+            nproc = int(arg[3:])
+        elif arg.startswith('-n'):
+            n = int(arg[2:])
+        elif arg.startswith('-gen'):
+            generations = int(arg[4:])
+        elif arg.startswith('-obj'):
+            objectives = arg[4:].split(',')
+        else:
+            sys.stderr.write("\nUnrecognized argument '{:}'\n\n".format(arg))
+
+    if useNSGA:
+        def progress(gen, nfront):
+            sys.stderr.write("  generation {:d}: {:d} designs on the front\n".format(gen, nfront))
+        res = nsga2(DEFAULT_RANGES, objectives, n, generations, nproc, progress=progress)
+    else:
+        res = paretoSweep(DEFAULT_RANGES, objectives, n, nproc)
+    printFront(res, objectives)
+
+if __name__=="__main__":
+
+    main()
@@ -0,0 +1,192 @@
+"""
+lcoe_csm_pool.py
+
+Process pool of warm lcoe_csm_assembly instances.
+
+Each worker process builds and configures one lcoe_csm_assembly when it
+starts and then evaluates cases (dicts of {input name : value}) against it
+for the life of the pool.  Each case is applied on top of the worker's
+default inputs, so inputs set by one case never leak into the next, and
+is validated against the input schema first: map() and the imap methods
+raise ValueError for an unknown or out-of-bounds input, while stream()
+and evaluate() report it as that case's error.
+map() returns results in case order; imapUnordered() yields (case index,
+results) as soon as each case finishes; stream() evaluates an unbounded
+iterable with a bounded number of cases in flight.
+
+    pool = lcoePool(nproc=8)
+    results = pool.map(cases, ['lcoe', 'aep'])
+    pool.close()
+"""
+
+import sys
+import multiprocessing
+import Queue
+
+from lcoe_csm_batch import BATCH_OUTPUTS, setInput, evaluate
+from lcoe_csm_schema import bindInputs
+
+# per-process assembly, its default inputs and result cache, created by _initWorker()
+_lcoe = None
+_defaults = None
+_cache = None
+
+#-----------------------------------------
+
+def _initWorker(inputs, cacheFile=None):
+    ''' build the warm assembly (and open the shared result cache) for this worker process '''
+
+    global _lcoe, _defaults, _cache
+    from lcoe_csm_assembly import lcoe_csm_assembly
+    from lcoe_csm_cache import fullInputs
+    _lcoe = lcoe_csm_assembly(inputs)
+    _lcoe.quiet = True
+    _defaults = fullInputs(_lcoe)
+    if cacheFile is not None:
+        from lcoe_csm_cache import lcoeCache
+        _cache = lcoeCache(cacheFile)
+
+def _applyCase(case):
+    ''' validate a case against the input schema and assign it over this worker's default inputs;
+        raises ValueError for a case that is not a dict or has an unknown or out-of-bounds input '''
+
+    if not isinstance(case, dict):
+        raise ValueError(str(case))
+    for name in _defaults:
+        if name not in case:
+            setInput(_lcoe, name, _defaults[name])
+    bindInputs(_lcoe, case)
+
+def _evalCase(args):
+    ''' evaluate one (index, case, outputs) task on this worker's assembly; an invalid case raises '''
+
+    index, case, outputs = args
+    _applyCase(case)
+    vals = evaluate(_lcoe, outputs, _cache)
+    return index, [vals[name] for name in outputs]
+
+def _evalCaseChecked(args):
+    ''' evaluate one (index, case, outputs) task, validating the case against the input schema;
+        returns (index, output values, None) or (index, None, error message) '''
+
+    index, case, outputs = args
+    try:
+        _applyCase(case)
+        vals = evaluate(_lcoe, outputs, _cache)
+        return index, [vals[name] for name in outputs], None
+    except Exception, err:
+        return index, None, '{:}: {:}'.format(err.__class__.__name__, err)
+
+#-----------------------------------------
+
+class lcoePool(object):
+    ''' pool of worker processes, each holding a configured lcoe_csm_assembly '''
+
+    def __init__(self, nproc=None, inputs=None, cacheFile=None):
+        ''' nproc     : number of worker processes (default: number of cores)
+            inputs    : dict of inputs passed to each worker's lcoe_csm_assembly()
+            cacheFile : optional lcoe_csm_cache database shared by all workers '''
+
+        if nproc is None:
+            nproc = multiprocessing.cpu_count()
+        self.nproc = nproc
+        self.pool = multiprocessing.Pool(nproc, _initWorker, (inputs, cacheFile))
+
+    def _tasks(self, cases, outputs):
+        for i, case in enumerate(cases):
+            yield i, case, outputs
+
+    def _chunksize(self, ncases):
+        # a few chunks per worker keeps the load balanced without per-case IPC
+        return max(1, ncases // (4*self.nproc))
+
+    def map(self, cases, outputs=BATCH_OUTPUTS):
+        ''' evaluate a list of cases and return a list of output-value lists in case order '''
+
+        cases = list(cases)
+        results = [None] * len(cases)
+        for i, vals in self.pool.imap_unordered(_evalCase, self._tasks(cases, outputs),
+                                                self._chunksize(len(cases))):
+            results[i] = vals
+        return results
+
+    def imapUnordered(self, cases, outputs=BATCH_OUTPUTS, chunksize=1):
+        ''' evaluate an iterable of cases, yielding (case index, output values) as cases complete '''
+
+        return self.pool.imap_unordered(_evalCase, self._tasks(cases, outputs), chunksize)
+
+    def imap(self, cases, outputs=BATCH_OUTPUTS, chunksize=1):
+        ''' evaluate an iterable of cases, yielding (case index, output values) in case order '''
+
+        return self.pool.imap(_evalCase, self._tasks(cases, outputs), chunksize)
+
+    def stream(self, cases, outputs=BATCH_OUTPUTS, ordered=True, window=None):
+        ''' evaluate an iterable (e.g. lines read from a pipe) of cases, keeping at most window
+            cases in flight, and yield (case index, output values, error message) as they finish
+
+            cases   : iterable of case dicts; a non-dict item is reported as an error for that index
+            ordered : if False, results are yielded in completion order rather than case order
+            window  : maximum number of cases submitted but not yet yielded (default 4 per worker) '''
+
+        if window is None:
+            window = 4*self.nproc
+
+        done = Queue.Queue()
+        cases = iter(cases)
+        index = 0
+        exhausted = False
+        pending = 0
+        nextIndex = 0
+        held = {}
+        while True:
+            while not exhausted and pending + len(held) < window:
+                try:
+                    case = next(cases)
+                except StopIteration:
+                    exhausted = True
+                    break
+                self.pool.apply_async(_evalCaseChecked, ((index, case, outputs),), callback=done.put)
+                index += 1
+                pending += 1
+            if pending == 0:
+                return
+
+            # a timeout keeps the wait interruptible with Ctrl-C
+            while True:
+                try:
+                    result = done.get(True, 1.0)
+                    break
+                except Queue.Empty:
+                    pass
+            pending -= 1
+
+            if not ordered:
+                yield result
+                continue
+            held[result[0]] = result
+            while nextIndex in held:
+                yield held.pop(nextIndex)
+                nextIndex += 1
+
+    def evaluate(self, case, outputs=BATCH_OUTPUTS):
+        ''' evaluate one validated case and wait for it; safe to call from several threads
+            returns (output values, error message) '''
+
+        index, vals, err = self.pool.apply_async(_evalCaseChecked, ((0, case, outputs),)).get()
+        return vals, err
+
+    def evaluateMany(self, cases, outputs=BATCH_OUTPUTS):
+        ''' evaluate a list of validated cases and wait for all of them; safe to call from several threads
+            returns a list of (output values, error message) in case order '''
+
+        tasks = list(self._tasks(cases, outputs))
+        results = self.pool.map_async(_evalCaseChecked, tasks, self._chunksize(len(tasks))).get()
+        return [(vals, err) for index, vals, err in results]
+
+    def close(self):
+        self.pool.close()
+        self.pool.join()
+
+    def terminate(self):
+        self.pool.terminate()
+        self.pool.join()
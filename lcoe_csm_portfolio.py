@@ -0,0 +1,169 @@
+"""
+lcoe_csm_portfolio.py
+
+Designs x sites portfolio evaluation of lcoe_csm_assembly.
+
+A design table (turbine inputs such as rotorDiameter, ratedPower,
+hubHeight) and a site table (windSpeed50m, weibullK, altitude, seaDepth,
+...) are given as dicts of {input name : array}.  The result is a dense
+(ndesigns, nsites) matrix per output.
+
+The stages are factorized through the assembly's incremental execution:
+each design is set once and its sites are then run in an order that
+changes as few inputs as possible between consecutive pairs.  Sites are
+sorted by the site inputs that also feed tcc (TCC_SITE_INPUTS).  A pair
+that changes only wind-resource inputs re-runs aep1, but the aep1
+outputs tcc reads (ratedWindSpeed, maxEfficiency) come out unchanged, so
+the driver skips tcc and bos and re-runs only om and fin.  tcc and bos
+therefore run once per design and distinct (altitude, seaDepth, year,
+month) group instead of once per pair; componentRuns reports the counts.
+Blocks of designs are evaluated in parallel on an lcoePool.
+
+USAGE: python lcoe_csm_portfolio.py designs.csv sites.csv [-npN] [-oFILE.npz]
+"""
+
+import sys
+import numpy as np
+
+from lcoe_csm_batch import BATCH_OUTPUTS, setInput
+from lcoe_csm_schema import bindColumns, readScenarios, scenarioCases
+
+# site inputs that tcc depends on; sites are grouped by these
+TCC_SITE_INPUTS = ['altitude', 'seaDepth', 'year', 'month']
+
+#-----------------------------------------
+
+def siteOrder(sites):
+    ''' order of the rows of the site table that keeps equal TCC_SITE_INPUTS (and then equal
+        values of the other site inputs) next to each other '''
+
+    names = [name for name in TCC_SITE_INPUTS if name in sites] + \
+            sorted([name for name in sites if name not in TCC_SITE_INPUTS])
+    if len(names) == 0:
+        return np.arange(0)
+    # np.lexsort sorts by its last key first
+    return np.lexsort([np.asarray(sites[name]) for name in reversed(names)])
+
+def evaluateBlock(lcoe, designs, sites, outputs=BATCH_OUTPUTS):
+    ''' evaluate every (design, site) pair of lists of input dicts on one assembly, designs in the
+        outer loop, re-assigning only inputs whose values change
+        returns (array (len(designs), len(sites), len(outputs)), {component : runs}) '''
+
+    from lcoe_csm_cache import fullInputs
+
+    runs = dict(lcoe.stats.calls)
+    applied = fullInputs(lcoe)
+
+    def apply(case):
+        for name in case:
+            if applied[name] != case[name]:
+                setInput(lcoe, name, case[name])
+                applied[name] = case[name]
+
+    res = np.zeros((len(designs), len(sites), len(outputs)))
+    for i, design in enumerate(designs):
+        apply(design)
+        for j, site in enumerate(sites):
+            apply(site)
+            lcoe.execute()
+            res[i, j] = [getattr(lcoe, name) for name in outputs]
+
+    runs = dict([(name, lcoe.stats.calls[name] - runs.get(name, 0)) for name in lcoe.stats.calls])
+    return res, runs
+
+def _evalBlock(args):
+    ''' pool task: evaluateBlock() on this worker's assembly '''
+
+    from lcoe_csm_pool import _lcoe
+    start, designs, sites, outputs = args
+    res, runs = evaluateBlock(_lcoe, designs, sites, outputs)
+    return start, res, runs
+
+#-----------------------------------------
+
+def portfolio(designs, sites, outputs=BATCH_OUTPUTS, nproc=1, inputs=None, nblocks=None):
+    ''' evaluate every design against every site
+
+        designs, sites : dicts of {input name : array}, validated against the input schema;
+                         the two tables must not share inputs
+        nproc          : 1 runs on one assembly, otherwise blocks of designs run on an lcoePool
+        inputs         : defaults for the inputs in neither table
+        nblocks        : number of design blocks (default 4 per process)
+
+        returns dict of {output name : array (ndesigns, nsites)} and 'componentRuns',
+        the number of times each workflow component ran '''
+
+    shared = set(designs) & set(sites)
+    if shared:
+        raise ValueError("inputs in both the design and site tables: {:}".format(', '.join(sorted(shared))))
+    designs = bindColumns(designs)
+    sites = bindColumns(sites)
+
+    designRows = list(scenarioCases(designs))
+    siteRows = list(scenarioCases(sites))
+    order = siteOrder(sites)
+    orderedSites = [siteRows[k] for k in order]
+
+    if nblocks is None:
+        nblocks = 4 * nproc
+    blocks = [b for b in np.array_split(np.arange(len(designRows)), min(nblocks, len(designRows))) if len(b)]
+    tasks = [(b[0], [designRows[i] for i in b], orderedSites, outputs) for b in blocks]
+
+    if nproc == 1:
+        from lcoe_csm_assembly import lcoe_csm_assembly
+        lcoe = lcoe_csm_assembly(inputs)
+        lcoe.quiet = True
+        results = [(start, ) + evaluateBlock(lcoe, d, s, o) for start, d, s, o in tasks]
+    else:
+        from lcoe_csm_pool import lcoePool
+        pool = lcoePool(nproc, inputs)
+        try:
+            results = pool.pool.map(_evalBlock, tasks, 1)
+        finally:
+            pool.close()
+
+    matrix = np.zeros((len(designRows), len(siteRows), len(outputs)))
+    componentRuns = {}
+    for start, res, runs in results:
+        matrix[start:start + len(res)][:, order] = res
+        for name in runs:
+            componentRuns[name] = componentRuns.get(name, 0) + runs[name]
+
+    out = dict([(name, matrix[:, :, k]) for k, name in enumerate(outputs)])
+    out['componentRuns'] = componentRuns
+    return out
+
+#-----------------------------------------
+
+def main():
+
+    files = []
+    nproc = 1
+    ofname = 'portfolio.npz'
+    for arg in sys.argv[1:]:
+        if arg.startswith('-help'):
+            sys.stderr.write(__doc__)
+            exit()
+        elif arg.startswith('-np'):
+            nproc = int(arg[3:])
+        elif arg.startswith('-o'):
+            ofname = arg[2:]
+        elif arg.startswith('-'):
+            sys.stderr.write("\nUnrecognized argument '{:}'\n\n".format(arg))
+        else:
+            files.append(arg)
+    if len(files) != 2:
+        sys.stderr.write(__doc__)
+        exit(1)
+
+    res = portfolio(readScenarios(files[0]), readScenarios(files[1]), nproc=nproc)
+    np.savez(ofname, **dict([(name, res[name]) for name in BATCH_OUTPUTS]))
+    sys.stderr.write("Wrote {:d} x {:d} LCOE matrix to '{:}'\n".format(res['lcoe'].shape[0], res['lcoe'].shape[1], ofname))
+    npairs = res['lcoe'].size
+    for name in sorted(res['componentRuns']):
+        if name != 'overhead':
+            sys.stderr.write("  {:8s} ran {:8d} times for {:d} pairs\n".format(name, res['componentRuns'][name], npairs))
+
+if __name__=="__main__":
+
+    main()
@@ -0,0 +1,122 @@
+"""
+lcoe_csm_recorder.py
+
+Streaming columnar case recorder for OpenMDAO drivers.
+
+ColumnarCaseRecorder implements OpenMDAO's ICaseRecorder, so it can be used
+in a driver's recorders list in place of ListCaseRecorder.  Instead of keeping every case in memory it buffers a
+chunk of values per column and appends each full chunk to one flat binary
+file per column:
+
+    doeCases/columns.json        column names, dtypes and file names
+    doeCases/lcoe.lcoe.f8        raw little-endian values, one per case
+    ...
+
+readColumns() returns the columns as NumPy arrays, memory-mapped by
+default, so post-processing a million-case run does not parse any text.
+"""
+
+import os, json
+import numpy as np
+
+try:
+    from zope.interface import implements
+    from openmdao.main.interfaces import ICaseRecorder
+except ImportError:
+    # without OpenMDAO the recorders are plain objects; readColumns() needs only NumPy
+    ICaseRecorder = None
+    def implements(*interfaces):
+        pass
+
+#-----------------------------------------
+
+class ColumnarCaseRecorder(object):
+    ''' records the named case values of each case into a directory of binary column files '''
+
+    implements(ICaseRecorder)
+
+    def __init__(self, dirname, columns, chunkSize=4096, dtypes=None):
+        ''' dirname   : output directory (created if needed; existing columns are overwritten)
+            columns   : case variable names to record, e.g. ['lcoe.lcoe', 'lcoe.rotorDiameter']
+            chunkSize : number of cases buffered in memory between writes
+            dtypes    : optional dict of {column : numpy dtype}, default float64 '''
+
+        if dtypes is None:
+            dtypes = {}
+        self.dirname = dirname
+        self.columns = list(columns)
+        self.chunkSize = chunkSize
+        self.dtypes = [np.dtype(dtypes.get(name, 'f8')).newbyteorder('<') for name in self.columns]
+        self.files = [os.path.join(dirname, '{:}.{:}{:}'.format(name, dt.kind, dt.itemsize))
+                      for name, dt in zip(self.columns, self.dtypes)]
+
+        if not os.path.isdir(dirname):
+            os.makedirs(dirname)
+        meta = {'columns' : [{'name' : name, 'dtype' : dt.str, 'file' : os.path.basename(fname)}
+                             for name, dt, fname in zip(self.columns, self.dtypes, self.files)]}
+        with open(os.path.join(dirname, 'columns.json'), 'w') as ofh:
+            json.dump(meta, ofh, indent=1)
+        for fname in self.files:
+            open(fname, 'wb').close()
+
+        self.buffers = [np.zeros(chunkSize, dtype=dt) for dt in self.dtypes]
+        self.nbuf = 0
+        self.ncases = 0
+
+    def startup(self):
+        ''' called by the driver before its first case; the column files are created in __init__ '''
+
+        pass
+
+    def record(self, case):
+        ''' buffer the column values of one case (anything indexable by column name) '''
+
+        for buf, name in zip(self.buffers, self.columns):
+            buf[self.nbuf] = case[name]
+        self.nbuf += 1
+        self.ncases += 1
+        if self.nbuf == self.chunkSize:
+            self.flush()
+
+    def flush(self):
+        ''' append the buffered values to the column files '''
+
+        if self.nbuf == 0:
+            return
+        for buf, fname in zip(self.buffers, self.files):
+            with open(fname, 'ab') as ofh:
+                buf[:self.nbuf].tofile(ofh)
+        self.nbuf = 0
+
+    def close(self):
+        self.flush()
+
+    def get_iterator(self):
+        ''' iterate over the recorded cases as {column : value} dicts (for code written against ListCaseRecorder) '''
+
+        self.flush()
+        cols = readColumns(self.dirname)
+        for i in range(self.ncases):
+            yield dict([(name, cols[name][i]) for name in self.columns])
+
+#-----------------------------------------
+
+def readColumns(dirname, names=None, mmap=True):
+    ''' return {column : array} for the columns recorded in dirname
+        names : subset of columns to read (default all)
+        mmap  : memory-map the files rather than reading them into memory '''
+
+    with open(os.path.join(dirname, 'columns.json')) as ifh:
+        meta = json.load(ifh)
+
+    cols = {}
+    for col in meta['columns']:
+        if names is not None and col['name'] not in names:
+            continue
+        fname = os.path.join(dirname, col['file'])
+        dt = np.dtype(str(col['dtype']))
+        if mmap and os.path.getsize(fname) > 0:
+            cols[col['name']] = np.memmap(fname, dtype=dt, mode='r')
+        else:
+            cols[col['name']] = np.fromfile(fname, dtype=dt)
+    return cols
@@ -0,0 +1,146 @@
+"""
+lcoe_csm_schema.py
+
+Declarative input schema for lcoe_csm_assembly.
+
+Each assembly input that a scenario may set is described once by an
+InputSpec (name, type, units, bounds and the assembly trait it is written
+to).  The schema is used to bind a whole scenario dict to an assembly in
+one validated pass, and to validate and convert whole columns of a
+scenario table (e.g. read from CSV) at once with NumPy.
+"""
+
+from collections import namedtuple
+import numpy as np
+
+InputSpec = namedtuple('InputSpec', ['name', 'type', 'units', 'low', 'high', 'trait'])
+
+INPUT_SCHEMA = [
+    # turbine configuration
+    # rotor
+    InputSpec('rotorDiameter',       float, 'm',    10.0,   300.0,   'rotorDiameter'),
+    InputSpec('maxTipSpeed',         float, 'm/s',  20.0,   150.0,   'maxTipSpeed'),
+    InputSpec('bladeNumber',         int,   None,   1,      6,       'bladeNumber'),
+    InputSpec('advancedBlade',       bool,  None,   0,      1,       'advancedBlade'),
+    InputSpec('maxPowerCoefficient', float, None,   0.0,    0.593,   'maxPowerCoefficient'),
+    InputSpec('optTipSpeedRatio',    float, None,   1.0,    20.0,    'optTipSpeedRatio'),
+    InputSpec('cutInWindSpeed',      float, 'm/s',  0.0,    15.0,    'cutInWindSpeed'),
+    InputSpec('cutOutWindSpeed',     float, 'm/s',  5.0,    50.0,    'cutOutWindSpeed'),
+    InputSpec('thrustCoefficient',   float, None,   0.0,    2.0,     'thrustCoefficient'),
+    # drivetrain
+    InputSpec('ratedPower',          float, 'kW',   100.0,  20000.0, 'ratedPower'),
+    InputSpec('drivetrainDesign',    int,   None,   1,      4,       'drivetrainDesign'),
+    InputSpec('crane',               bool,  None,   0,      1,       'crane'),
+    InputSpec('advancedBedplate',    int,   None,   0,      2,       'advancedBedplate'),
+    # tower
+    InputSpec('hubHeight',           float, 'm',    10.0,   250.0,   'hubHeight'),
+    # plant configuration
+    InputSpec('windSpeed50m',        float, 'm/s',  0.0,    30.0,    'windSpeed50m'),
+    InputSpec('weibullK',            float, None,   0.5,    10.0,    'weibullK'),
+    InputSpec('shearExponent',       float, None,   0.0,    1.0,     'shearExponent'),
+    InputSpec('seaDepth',            float, 'm',    0.0,    1000.0,  'seaDepth'),
+    InputSpec('altitude',            float, 'm',    -500.0, 5000.0,  'altitude'),
+    InputSpec('airDensity',          float, 'kg/m**3', 0.0, 2.0,     'airDensity'),
+    InputSpec('year',                int,   'yr',   1990,   2100,    'year'),
+    InputSpec('month',               int,   'mon',  1,      12,      'month'),
+    InputSpec('turbineNumber',       int,   None,   1,      10000,   'turbineNumber'),
+    InputSpec('soilingLosses',       float, None,   0.0,    1.0,     'soilingLosses'),
+    InputSpec('arrayLosses',         float, None,   0.0,    1.0,     'arrayLosses'),
+    InputSpec('availability',        float, None,   0.0,    1.0,     'availability'),
+    # financial
+    InputSpec('fixedChargeRate',     float, None,   0.0,    1.0,     'fixedChargeRate'),
+    InputSpec('constructionTime',    float, 'yr',   0.0,    10.0,    'constructionTime'),
+    InputSpec('projectLifetime',     float, 'yr',   1.0,    100.0,   'projectLifetime'),
+]
+
+SCHEMA = dict([(spec.name, spec) for spec in INPUT_SCHEMA])
+
+#-----------------------------------------
+
+def _spec(name):
+    if name not in SCHEMA:
+        raise ValueError("'{:}' is not an input of lcoe_csm_assembly (known inputs: {:})".format(
+                         name, ', '.join(sorted(SCHEMA))))
+    return SCHEMA[name]
+
+def castValue(name, value):
+    ''' return value converted to the type of input name (no bounds check) '''
+
+    spec = _spec(name)
+    x = float(value)
+    if spec.type is bool:
+        return int(round(x)) != 0
+    if spec.type is int:
+        return int(round(x))
+    return x
+
+def convertValue(name, value):
+    ''' return value converted to the type of input name, raising ValueError if it is out of bounds '''
+
+    spec = _spec(name)
+    if not (spec.low <= float(value) <= spec.high):
+        raise ValueError("{:} = {:} is outside [{:}, {:}]".format(name, value, spec.low, spec.high))
+    return castValue(name, value)
+
+def checkUsed(lcoe, names):
+    ''' raise ValueError if one of names is an input the assembly keeps but ignores
+        (listed in its UNUSED_INPUTS, e.g. arrayLosses of lcoe_csm_wake_assembly) '''
+
+    for name in names:
+        if name in getattr(lcoe, 'UNUSED_INPUTS', ()):
+            raise ValueError("'{:}' is not used by {:}".format(name, lcoe.__class__.__name__))
+
+def bindInputs(lcoe, inputs):
+    ''' validate a scenario dict of {input name : value} and assign it to the assembly;
+        nothing is assigned unless every input is valid '''
+
+    checkUsed(lcoe, inputs)
+    values = [(_spec(name).trait, convertValue(name, inputs[name])) for name in inputs]
+    for trait, value in values:
+        setattr(lcoe, trait, value)
+
+#-----------------------------------------
+
+def bindColumns(columns):
+    ''' validate and convert a scenario table given as {input name : array} in one pass per column
+        returns {input name : typed array}; raises ValueError naming the first bad row of a column '''
+
+    typed = {}
+    n = None
+    for name in columns:
+        spec = _spec(name)
+        x = np.asarray(columns[name], dtype=float)
+        if n is None:
+            n = len(x)
+        elif len(x) != n:
+            raise ValueError("column '{:}' has {:d} rows, expected {:d}".format(name, len(x), n))
+
+        bad = np.flatnonzero(~((x >= spec.low) & (x <= spec.high)))
+        if len(bad):
+            raise ValueError("{:} = {:} in row {:d} is outside [{:}, {:}]".format(
+                             name, x[bad[0]], bad[0], spec.low, spec.high))
+        if spec.type is bool:
+            typed[name] = np.rint(x) != 0
+        elif spec.type is int:
+            typed[name] = np.rint(x).astype(int)
+        else:
+            typed[name] = x
+    return typed
+
+def readScenarios(filename):
+    ''' read a CSV scenario table (header row of input names) and return bindColumns() of it '''
+
+    with open(filename) as ifh:
+        header = [name.strip() for name in ifh.readline().split(',')]
+        data = np.loadtxt(ifh, delimiter=',', ndmin=2)
+    if data.size == 0:
+        data = data.reshape(0, len(header))
+    return bindColumns(dict([(name, data[:, j]) for j, name in enumerate(header)]))
+
+def scenarioCases(columns):
+    ''' iterate over the rows of a bound scenario table as {input name : value} dicts '''
+
+    names = list(columns)
+    cols = [columns[name].tolist() for name in names]
+    for row in zip(*cols):
+        yield dict(zip(names, row))
@@ -0,0 +1,253 @@
+"""
+lcoe_csm_sensitivity.py
+
+Global sensitivity analysis of lcoe_csm_assembly outputs.
+
+Any continuous assembly input (design variables and passthroughs such as
+windSpeed50m, weibullK, availability, arrayLosses, fixedChargeRate) can be
+given a range.  morris() computes Morris elementary effects (mu, mu*,
+sigma) from random one-at-a-time trajectories.  sobol() computes first and
+total order Sobol indices from a Saltelli sample, using the Saltelli (2010)
+and Jansen estimators.  Both report bootstrap confidence intervals.
+
+Samples are evaluated with lcoeBatch on one assembly (nproc=1), which
+re-assigns only the inputs that changed between points, or on an
+lcoePool of warm worker processes (nproc > 1).
+
+    ranges = {'windSpeed50m' : (7.0, 10.0), 'fixedChargeRate' : (0.09, 0.13)}
+    res = sobol(ranges, n=1024, nproc=8)
+    printIndices(res)
+
+USAGE: python lcoe_csm_sensitivity.py [-morris] [-sobolN] [-trajN] [-npN] [-outNAME] [-cacheFILE]
+"""
+
+import sys
+import numpy as np
+
+from lcoe_csm_batch import lcoeBatch
+from lcoe_csm_schema import SCHEMA
+
+# default ranges: the csmSensDemo sweeps plus the main site and financial inputs
+DEFAULT_RANGES = {
+    'hubHeight'       : (70.0, 120.0),
+    'rotorDiameter'   : (112.0, 140.0),
+    'maxTipSpeed'     : (70.0, 100.0),
+    'ratedPower'      : (4500.0, 5500.0),
+    'windSpeed50m'    : (7.0, 10.0),
+    'weibullK'        : (1.8, 2.6),
+    'availability'    : (0.90, 0.98),
+    'arrayLosses'     : (0.05, 0.15),
+    'soilingLosses'   : (0.0, 0.05),
+    'fixedChargeRate' : (0.09, 0.13),
+}
+
+#-----------------------------------------
+
+def _bounds(ranges):
+    ''' return (names, low, high) for a dict of {input name : (low, high)} of continuous inputs '''
+
+    names = sorted(ranges.keys())
+    for name in names:
+        if name not in SCHEMA:
+            raise ValueError("'{:}' is not an input of lcoe_csm_assembly".format(name))
+        if SCHEMA[name].type is not float:
+            raise ValueError("'{:}' is not a continuous input and can't be given a range".format(name))
+    low = np.array([ranges[name][0] for name in names], dtype=float)
+    high = np.array([ranges[name][1] for name in names], dtype=float)
+    return names, low, high
+
+def evaluatePoints(names, pts, output='lcoe', nproc=1, inputs=None, cacheFile=None):
+    ''' evaluate output at each row of pts (columns in the order of names), serially with lcoeBatch
+        or on an lcoePool of nproc workers; inputs are the defaults for the inputs not varied
+        returns an array of length len(pts) '''
+
+    if nproc == 1:
+        from lcoe_csm_assembly import lcoe_csm_assembly
+        cache = None
+        if cacheFile is not None:
+            from lcoe_csm_cache import lcoeCache
+            cache = lcoeCache(cacheFile)
+        lcoe = lcoe_csm_assembly(inputs)
+        return lcoeBatch(dict([(name, pts[:, j]) for j, name in enumerate(names)]),
+                         [output], lcoe, cache)[output]
+
+    from lcoe_csm_pool import lcoePool
+    pool = lcoePool(nproc, inputs, cacheFile)
+    try:
+        results = pool.map([dict(zip(names, pt)) for pt in pts.tolist()], [output])
+    finally:
+        pool.close()
+    return np.array([vals[0] for vals in results])
+
+def _bootstrap(stat, n, nboot, conf, rng):
+    ''' (low, high) percentile interval of stat(indices) over nboot resamples of range(n) '''
+
+    samples = np.array([stat(rng.randint(0, n, n)) for b in range(nboot)])
+    alpha = 50.0 * (1.0 - conf)
+    return np.percentile(samples, alpha, axis=0), np.percentile(samples, 100.0 - alpha, axis=0)
+
+#-----------------------------------------
+# Morris elementary effects
+
+def morrisSample(k, r=20, levels=4, seed=0):
+    ''' r one-at-a-time trajectories on a levels-point grid of the unit k-cube
+        returns (r*(k+1), k) points, (r, k) index of the factor moved at each step, (r, k) signed steps '''
+
+    rng = np.random.RandomState(seed)
+    delta = levels / (2.0 * (levels - 1))
+    start = np.arange(levels // 2) / (levels - 1.0)
+
+    pts = np.zeros((r, k + 1, k))
+    order = np.zeros((r, k), dtype=int)
+    steps = np.zeros((r, k))
+    for t in range(r):
+        x = start[rng.randint(0, len(start), k)]
+        x = np.where(rng.rand(k) < 0.5, x, 1.0 - x)   # start at either end of the cube
+        pts[t, 0] = x
+        order[t] = rng.permutation(k)
+        for s, j in enumerate(order[t]):
+            steps[t, s] = delta if x[j] + delta <= 1.0 else -delta
+            x = x.copy()
+            x[j] += steps[t, s]
+            pts[t, s + 1] = x
+    return pts.reshape(r * (k + 1), k), order, steps
+
+def morrisEffects(y, order, steps, nboot=200, conf=0.95, seed=0):
+    ''' elementary-effect statistics from the outputs y of morrisSample() points
+        effects are per unit of each input's full range
+        returns dict of arrays mu, muStar, sigma, muStarLow, muStarHigh (one entry per factor) '''
+
+    r, k = order.shape
+    y = np.asarray(y).reshape(r, k + 1)
+    ee = np.zeros((r, k))
+    rows = np.arange(r)[:, np.newaxis]
+    ee[rows, order] = np.diff(y, axis=1) / steps
+
+    muStar = lambda idx: np.abs(ee[idx]).mean(axis=0)
+    low, high = _bootstrap(muStar, r, nboot, conf, np.random.RandomState(seed))
+    return {'mu' : ee.mean(axis=0), 'muStar' : muStar(np.arange(r)),
+            'sigma' : ee.std(axis=0, ddof=1), 'muStarLow' : low, 'muStarHigh' : high}
+
+def morris(ranges, output='lcoe', r=20, levels=4, nproc=1, inputs=None, cacheFile=None,
+           nboot=200, conf=0.95, seed=0):
+    ''' Morris screening of output over the inputs in ranges ({input name : (low, high)})
+        returns morrisEffects() plus 'names' and 'evaluations' '''
+
+    names, low, high = _bounds(ranges)
+    unit, order, steps = morrisSample(len(names), r, levels, seed)
+    y = evaluatePoints(names, low + unit * (high - low), output, nproc, inputs, cacheFile)
+
+    res = morrisEffects(y, order, steps, nboot, conf, seed)
+    res['names'] = names
+    res['evaluations'] = len(y)
+    return res
+
+#-----------------------------------------
+# Sobol indices
+
+def saltelliSample(k, n, seed=0):
+    ''' Saltelli sample of the unit k-cube: rows A (n), B (n) and AB_j (n each, A with column j from B)
+        returns (n*(k+2), k) points '''
+
+    rng = np.random.RandomState(seed)
+    A = rng.rand(n, k)
+    B = rng.rand(n, k)
+    AB = np.repeat(A[np.newaxis], k, axis=0)
+    for j in range(k):
+        AB[j, :, j] = B[:, j]
+    return np.vstack([A, B, AB.reshape(k * n, k)])
+
+def sobolIndices(y, k, nboot=200, conf=0.95, seed=0):
+    ''' first (Saltelli 2010) and total order (Jansen) indices from the outputs y of saltelliSample() points
+        returns dict of arrays S1, ST, S1Low, S1High, STLow, STHigh (one entry per factor) '''
+
+    y = np.asarray(y, dtype=float)
+    n = len(y) // (k + 2)
+    fA = y[:n]
+    fB = y[n:2*n]
+    fAB = y[2*n:].reshape(k, n)
+
+    def first(idx):
+        var = np.var(np.concatenate([fA[idx], fB[idx]]))
+        return np.mean(fB[idx] * (fAB[:, idx] - fA[idx]), axis=1) / var
+
+    def total(idx):
+        var = np.var(np.concatenate([fA[idx], fB[idx]]))
+        return 0.5 * np.mean((fA[idx] - fAB[:, idx])**2, axis=1) / var
+
+    rng = np.random.RandomState(seed)
+    every = np.arange(n)
+    res = {'S1' : first(every), 'ST' : total(every)}
+    res['S1Low'], res['S1High'] = _bootstrap(first, n, nboot, conf, rng)
+    res['STLow'], res['STHigh'] = _bootstrap(total, n, nboot, conf, rng)
+    return res
+
+def sobol(ranges, output='lcoe', n=512, nproc=1, inputs=None, cacheFile=None,
+          nboot=200, conf=0.95, seed=0):
+    ''' first and total order Sobol indices of output over the inputs in ranges, from n*(k+2) evaluations
+        returns sobolIndices() plus 'names' and 'evaluations' '''
+
+    names, low, high = _bounds(ranges)
+    unit = saltelliSample(len(names), n, seed)
+    y = evaluatePoints(names, low + unit * (high - low), output, nproc, inputs, cacheFile)
+
+    res = sobolIndices(y, len(names), nboot, conf, seed)
+    res['names'] = names
+    res['evaluations'] = len(y)
+    return res
+
+#-----------------------------------------
+
+def printIndices(res, ofh=sys.stdout):
+    ''' print the results of morris() or sobol() as a table '''
+
+    if 'muStar' in res:
+        ofh.write('{:18s} {:>11s} {:>11s} {:>11s}   {:>23s}\n'.format('input', 'mu', 'mu*', 'sigma', 'mu* interval'))
+        for j, name in enumerate(res['names']):
+            ofh.write('{:18s} {:11.4g} {:11.4g} {:11.4g}   [{:10.4g}, {:10.4g}]\n'.format(name,
+                      res['mu'][j], res['muStar'][j], res['sigma'][j], res['muStarLow'][j], res['muStarHigh'][j]))
+    else:
+        ofh.write('{:18s} {:>8s} {:>19s} {:>8s} {:>19s}\n'.format('input', 'S1', 'S1 interval', 'ST', 'ST interval'))
+        for j, name in enumerate(res['names']):
+            ofh.write('{:18s} {:8.4f} [{:8.4f}, {:8.4f}] {:8.4f} [{:8.4f}, {:8.4f}]\n'.format(name,
+                      res['S1'][j], res['S1Low'][j], res['S1High'][j], res['ST'][j], res['STLow'][j], res['STHigh'][j]))
+    ofh.write('{:d} evaluations\n'.format(res['evaluations']))
+
+def main():
+
+    method = 'morris'
+    n = 512
+    r = 20
+    nproc = 1
+    output = 'lcoe'
+    cacheFile = None
+    for arg in sys.argv[1:]:
+        if arg.startswith('-help'):
+            sys.stderr.write(__doc__)
+            exit()
+        elif arg.startswith('-morris'):
+            method = 'morris'
+        elif arg.startswith('-sobol'):
+            method = 'sobol'
+            if len(arg) > 6:
+                n = int(arg[6:])
+        elif arg.startswith('-traj'):
+            r = int(arg[5:])
+        elif arg.startswith('-np'):
+            nproc = int(arg[3:])
+        elif arg.startswith('-out'):
+            output = arg[4:]
+        elif arg.startswith('-cache'):
+            cacheFile = arg[6:]
+        else:
+            sys.stderr.write("\nUnrecognized argument '{:}'\n\n".format(arg))
+
+    if method == 'morris':
+        res = morris(DEFAULT_RANGES, output, r=r, nproc=nproc, cacheFile=cacheFile)
+    else:
+        res = sobol(DEFAULT_RANGES, output, n=n, nproc=nproc, cacheFile=cacheFile)
+    printIndices(res)
+
+if __name__=="__main__":
+
+    main()
@@ -0,0 +1,167 @@
+"""
+lcoe_csm_server.py
+
+Long-lived LCOE evaluation service.
+
+The server keeps a pool of worker processes, each holding a configured
+lcoe_csm_assembly, and answers requests from local clients over a
+localhost TCP port or a Unix socket.  The protocol is one JSON object per
+line in each direction:
+
+    {"id": 1, "inputs": {"rotorDiameter": 130.0}}              single evaluation
+    {"id": 2, "cases": [{"rotorDiameter": 120.0}, {...}]}       batch
+    {"id": 3, "stats": true}                                    latency / queue stats
+
+Requests may also give "outputs", a list of assembly outputs to return
+(default lcoe, coe, aep, turbineCost, BOScost, OnMcost).  Replies carry
+the request id and either "results" (a dict, or a list of dicts for a
+batch, with "error" set for any case that failed) or "error".  Inputs are
+applied on top of the assembly defaults and validated against the input
+schema.  See lcoe_csm_client.py for a client.
+
+USAGE: python lcoe_csm_server.py [-portN] [-socketPATH] [-npN] [-cacheFILE]
+"""
+
+import sys, os, time, json, threading
+import SocketServer
+
+from lcoe_csm_batch import BATCH_OUTPUTS
+from lcoe_csm_pool import lcoePool
+from lcoe_csm_stats import WorkflowStats
+
+DEFAULT_PORT = 8642
+
+#-----------------------------------------
+
+class lcoeService(object):
+    ''' evaluation requests against a warm lcoePool, with latency and queue-depth statistics '''
+
+    def __init__(self, nproc=None, cacheFile=None):
+        self.pool = lcoePool(nproc, cacheFile=cacheFile)
+        self.stats = WorkflowStats()
+        self.lock = threading.Lock()
+        self.inflight = 0
+        self.maxInflight = 0
+        self.started = time.time()
+
+    def _results(self, outputs, vals, err):
+        if err is not None:
+            return {'error' : err}
+        return dict([(name, float(v)) for name, v in zip(outputs, vals)])
+
+    def handle(self, request):
+        ''' answer one decoded request, returning the reply dict '''
+
+        reply = {'id' : request.get('id')}
+        if request.get('stats'):
+            reply['stats'] = self.summary()
+            return reply
+
+        outputs = request.get('outputs', BATCH_OUTPUTS)
+        with self.lock:
+            self.inflight += 1
+            self.maxInflight = max(self.maxInflight, self.inflight)
+        kind = 'failed'
+        t0 = time.time()
+        try:
+            if 'cases' in request:
+                reply['results'] = [self._results(outputs, vals, err)
+                                    for vals, err in self.pool.evaluateMany(request['cases'], outputs)]
+                kind = 'batch'
+            else:
+                vals, err = self.pool.evaluate(request.get('inputs', {}), outputs)
+                reply['results'] = self._results(outputs, vals, err)
+                kind = 'single'
+        finally:
+            with self.lock:
+                self.inflight -= 1
+                self.stats.add(kind, time.time() - t0)
+        return reply
+
+    def summary(self):
+        with self.lock:
+            return {'nproc' : self.pool.nproc, 'inflight' : self.inflight,
+                    'maxInflight' : self.maxInflight, 'uptime' : time.time() - self.started,
+                    'requests' : self.stats.summary()}
+
+    def close(self):
+        self.pool.close()
+
+#-----------------------------------------
+
+class lcoeRequestHandler(SocketServer.StreamRequestHandler):
+    ''' reads JSON requests line by line from one client connection '''
+
+    def handle(self):
+        for line in iter(self.rfile.readline, ''):
+            if len(line.strip()) == 0:
+                continue
+            try:
+                request = json.loads(line)
+                reply = self.server.service.handle(request)
+            except Exception, err:
+                reply = {'error' : '{:}: {:}'.format(err.__class__.__name__, err)}
+            self.wfile.write(json.dumps(reply) + '\n')
+            self.wfile.flush()
+
+class lcoeTCPServer(SocketServer.ThreadingMixIn, SocketServer.TCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+class lcoeUnixServer(SocketServer.ThreadingMixIn, SocketServer.UnixStreamServer):
+    daemon_threads = True
+
+def makeServer(service, port=DEFAULT_PORT, socketPath=None):
+    ''' return a threaded server for service on localhost:port, or on the Unix socket socketPath '''
+
+    if socketPath is not None:
+        if os.path.exists(socketPath):
+            os.remove(socketPath)
+        server = lcoeUnixServer(socketPath, lcoeRequestHandler)
+    else:
+        server = lcoeTCPServer(('127.0.0.1', port), lcoeRequestHandler)
+    server.service = service
+    return server
+
+#-----------------------------------------
+
+def main():
+
+    port = DEFAULT_PORT
+    socketPath = None
+    nproc = None
+    cacheFile = None
+    for arg in sys.argv[1:]:
+        if arg.startswith('-help'):
+            sys.stderr.write(__doc__)
+            exit()
+        elif arg.startswith('-port'):
+            port = int(arg[5:])
+        elif arg.startswith('-socket'):
+            socketPath = arg[7:]
+        elif arg.startswith('-np'):
+            nproc = int(arg[3:])
+        elif arg.startswith('-cache'):
+            cacheFile = arg[6:]
+        else:
+            sys.stderr.write("\nUnrecognized argument '{:}'\n\n".format(arg))
+
+    service = lcoeService(nproc, cacheFile)
+    server = makeServer(service, port, socketPath)
+    if socketPath is not None:
+        sys.stderr.write("Serving LCOE evaluations on {:} with {:d} workers\n".format(socketPath, service.pool.nproc))
+    else:
+        sys.stderr.write("Serving LCOE evaluations on 127.0.0.1:{:d} with {:d} workers\n".format(port, service.pool.nproc))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+        if socketPath is not None and os.path.exists(socketPath):
+            os.remove(socketPath)
+
+if __name__=="__main__":
+
+    main()
@@ -0,0 +1,90 @@
+"""
+lcoe_csm_stats.py
+
+Low-overhead timing statistics for the LCOE workflow.
+
+WorkflowStats keeps, for each named entry (a component such as 'aep1' or
+'fin', or 'overhead' for time spent in the assembly outside its
+components), the number of calls and skipped calls, the total time and a
+ring buffer of the most recent call times for percentiles.  Recording a
+call is a couple of array stores, so the statistics can stay enabled for
+whole sweeps.
+"""
+
+import numpy as np
+
+#-----------------------------------------
+
+class WorkflowStats(object):
+    ''' call counts and execution times per workflow entry '''
+
+    def __init__(self, window=1024):
+        ''' window : number of recent call times kept per entry for percentiles '''
+
+        self.window = window
+        self.reset()
+
+    def reset(self):
+        self.names = []
+        self.calls = {}
+        self.skips = {}
+        self.total = {}
+        self.recent = {}
+
+    def _entry(self, name):
+        if name not in self.calls:
+            self.names.append(name)
+            self.calls[name] = 0
+            self.skips[name] = 0
+            self.total[name] = 0.0
+            self.recent[name] = np.zeros(self.window)
+
+    def add(self, name, dt):
+        ''' record one call of name taking dt seconds '''
+
+        if name not in self.calls:
+            self._entry(name)
+        self.recent[name][self.calls[name] % self.window] = dt
+        self.calls[name] += 1
+        self.total[name] += dt
+
+    def skip(self, name):
+        ''' record that name was not run because its inputs had not changed '''
+
+        if name not in self.calls:
+            self._entry(name)
+        self.skips[name] += 1
+
+    def percentiles(self, name, q=(50, 90, 99)):
+        ''' percentiles (in seconds) of the recent call times of name '''
+
+        n = min(self.calls[name], self.window)
+        if n == 0:
+            return [0.0 for p in q]
+        return list(np.percentile(self.recent[name][:n], q))
+
+    def summary(self):
+        ''' return {name : {calls, skips, total, mean, p50, p90, p99}} '''
+
+        res = {}
+        for name in self.names:
+            calls = self.calls[name]
+            p50, p90, p99 = self.percentiles(name)
+            res[name] = {'calls' : calls, 'skips' : self.skips[name], 'total' : self.total[name],
+                         'mean' : self.total[name] / max(calls, 1),
+                         'p50' : p50, 'p90' : p90, 'p99' : p99}
+        return res
+
+    def report(self):
+        ''' return the summary as a printable table (times in ms) '''
+
+        total = sum([self.total[name] for name in self.names]) or 1.0
+        lines = ['{:10s} {:>8s} {:>8s} {:>10s} {:>6s} {:>9s} {:>9s} {:>9s} {:>9s}'.format(
+                 'entry', 'calls', 'skipped', 'total(s)', '%', 'mean(ms)', 'p50(ms)', 'p90(ms)', 'p99(ms)')]
+        summ = self.summary()
+        for name in self.names:
+            s = summ[name]
+            lines.append('{:10s} {:8d} {:8d} {:10.3f} {:6.1f} {:9.3f} {:9.3f} {:9.3f} {:9.3f}'.format(
+                         name, s['calls'], s['skips'], s['total'], 100.0*s['total']/total,
+                         1000*s['mean'], 1000*s['p50'], 1000*s['p90'], 1000*s['p99']))
+        return '\n'.join(lines)
@@ -0,0 +1,169 @@
+"""
+lcoe_csm_surrogate.py
+
+Surrogate models of lcoe_csm_assembly trained from recorded DOE cases.
+
+Two kinds of surrogate are provided, both fitted to inputs scaled to the
+unit box of the training data:
+
+    ResponseSurface(order)  least-squares polynomial response surface
+    RBFSurrogate()          cubic radial basis function interpolant with a linear tail
+
+crossValidate() reports the k-fold prediction error of a surrogate, and
+lcoe_csm_surrogate is an OpenMDAO component with the same design inputs
+and main outputs as lcoe_csm_assembly, so it can replace the real model as
+'lcoe' inside lcoeOpt or csmDOE:
+
+    sm = surrogateFromCases('doeCases', ['rotorDiameter', 'maxTipSpeed'])
+    print sm.cvError
+    opt.add('lcoe', sm)
+"""
+
+import sys
+from itertools import combinations_with_replacement
+import numpy as np
+
+from openmdao.main.api import Component
+from openmdao.main.datatypes.api import Float
+
+from lcoe_csm_batch import BATCH_OUTPUTS
+
+#-----------------------------------------
+
+class ResponseSurface(object):
+    ''' full polynomial response surface of the given order '''
+
+    def __init__(self, order=2):
+        self.order = order
+
+    def _terms(self, X):
+        cols = [np.ones(len(X))]
+        for d in range(1, self.order+1):
+            for idx in combinations_with_replacement(range(X.shape[1]), d):
+                cols.append(np.prod(X[:, list(idx)], axis=1))
+        return np.column_stack(cols)
+
+    def fit(self, X, y):
+        X = np.atleast_2d(np.asarray(X, dtype=float))
+        self.lo = X.min(axis=0)
+        self.span = np.where(X.max(axis=0) > self.lo, X.max(axis=0) - self.lo, 1.0)
+        self.coef = np.linalg.lstsq(self._terms((X - self.lo) / self.span),
+                                    np.asarray(y, dtype=float), rcond=-1)[0]
+        return self
+
+    def predict(self, X):
+        X = np.atleast_2d(np.asarray(X, dtype=float))
+        return self._terms((X - self.lo) / self.span).dot(self.coef)
+
+#-----------------------------------------
+
+class RBFSurrogate(object):
+    ''' cubic radial basis function interpolant with a linear polynomial tail '''
+
+    def fit(self, X, y):
+        X = np.atleast_2d(np.asarray(X, dtype=float))
+        self.lo = X.min(axis=0)
+        self.span = np.where(X.max(axis=0) > self.lo, X.max(axis=0) - self.lo, 1.0)
+        self.centers = (X - self.lo) / self.span
+
+        n, m = self.centers.shape
+        P = np.column_stack([np.ones(n), self.centers])
+        A = np.zeros((n+m+1, n+m+1))
+        A[:n, :n] = self._phi(self.centers, self.centers)
+        A[:n, n:] = P
+        A[n:, :n] = P.T
+        b = np.concatenate([np.asarray(y, dtype=float), np.zeros(m+1)])
+
+        # lstsq copes with repeated training points, which make A singular
+        self.coef = np.linalg.lstsq(A, b, rcond=-1)[0]
+        return self
+
+    def _phi(self, X, C):
+        r = np.sqrt(((X[:, np.newaxis, :] - C[np.newaxis, :, :])**2).sum(axis=2))
+        return r**3
+
+    def predict(self, X):
+        X = (np.atleast_2d(np.asarray(X, dtype=float)) - self.lo) / self.span
+        n = len(self.centers)
+        return self._phi(X, self.centers).dot(self.coef[:n]) + \
+               np.column_stack([np.ones(len(X)), X]).dot(self.coef[n:])
+
+#-----------------------------------------
+
+def crossValidate(surrogate, X, y, k=5, seed=0):
+    ''' k-fold cross validation of a surrogate (an object with fit/predict)
+        returns (rms error, max abs error) relative to the standard deviation of y, i.e. to the
+        error of predicting the mean (the first is sqrt(1 - R**2) of the cross-validated predictions) '''
+
+    X = np.atleast_2d(np.asarray(X, dtype=float))
+    y = np.asarray(y, dtype=float)
+    folds = np.array_split(np.random.RandomState(seed).permutation(len(y)), k)
+
+    err = np.zeros(len(y))
+    for fold in folds:
+        train = np.setdiff1d(np.arange(len(y)), fold)
+        err[fold] = surrogate.fit(X[train], y[train]).predict(X[fold]) - y[fold]
+    surrogate.fit(X, y)
+
+    scale = np.std(y)
+    if scale == 0.0:
+        scale = 1.0
+    return np.sqrt(np.mean(err**2)) / scale, np.abs(err).max() / scale
+
+#-----------------------------------------
+
+class lcoe_csm_surrogate(Component):
+    ''' surrogate stand-in for lcoe_csm_assembly '''
+
+    # design inputs (as in lcoe_csm_assembly)
+    ratedPower = Float(5000.0, units = 'kW', iotype='in', desc= 'rated machine power in kW')
+    rotorDiameter = Float(126.0, units = 'm', iotype='in', desc= 'rotor diameter of the machine')
+    maxTipSpeed = Float(80.0, units = 'm/s', iotype='in', desc= 'maximum allowable tip speed for the rotor')
+    hubHeight = Float(90.0, units = 'm', iotype='in', desc='hub height of wind turbine above ground / sea level')
+
+    # outputs (as the passthroughs of lcoe_csm_assembly)
+    lcoe = Float(0.0, iotype='out', desc='levelized cost of energy for the plant')
+    coe = Float(0.0, iotype='out', desc='cost of energy - unlevelized')
+    aep = Float(0.0, units = 'kW * h', iotype='out', desc='annual energy production of the plant')
+    turbineCost = Float(0.0, units = 'USD', iotype='out', desc='turbine capital cost')
+    BOScost = Float(0.0, units = 'USD', iotype='out', desc='balance of station cost for the plant')
+    OnMcost = Float(0.0, units = 'USD', iotype='out', desc='annual operating cost for the plant')
+
+    def __init__(self, inputs, models):
+        ''' inputs : names of the design inputs the models were trained on, in column order
+            models : dict of {output name : fitted surrogate} '''
+
+        super(lcoe_csm_surrogate, self).__init__()
+        self.inputNames = list(inputs)
+        self.models = models
+        self.cvError = {}
+
+    def execute(self):
+        x = np.array([[getattr(self, name) for name in self.inputNames]])
+        for name in self.models:
+            setattr(self, name, float(self.models[name].predict(x)[0]))
+
+#-----------------------------------------
+
+def surrogateFromCases(dirname, inputs, outputs=BATCH_OUTPUTS, kind=RBFSurrogate, k=5):
+    ''' train an lcoe_csm_surrogate on the cases recorded by ColumnarCaseRecorder in dirname
+        (e.g. csmDOEDemo's 'doeCases'); the k-fold cross validation error of each output is
+        stored in its cvError dict '''
+
+    from lcoe_csm_recorder import readColumns
+    cols = readColumns(dirname, mmap=False)
+
+    X = np.column_stack([cols['lcoe.' + name] for name in inputs])
+    models = {}
+    cvError = {}
+    for name in outputs:
+        if 'lcoe.' + name not in cols:
+            continue
+        models[name] = kind()
+        cvError[name] = crossValidate(models[name], X, cols['lcoe.' + name], k)
+        sys.stderr.write("Surrogate for {:12s} CV error / std rms {:.2e} max {:.2e}\n".format(
+            name, cvError[name][0], cvError[name][1]))
+
+    sm = lcoe_csm_surrogate(inputs, models)
+    sm.cvError = cvError
+    return sm
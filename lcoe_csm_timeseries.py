@@ -0,0 +1,221 @@
+"""
+lcoe_csm_timeseries.py
+
+AEP from a measured wind-speed time series instead of a Weibull distribution.
+
+A series is stored as a directory of raw little-endian float32 files, like
+the case columns of lcoe_csm_recorder:
+
+    mast/series.json     measurement height, time step and file names
+    mast/speed.f4        wind speed (m/s) at the measurement height
+    mast/density.f4      optional air density (kg/m**3)
+
+The files are memory-mapped and binned in chunks (np.bincount of the
+density-corrected hub-height speed), so a multi-year 10-minute series
+never has to fit in memory; chunks can be binned on several processes and
+their counts added.  The bin counts depend only on the series, hub height,
+shear exponent and reference density, so they are kept between executes
+and a change of turbine (power curve) only repeats the cheap dot product.
+
+lcoe_csm_ts_assembly is lcoe_csm_assembly with aep1 replaced by
+aep_ts_component, which has the same inputs and outputs as
+aep_csm_assembly and takes the power curve from it, plus the 'windSeries'
+directory and 'seriesProcesses' inputs.
+"""
+
+import os, json
+import multiprocessing
+import numpy as np
+
+from openmdao.main.api import Component
+from openmdao.main.datatypes.api import Int, Float, Array, Str
+
+from twister.assemblies.aep_csm_assembly import aep_csm_assembly
+
+from lcoe_csm_assembly import lcoe_csm_assembly
+from lcoe_csm_aep import curveArrays, HOURS_PER_YEAR
+from lcoe_csm_kernel import standardAirDensity
+
+#-----------------------------------------
+
+def writeSeries(dirname, speed, density=None, height=50.0, dtHours=1.0/6.0):
+    ''' write a wind-speed (and optional density) series measured at height to dirname '''
+
+    if not os.path.isdir(dirname):
+        os.makedirs(dirname)
+    meta = {'height' : height, 'dtHours' : dtHours, 'speed' : 'speed.f4', 'density' : None}
+    np.asarray(speed, dtype='<f4').tofile(os.path.join(dirname, 'speed.f4'))
+    if density is not None:
+        meta['density'] = 'density.f4'
+        np.asarray(density, dtype='<f4').tofile(os.path.join(dirname, 'density.f4'))
+    with open(os.path.join(dirname, 'series.json'), 'w') as ofh:
+        json.dump(meta, ofh, indent=1)
+
+def openSeries(dirname):
+    ''' return (meta dict, speed memmap, density memmap or None) for the series in dirname '''
+
+    with open(os.path.join(dirname, 'series.json')) as ifh:
+        meta = json.load(ifh)
+    speed = np.memmap(os.path.join(dirname, meta['speed']), dtype='<f4', mode='r')
+    density = None
+    if meta.get('density'):
+        density = np.memmap(os.path.join(dirname, meta['density']), dtype='<f4', mode='r')
+    return meta, speed, density
+
+#-----------------------------------------
+
+def binChunk(speed, density, factor, rhoRef, binWidth, nbins):
+    ''' bin counts of factor * speed (density-corrected to rhoRef if density is given);
+        speeds beyond the last bin are counted in it, missing (NaN or negative) values are dropped
+        returns (counts, number of valid values) '''
+
+    v = factor * np.asarray(speed, dtype=float)
+    if density is not None:
+        v *= (np.asarray(density, dtype=float) / rhoRef)**(1.0 / 3.0)
+    v = v[np.isfinite(v)]
+    v = v[v >= 0]
+    idx = np.minimum((v / binWidth).astype(int), nbins - 1)
+    return np.bincount(idx, minlength=nbins), len(v)
+
+def _binTask(args):
+    ''' pool task: bin rows [start, stop) of the series in dirname '''
+
+    dirname, start, stop, factor, rhoRef, binWidth, nbins = args
+    meta, speed, density = openSeries(dirname)
+    return binChunk(speed[start:stop], None if density is None else density[start:stop],
+                    factor, rhoRef, binWidth, nbins)
+
+def seriesCounts(dirname, hubHeight, shearExponent, rhoRef, binWidth=0.25, maxSpeed=40.0,
+                 chunkSize=2**22, nproc=1):
+    ''' bin the hub-height speeds of the series in dirname
+        returns (counts per bin of width binWidth up to maxSpeed, number of valid values, meta) '''
+
+    meta, speed, density = openSeries(dirname)
+    factor = (hubHeight / meta['height'])**shearExponent
+    nbins = int(np.ceil(maxSpeed / binWidth)) + 1
+    chunks = [(dirname, i, min(i + chunkSize, len(speed)), factor, rhoRef, binWidth, nbins)
+              for i in range(0, len(speed), chunkSize)]
+
+    if nproc > 1 and len(chunks) > 1:
+        pool = multiprocessing.Pool(min(nproc, len(chunks)))
+        try:
+            results = pool.map(_binTask, chunks, 1)
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        results = [_binTask(chunk) for chunk in chunks]
+
+    counts = np.zeros(nbins, dtype=np.int64)
+    nvalid = 0
+    for c, n in results:
+        counts += c
+        nvalid += n
+    return counts, nvalid, meta
+
+def countsAEP(curve, counts, nvalid, binWidth=0.25, soilingLosses=0.0, arrayLosses=0.0,
+              availability=1.0, turbineNumber=1):
+    ''' (aep kWh, aepPerTurbine kWh, capacityFactor) from seriesCounts() and a power curve '''
+
+    speeds, power = curveArrays(curve)
+    mids = (np.arange(len(counts)) + 0.5) * binWidth
+    pmid = np.interp(mids, speeds, power, left=0.0, right=0.0)
+    meanPower = counts.dot(pmid) / float(max(nvalid, 1))
+
+    net = meanPower * (1.0 - soilingLosses) * (1.0 - arrayLosses) * availability
+    aepPerTurbine = net * HOURS_PER_YEAR
+    return aepPerTurbine * turbineNumber, aepPerTurbine, net / power.max()
+
+#-----------------------------------------
+
+class aep_ts_component(Component):
+    ''' aep_csm_assembly interface with AEP from a wind-speed time series '''
+
+    # inputs of aep_csm_assembly (defaults are copied from it in __init__)
+    rotorDiameter = Float(iotype='in')
+    maxTipSpeed = Float(iotype='in')
+    ratedPower = Float(iotype='in')
+    drivetrainDesign = Int(iotype='in')
+    hubHeight = Float(iotype='in')
+    altitude = Float(iotype='in')
+    turbineNumber = Int(iotype='in')
+    maxPowerCoefficient = Float(iotype='in')
+    optTipSpeedRatio = Float(iotype='in')
+    cutInWindSpeed = Float(iotype='in')
+    cutOutWindSpeed = Float(iotype='in')
+    shearExponent = Float(iotype='in')
+    windSpeed50m = Float(iotype='in')
+    weibullK = Float(iotype='in')
+    airDensity = Float(iotype='in')
+    soilingLosses = Float(iotype='in')
+    arrayLosses = Float(iotype='in')
+    availability = Float(iotype='in')
+    # time series
+    windSeries = Str('', iotype='in', desc='directory of the wind-speed time series (see writeSeries)')
+    seriesProcesses = Int(1, iotype='in', desc='processes used to bin the series')
+
+    # outputs of aep_csm_assembly
+    ratedWindSpeed = Float(iotype='out')
+    maxEfficiency = Float(iotype='out')
+    ratedRotorSpeed = Float(iotype='out')
+    powerCurve = Array(iotype='out')
+    aep = Float(iotype='out')
+    aepPerTurbine = Float(iotype='out')
+    capacityFactor = Float(iotype='out')
+
+    INPUTS = ['rotorDiameter', 'maxTipSpeed', 'ratedPower', 'drivetrainDesign', 'hubHeight', 'altitude',
+              'turbineNumber', 'maxPowerCoefficient', 'optTipSpeedRatio', 'cutInWindSpeed', 'cutOutWindSpeed',
+              'shearExponent', 'windSpeed50m', 'weibullK', 'airDensity', 'soilingLosses', 'arrayLosses',
+              'availability']
+    CURVE_OUTPUTS = ['ratedWindSpeed', 'maxEfficiency', 'ratedRotorSpeed', 'powerCurve']
+
+    binWidth = 0.25
+
+    def __init__(self):
+        super(aep_ts_component, self).__init__()
+        self.curveModel = aep_csm_assembly()
+        for name in self.INPUTS:
+            setattr(self, name, getattr(self.curveModel, name))
+        self._counts = {}   # (series, hub height, shear, density) -> (counts, nvalid)
+
+    def execute(self):
+
+        # power curve and rating from the CSM AEP model
+        for name in self.INPUTS:
+            setattr(self.curveModel, name, getattr(self, name))
+        self.curveModel.run()
+        for name in self.CURVE_OUTPUTS:
+            setattr(self, name, getattr(self.curveModel, name))
+
+        if self.windSeries == '':
+            self.aep = self.curveModel.aep
+            self.aepPerTurbine = self.curveModel.aepPerTurbine
+            self.capacityFactor = self.curveModel.capacityFactor
+            return
+
+        # the power curve is for the density aep1 uses, so correct the series to that same density
+        rhoRef = self.airDensity if self.airDensity > 0 else standardAirDensity(self.altitude, self.hubHeight)
+        key = (os.path.abspath(self.windSeries), self.hubHeight, self.shearExponent, rhoRef)
+        if key not in self._counts:
+            counts, nvalid, meta = seriesCounts(self.windSeries, self.hubHeight, self.shearExponent, rhoRef,
+                                                self.binWidth, nproc=self.seriesProcesses)
+            self._counts = {key : (counts, nvalid)}
+        counts, nvalid = self._counts[key]
+
+        self.aep, self.aepPerTurbine, self.capacityFactor = countsAEP(self.powerCurve, counts, nvalid,
+            self.binWidth, self.soilingLosses, self.arrayLosses, self.availability, self.turbineNumber)
+
+#-----------------------------------------
+
+class lcoe_csm_ts_assembly(lcoe_csm_assembly):
+    ''' lcoe_csm_assembly with AEP from the wind-speed time series in 'windSeries' '''
+
+    def SelectComponents(self):
+        super(lcoe_csm_ts_assembly, self).SelectComponents()
+        self.remove('aep1')
+        self.add('aep1', aep_ts_component())
+
+    def WorkflowConnect(self):
+        super(lcoe_csm_ts_assembly, self).WorkflowConnect()
+        self.create_passthrough('aep1.windSeries')
+        self.create_passthrough('aep1.seriesProcesses')
@@ -0,0 +1,214 @@
+"""
+lcoe_csm_wake.py
+
+Layout-driven wake losses (Jensen / Park model) for lcoe_csm_assembly.
+
+The constant arrayLosses input of aep1 is replaced by the losses of a
+plant layout (turbine x, y coordinates in m) under a wind rose (directions
+the wind blows from, in degrees, and their frequencies).  Each upwind
+turbine casts a top-hat wake of radius R + k*x with velocity deficit
+
+    (1 - sqrt(1 - Ct)) * (R / (R + k*x))**2
+
+scaled by the fraction of the downwind rotor it overlaps; deficits at a
+turbine are combined as a root sum of squares, and the loss of a
+direction is one minus the mean of (1 - deficit)**3 over the turbines.
+
+Only pairs of turbines closer than maxRange rotor diameters interact.
+The pairs are found with scipy's cKDTree when scipy is available and with
+a uniform grid of buckets otherwise, and are cached per layout, so a DOE
+over rotorDiameter or hubHeight never repeats the neighbour search.  All
+pairs and directions are then evaluated in one set of NumPy operations.
+
+lcoe_csm_wake_assembly is lcoe_csm_assembly with a 'wake' component
+feeding aep1.arrayLosses; the layout and wind rose are passthroughs
+(turbineX, turbineY, windDirections, windFrequencies, wakeDecay) and
+the computed losses are the 'wakeLosses' output.  turbineNumber is not
+taken from the layout and should be set to len(turbineX).  Setting
+arrayLosses through AssignInputs() or a batch raises ValueError, since
+the wake losses replace it.
+"""
+
+from collections import OrderedDict
+import numpy as np
+
+from openmdao.main.api import Component
+from openmdao.main.datatypes.api import Float, Array
+
+from lcoe_csm_assembly import lcoe_csm_assembly
+
+try:
+    from scipy.spatial import cKDTree
+except ImportError:
+    cKDTree = None
+
+# layouts whose neighbour pairs are kept
+PAIR_CACHE_SIZE = 16
+_pairCache = OrderedDict()
+
+#-----------------------------------------
+
+def _gridPairs(x, y, radius):
+    ''' (i, j) with i < j of the points closer than radius, using square buckets of side radius '''
+
+    cells = {}
+    for k, key in enumerate(zip(np.floor(x / radius).astype(int).tolist(),
+                                np.floor(y / radius).astype(int).tolist())):
+        cells.setdefault(key, []).append(k)
+    cells = dict([(key, np.array(members)) for key, members in cells.items()])
+
+    iList, jList = [], []
+    for (cx, cy), a in cells.items():
+        for dx, dy in ((0, 0), (1, -1), (1, 0), (1, 1), (0, 1)):   # each neighbouring cell pair once
+            b = cells.get((cx + dx, cy + dy))
+            if b is None:
+                continue
+            i, j = np.meshgrid(a, b, indexing='ij')
+            i, j = i.ravel(), j.ravel()
+            if dx == 0 and dy == 0:
+                keep = i < j
+                i, j = i[keep], j[keep]
+            close = (x[i] - x[j])**2 + (y[i] - y[j])**2 < radius**2
+            iList.append(np.minimum(i, j)[close])
+            jList.append(np.maximum(i, j)[close])
+    if len(iList) == 0:
+        return np.zeros(0, dtype=int), np.zeros(0, dtype=int)
+    return np.concatenate(iList), np.concatenate(jList)
+
+def neighbourPairs(x, y, radius):
+    ''' (i, j) index arrays, i < j, of the turbines closer than radius; cached per layout '''
+
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    key = (x.tostring(), y.tostring())
+    if key in _pairCache and _pairCache[key][0] >= radius:
+        cached, i, j, dist = _pairCache[key]
+        _pairCache[key] = _pairCache.pop(key)   # most recently used
+    else:
+        # search a little further than needed so nearby radii reuse the result
+        cached = 1.5 * radius
+        if cKDTree is not None:
+            pairs = cKDTree(np.column_stack([x, y])).query_pairs(cached)
+            pairs = np.array(sorted(pairs), dtype=int).reshape(-1, 2)
+            i, j = pairs[:, 0], pairs[:, 1]
+        else:
+            i, j = _gridPairs(x, y, cached)
+        dist = np.hypot(x[i] - x[j], y[i] - y[j])
+        _pairCache.pop(key, None)
+        _pairCache[key] = (cached, i, j, dist)
+        while len(_pairCache) > PAIR_CACHE_SIZE:
+            _pairCache.popitem(last=False)
+
+    near = dist < radius
+    return i[near], j[near]
+
+#-----------------------------------------
+
+def overlapFraction(d, rw, r):
+    ''' fraction of a rotor of radius r covered by a wake of radius rw >= r whose centre is d away '''
+
+    d = np.asarray(d, dtype=float)
+    rw = np.asarray(rw, dtype=float)
+    full = d <= rw - r
+    none = d >= rw + r
+    dd = np.where(full | none, rw, d)      # keeps the partial-overlap formula finite
+    a1 = np.arccos(np.clip((dd**2 + r**2 - rw**2) / (2 * dd * r), -1.0, 1.0))
+    a2 = np.arccos(np.clip((dd**2 + rw**2 - r**2) / (2 * dd * rw), -1.0, 1.0))
+    tri = np.sqrt(np.maximum((-dd + r + rw) * (dd + r - rw) * (dd - r + rw) * (dd + r + rw), 0.0))
+    partial = (r**2 * a1 + rw**2 * a2 - 0.5 * tri) / (np.pi * r**2)
+    return np.where(full, 1.0, np.where(none, 0.0, partial))
+
+def wakeLosses(x, y, rotorDiameter, thrustCoefficient, directions, frequencies,
+               wakeDecay=0.075, maxRange=30.0):
+    ''' array losses of the layout (x, y) under the wind rose (directions, frequencies)
+        returns (losses weighted by frequency, losses per direction) '''
+
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(x)
+    directions = np.atleast_1d(np.asarray(directions, dtype=float))
+    frequencies = np.atleast_1d(np.asarray(frequencies, dtype=float))
+    R = 0.5 * rotorDiameter
+
+    i, j = neighbourPairs(x, y, maxRange * rotorDiameter)
+    if len(i) == 0:
+        return 0.0, np.zeros(len(directions))
+
+    # unit vector the wind blows towards, one row per direction
+    theta = np.radians(directions)[:, np.newaxis]
+    dx = (x[j] - x[i])[np.newaxis, :]
+    dy = (y[j] - y[i])[np.newaxis, :]
+    along = -dx * np.sin(theta) - dy * np.cos(theta)   # downwind distance of j from i
+    across = np.abs(dx * np.cos(theta) - dy * np.sin(theta))
+
+    # the upwind turbine of each pair wakes the other one
+    down = np.where(along > 0, j[np.newaxis, :], i[np.newaxis, :])
+    xs = np.abs(along)
+    rw = R + wakeDecay * xs
+    deficit = (1.0 - np.sqrt(1.0 - thrustCoefficient)) * (R / rw)**2 * overlapFraction(across, rw, R)
+    deficit[xs == 0] = 0.0
+
+    rows = np.arange(len(directions))[:, np.newaxis] * n
+    sumsq = np.bincount((rows + down).ravel(), weights=(deficit**2).ravel(),
+                        minlength=len(directions) * n).reshape(len(directions), n)
+    speedRatio = 1.0 - np.minimum(np.sqrt(sumsq), 1.0)
+    perDirection = 1.0 - (speedRatio**3).mean(axis=1)
+
+    return float(frequencies.dot(perDirection) / frequencies.sum()), perDirection
+
+#-----------------------------------------
+
+class wake_component(Component):
+    ''' array losses from a plant layout and wind rose (Jensen wake model) '''
+
+    # variables
+    rotorDiameter = Float(126.0, units='m', iotype='in', desc='rotor diameter of the machine')
+    thrustCoefficient = Float(0.5, iotype='in', desc='rotor thrust coefficient')
+    turbineX = Array(np.zeros(0), iotype='in', desc='turbine x coordinates (m)')
+    turbineY = Array(np.zeros(0), iotype='in', desc='turbine y coordinates (m)')
+    windDirections = Array(np.arange(0.0, 360.0, 30.0), iotype='in', desc='wind rose directions, blowing from (deg)')
+    windFrequencies = Array(np.ones(12) / 12.0, iotype='in', desc='frequency of each wind rose direction')
+    wakeDecay = Float(0.075, iotype='in', desc='wake decay constant (about 0.075 onshore, 0.04 offshore)')
+    maxRange = Float(30.0, iotype='in', desc='distance in rotor diameters beyond which wakes are ignored')
+
+    # returns
+    arrayLosses = Float(0.0, iotype='out', desc='energy lost to wakes, as a fraction')
+
+    def execute(self):
+        if len(self.turbineX) < 2:
+            self.arrayLosses = 0.0
+            return
+        self.arrayLosses = wakeLosses(self.turbineX, self.turbineY, self.rotorDiameter, self.thrustCoefficient,
+                                      self.windDirections, self.windFrequencies, self.wakeDecay, self.maxRange)[0]
+
+#-----------------------------------------
+
+class lcoe_csm_wake_assembly(lcoe_csm_assembly):
+    ''' lcoe_csm_assembly with aep1.arrayLosses computed from the plant layout by a wake model '''
+
+    # the arrayLosses input is kept (so the assembly has the full input vector) but no longer feeds
+    # aep1; bindInputs() and lcoeBatch() raise ValueError when it is set
+    UNUSED_INPUTS = ['arrayLosses']
+
+    def SelectComponents(self):
+        super(lcoe_csm_wake_assembly, self).SelectComponents()
+        self.add('wake', wake_component())
+
+    def WorkflowAdd(self):
+        self.driver.workflow.add(['wake', 'aep1', 'tcc', 'bos', 'om', 'fin'])
+
+    def WorkflowConnect(self):
+        super(lcoe_csm_wake_assembly, self).WorkflowConnect()
+
+        # the arrayLosses input no longer feeds aep1
+        self.disconnect('arrayLosses', 'aep1.arrayLosses')
+        self.connect('wake.arrayLosses', 'aep1.arrayLosses')
+
+        self.connect('rotorDiameter', 'wake.rotorDiameter')
+        self.connect('thrustCoefficient', 'wake.thrustCoefficient')
+        self.create_passthrough('wake.turbineX')
+        self.create_passthrough('wake.turbineY')
+        self.create_passthrough('wake.windDirections')
+        self.create_passthrough('wake.windFrequencies')
+        self.create_passthrough('wake.wakeDecay')
+        self.create_passthrough('wake.arrayLosses', 'wakeLosses')
@@ -0,0 +1,64 @@
+"""
+test_lcoe_csm_adaptive.py
+
+Tests of the adaptive DOE refinement on an analytic objective, so no
+assembly is needed.
+
+USAGE: python -m unittest test_lcoe_csm_adaptive
+"""
+
+import unittest
+
+from lcoe_csm_adaptive import AdaptiveDOE
+from lcoe_csm_checkpoint import caseKey
+
+NAMES = ['rotorDiameter', 'maxTipSpeed']
+LOW, HIGH = [110.0, 75.0], [145.0, 100.0]
+
+def objective(case):
+    return 0.1 + 1.0e-4 * (case['rotorDiameter'] - 128.0)**2 + 2.0e-4 * (case['maxTipSpeed'] - 83.0)**2
+
+def evaluator(evaluated, finished=None):
+    ''' batch evaluator of the objective that logs every point it evaluates '''
+
+    def evaluate(cases):
+        results = []
+        for case in cases:
+            vals = [objective(case)]
+            evaluated.append(caseKey(case, NAMES))
+            if finished is not None:
+                finished(case, vals)
+            results.append(vals)
+        return results
+    return evaluate
+
+#-----------------------------------------
+
+class adaptiveResumeTest(unittest.TestCase):
+
+    def testResumeEvaluatesOnlyNewPoints(self):
+        ''' a run resumed from the points recorded by an interrupted run evaluates each point once
+            and returns the same cases as an uninterrupted run '''
+
+        full = []
+        expected = AdaptiveDOE(NAMES, LOW, HIGH, evaluator(full)).run()
+
+        recorded = {}
+        def finished(case, vals):
+            recorded[caseKey(case, NAMES)] = vals
+        first = []
+        AdaptiveDOE(NAMES, LOW, HIGH, evaluator(first, finished), maxEvals=len(full) // 2).run()
+        self.assertEqual(len(recorded), len(full) // 2)
+
+        second = []
+        doe = AdaptiveDOE(NAMES, LOW, HIGH, evaluator(second), known=recorded)
+        cases = doe.run()
+
+        self.assertEqual(doe.reused, len(first))
+        self.assertEqual(set(first) & set(second), set())
+        self.assertEqual(sorted(first + second), sorted(full))
+        self.assertEqual(cases, expected)
+
+if __name__=="__main__":
+
+    unittest.main()
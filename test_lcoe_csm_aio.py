@@ -0,0 +1,185 @@
+"""
+test_lcoe_csm_aio.py
+
+Tests of the asyncio client in lcoe_csm_aio.py against a stub JSON Lines
+server on the test's event loop, which answers each request after a
+delay chosen from its inputs, so neither OpenMDAO nor lcoe_csm_server.py
+is needed.  lcoe_csm_aio is Python 3 only and this file is written so
+that Python 2 can load (and skip) it.
+
+USAGE: python3 -m unittest test_lcoe_csm_aio
+"""
+
+import sys, json, unittest
+
+if sys.version_info >= (3, 7):
+    import asyncio
+    from lcoe_csm_aio import lcoeAsyncClient
+
+# rotorDiameter values the stub server answers late
+SLOW_DIAMETER = 199.0
+
+def stubLCOE(inputs):
+    return 0.1 + 1.0e-4 * (inputs['rotorDiameter'] - 128.0)**2
+
+#-----------------------------------------
+
+class stubServer(object):
+    ''' answers {'id', 'inputs'} request lines with {'id', 'results'} after delay(inputs) seconds,
+        counting the requests in flight over all connections like lcoe_csm_server '''
+
+    def __init__(self, loop, delay):
+        self.loop = loop
+        self.delay = delay
+        self.inflight = 0
+        self.maxInflight = 0
+        self.connections = 0
+        self.lateReplies = 0
+
+    def __call__(self):
+        self.connections += 1
+        return stubConnection(self)
+
+class stubConnection(object):
+    ''' asyncio protocol of one connection to a stubServer '''
+
+    def __init__(self, server):
+        self.server = server
+        self.buffer = b''
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def data_received(self, data):
+        self.buffer += data
+        while b'\n' in self.buffer:
+            line, self.buffer = self.buffer.split(b'\n', 1)
+            request = json.loads(line.decode())
+            server = self.server
+            server.inflight += 1
+            server.maxInflight = max(server.maxInflight, server.inflight)
+            server.loop.call_later(server.delay(request['inputs']), self.reply, request)
+
+    def reply(self, request):
+        self.server.inflight -= 1
+        if self.transport.is_closing():
+            # the client dropped the connection; the reply goes nowhere
+            self.server.lateReplies += 1
+            return
+        results = {'lcoe' : stubLCOE(request['inputs']), 'rotorDiameter' : request['inputs']['rotorDiameter']}
+        self.transport.write((json.dumps({'id' : request['id'], 'results' : results}) + '\n').encode())
+
+    def eof_received(self):
+        return False
+
+    def connection_lost(self, exc):
+        pass
+
+class slowCases(object):
+    ''' async iterator of n cases, each available interval seconds after it is asked for '''
+
+    def __init__(self, loop, n, interval):
+        self.loop = loop
+        self.n = n
+        self.interval = interval
+        self.read = 0
+
+    def __aiter__(self):
+        return self
+
+    def __anext__(self):
+        if self.read == self.n:
+            raise StopAsyncIteration
+        case = {'rotorDiameter' : 110.0 + self.read}
+        self.read += 1
+        future = self.loop.create_future()
+        self.loop.call_later(self.interval, future.set_result, case)
+        return future
+
+#-----------------------------------------
+
+class asyncClientTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        if sys.version_info < (3, 7):
+            raise unittest.SkipTest('lcoe_csm_aio needs Python 3.7 or later')
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.addCleanup(self.loop.close)
+
+    def closeServer(self, server):
+        server.close()
+        self.loop.run_until_complete(server.wait_closed())
+
+    def client(self, delay, concurrency):
+        ''' (stubServer, lcoeAsyncClient) with the server listening on a free port '''
+
+        stub = stubServer(self.loop, delay)
+        server = self.loop.run_until_complete(self.loop.create_server(stub, '127.0.0.1', 0))
+        self.addCleanup(self.closeServer, server)
+        client = lcoeAsyncClient(server.sockets[0].getsockname()[:2], concurrency=concurrency)
+        self.addCleanup(lambda: self.loop.run_until_complete(client.close()))
+        return stub, client
+
+    def collect(self, results, check=None):
+        ''' the items of an async generator, calling check(items so far) after each '''
+
+        items = []
+        while True:
+            try:
+                items.append(self.loop.run_until_complete(results.__anext__()))
+            except StopAsyncIteration:
+                return items
+            if check is not None:
+                check(items)
+
+    def testBoundedInflight(self):
+        ''' the server never sees more than concurrency requests at once, and does see that many '''
+
+        stub, client = self.client(lambda inputs: 0.01 * (inputs['rotorDiameter'] % 4), concurrency=3)
+        cases = [{'rotorDiameter' : 110.0 + i} for i in range(24)]
+        items = self.collect(client.evaluateMany(cases, ordered=False))
+        self.assertEqual(sorted([i for i, res in items]), list(range(24)))
+        for i, res in items:
+            self.assertEqual(res['lcoe'], stubLCOE(cases[i]))
+        self.assertEqual(stub.maxInflight, 3)
+        self.assertTrue(stub.connections <= 3, stub.connections)
+
+    def testLazyInput(self):
+        ''' a slow stream is read only as slots free up, and results come out before it ends '''
+
+        stub, client = self.client(lambda inputs: 0.02, concurrency=2)
+        cases = slowCases(self.loop, 12, 0.01)
+
+        def check(items):
+            self.assertTrue(cases.read <= len(items) + 2, (cases.read, len(items)))
+            if len(items) == 1:
+                self.assertTrue(cases.read < cases.n, cases.read)
+
+        items = self.collect(client.evaluateMany(cases, ordered=True), check)
+        self.assertEqual([i for i, res in items], list(range(12)))
+        for i, res in items:
+            self.assertEqual(res['rotorDiameter'], 110.0 + i)
+        self.assertTrue(stub.maxInflight <= 2)
+
+    def testLateReplyDropped(self):
+        ''' a request that timed out has its connection dropped, so its reply never answers the next one '''
+
+        stub, client = self.client(lambda inputs: 0.5 if inputs['rotorDiameter'] == SLOW_DIAMETER else 0.15,
+                                   concurrency=1)
+        cases = [{'rotorDiameter' : SLOW_DIAMETER}] + [{'rotorDiameter' : 120.0 + i} for i in range(4)]
+        items = self.collect(client.evaluateMany(cases, timeout=0.2, ordered=True))
+
+        self.assertEqual([i for i, res in items], list(range(5)))
+        self.assertTrue(items[0][1]['error'].startswith('timed out'), items[0][1])
+        for i, res in items[1:]:
+            self.assertEqual(res['rotorDiameter'], cases[i]['rotorDiameter'])
+            self.assertEqual(res['lcoe'], stubLCOE(cases[i]))
+        self.assertEqual(stub.lateReplies, 1)
+        self.assertEqual(stub.connections, 2)
+
+if __name__=="__main__":
+
+    unittest.main()
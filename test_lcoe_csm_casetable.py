@@ -0,0 +1,136 @@
+"""
+test_lcoe_csm_casetable.py
+
+Tests of CaseTable: growth by record() and extend(), structured variable
+tree and fixed-width powerCurve columns, and take/filter/sort/grid.  The
+variable trees are plain objects with list_vars(), so no OpenMDAO is
+needed.
+
+USAGE: python -m unittest test_lcoe_csm_casetable
+"""
+
+import unittest
+import numpy as np
+
+from lcoe_csm_casetable import CaseTable, vartreeDtype
+
+NAMES = ['lcoe.lcoe', 'lcoe.rotorDiameter', 'lcoe.maxTipSpeed']
+
+class tree(object):
+    ''' variable tree stand-in: list_vars() and attributes, possibly nested '''
+
+    def __init__(self, **values):
+        self.__dict__.update(values)
+
+    def list_vars(self):
+        return list(self.__dict__)
+
+def gridColumns():
+    ''' a 4 x 3 grid of diameter and tip speed, shuffled '''
+
+    rd, ts = np.meshgrid([110.0, 120.0, 130.0, 140.0], [75.0, 85.0, 95.0], indexing='ij')
+    order = np.random.RandomState(0).permutation(rd.size)
+    rd, ts = rd.ravel()[order], ts.ravel()[order]
+    return {'lcoe.lcoe' : 0.1 + 1.0e-4 * (rd - 128.0)**2 + 1.0e-5 * ts,
+            'lcoe.rotorDiameter' : rd, 'lcoe.maxTipSpeed' : ts}
+
+#-----------------------------------------
+
+class growthTest(unittest.TestCase):
+
+    def testRecordAndExtend(self):
+        ''' the columns grow past the initial capacity and keep every value in order '''
+
+        cols = gridColumns()
+        table = CaseTable(NAMES, capacity=2)
+        for i in range(5):
+            table.record(dict([(name, cols[name][i]) for name in NAMES]))
+        table.extend(dict([(name, cols[name][5:]) for name in NAMES]))
+        self.assertEqual(len(table), 12)
+        self.assertTrue(len(table.data['lcoe.lcoe']) >= 12)
+        for name in NAMES:
+            self.assertTrue(np.array_equal(table[name], cols[name]), name)
+        self.assertEqual(table[-1]['lcoe.rotorDiameter'], cols['lcoe.rotorDiameter'][-1])
+        self.assertRaises(IndexError, table.__getitem__, 12)
+
+    def testUnequalColumns(self):
+        cols = gridColumns()
+        cols['lcoe.lcoe'] = cols['lcoe.lcoe'][:-1]
+        self.assertRaises(ValueError, CaseTable.fromColumns, cols)
+        self.assertRaises(ValueError, CaseTable(NAMES).extend, cols)
+
+    def testNoColumns(self):
+        table = CaseTable([])
+        table.extend({})
+        table.record({})
+        self.assertEqual(len(table), 1)
+        self.assertEqual(len(CaseTable.fromColumns({})), 0)
+
+#-----------------------------------------
+
+class structuredColumnsTest(unittest.TestCase):
+
+    def testVartreeColumn(self):
+        ''' the numeric fields of a nested variable tree are stored as one record per case '''
+
+        turbine = tree(mass=4.0e5, cost=6.0e6, name='NREL 5MW', rotor=tree(mass=1.1e5))
+        dtype = vartreeDtype(turbine)
+        self.assertEqual(dtype.names, ('cost', 'mass', 'rotor.mass'))
+
+        table = CaseTable(['turbine', 'lcoe.lcoe'], dtypes={'turbine' : dtype}, capacity=1)
+        for i in range(3):
+            turbine.cost = 6.0e6 + i
+            table.record({'turbine' : turbine, 'lcoe.lcoe' : 0.1 + i})
+        table.record({'turbine' : (1.0, 2.0, 3.0), 'lcoe.lcoe' : 0.0})
+        self.assertEqual(table['turbine']['cost'].tolist(), [6.0e6, 6.0e6 + 1, 6.0e6 + 2, 1.0])
+        self.assertEqual(table['turbine']['rotor.mass'].tolist(), [1.1e5] * 3 + [3.0])
+        self.assertEqual(table[1]['turbine']['mass'], 4.0e5)
+
+    def testPowerCurveColumn(self):
+        curves = np.random.RandomState(1).rand(5, 2, 161)
+        table = CaseTable(['powerCurve'], shapes={'powerCurve' : (2, 161)}, capacity=2)
+        for curve in curves[:3]:
+            table.record({'powerCurve' : curve})
+        table.extend({'powerCurve' : curves[3:]})
+        self.assertEqual(table['powerCurve'].shape, (5, 2, 161))
+        self.assertTrue(np.array_equal(table['powerCurve'], curves))
+        self.assertTrue(np.array_equal(table.take([4, 0])['powerCurve'], curves[[4, 0]]))
+
+#-----------------------------------------
+
+class selectionTest(unittest.TestCase):
+
+    def setUp(self):
+        self.cols = gridColumns()
+        self.table = CaseTable.fromColumns(self.cols)
+
+    def testTakeAndFilter(self):
+        rd = self.cols['lcoe.rotorDiameter']
+        self.assertEqual(self.table.take([3, 1])['lcoe.rotorDiameter'].tolist(), [rd[3], rd[1]])
+        small = self.table.filter(rd < 125.0)
+        self.assertEqual(len(small), 6)
+        self.assertTrue(np.all(small['lcoe.rotorDiameter'] < 125.0))
+        self.assertEqual(self.table.argmin('lcoe.lcoe')['lcoe.rotorDiameter'], 130.0)
+
+    def testSort(self):
+        table = self.table.sort('lcoe.maxTipSpeed', 'lcoe.rotorDiameter')
+        keys = zip(table['lcoe.maxTipSpeed'], table['lcoe.rotorDiameter'])
+        self.assertEqual(keys, sorted(keys))
+        unsorted = self.table.sort()
+        for name in NAMES:
+            self.assertTrue(np.array_equal(unsorted[name], self.cols[name]), name)
+
+    def testGrid(self):
+        X, Y, Z = self.table.grid('lcoe.rotorDiameter', 'lcoe.maxTipSpeed', 'lcoe.lcoe')
+        self.assertEqual(X.shape, (4, 3))
+        self.assertEqual(X[:, 0].tolist(), [110.0, 120.0, 130.0, 140.0])
+        self.assertEqual(Y[0].tolist(), [75.0, 85.0, 95.0])
+        self.assertTrue(np.allclose(Z, 0.1 + 1.0e-4 * (X - 128.0)**2 + 1.0e-5 * Y))
+
+    def testIncompleteGrid(self):
+        table = self.table.filter(np.arange(len(self.table)) != 5)
+        self.assertRaises(ValueError, table.grid, 'lcoe.rotorDiameter', 'lcoe.maxTipSpeed', 'lcoe.lcoe')
+
+if __name__=="__main__":
+
+    unittest.main()
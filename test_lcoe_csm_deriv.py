@@ -0,0 +1,178 @@
+"""
+test_lcoe_csm_deriv.py
+
+Tests of the chained lcoe derivatives.  lcoeGradient() is checked on a
+workflow of the NumPy kernel stages, connected as in lcoe_csm_assembly,
+against Jacobians recorded from central differences of scalar runs of the
+CSM modules; the comparison of provideJ() with finite differences of the
+whole assembly is skipped when OpenMDAO and the twister components are not
+installed.
+
+USAGE: python -m unittest test_lcoe_csm_deriv
+"""
+
+import unittest
+import numpy as np
+
+from lcoe_csm_deriv import lcoeGradient, componentJacobian, DERIV_INPUTS, DERIV_OUTPUTS
+from lcoe_csm_kernel import aepKernel, tccKernel, bosKernel, omKernel, finKernel, INPUT_DEFAULTS, AEP_INPUTS, \
+                            STAGE_INPUTS
+
+# d(lcoe, coe)/d(DERIV_INPUTS) recorded at the default inputs and at a 140 m rotor in a 100 turbine plant
+# at 20 m sea depth
+REFERENCE_JACOBIANS = [
+    ({}, {'lcoe' : [-4.589330e-05, -2.027829e-05, 5.980641e-06, -7.123502e-05],
+          'coe'  : [-4.090541e-05, -2.426310e-05, 7.151113e-06, -8.153022e-05]}),
+    ({'seaDepth' : 20.0, 'turbineNumber' : 100, 'rotorDiameter' : 140.0},
+     {'lcoe' : [-4.832814e-05, -5.002161e-06, 5.308279e-06, -1.233783e-04],
+      'coe'  : [-4.308845e-05, -6.144112e-06, 6.292297e-06, -1.440999e-04]}),
+]
+
+# connections of lcoe_csm_assembly between the workflow components and from the inputs differentiated here
+CONNECTIONS = [('rotorDiameter', 'aep1.rotorDiameter'), ('rotorDiameter', 'tcc.rotorDiameter'),
+               ('rotorDiameter', 'bos.rotorDiameter'), ('maxTipSpeed', 'aep1.maxTipSpeed'),
+               ('maxTipSpeed', 'tcc.maxTipSpeed'), ('aep1.ratedWindSpeed', 'tcc.ratedWindSpeed'),
+               ('aep1.maxEfficiency', 'tcc.maxEfficiency'), ('ratedPower', 'aep1.ratedPower'),
+               ('ratedPower', 'tcc.ratedPower'), ('ratedPower', 'bos.ratedPower'), ('ratedPower', 'om.ratedPower'),
+               ('ratedPower', 'fin.ratedPower'), ('hubHeight', 'aep1.hubHeight'), ('hubHeight', 'tcc.hubHeight'),
+               ('hubHeight', 'bos.hubHeight'), ('tcc.turbineCost', 'bos.turbineCost'),
+               ('tcc.turbineCost', 'fin.turbineCost'), ('aep1.aep', 'om.aep'), ('aep1.aep', 'fin.aep'),
+               ('bos.BOScost', 'fin.BOScost'),
+               ('om.plantOM.preventativeMaintenanceCost', 'fin.preventativeMaintenanceCost'),
+               ('om.plantOM.correctiveMaintenanceCost', 'fin.correctiveMaintenanceCost'),
+               ('om.plantOM.landLeaseCost', 'fin.landLeaseCost')]
+
+class stageComponent(object):
+    ''' a workflow component running one kernel stage at scalar inputs '''
+
+    def __init__(self, name, stage, inputs, outputs):
+        self.name = name
+        self.stage = stage
+        self.inputs = inputs
+        self.outputs = outputs    # {output path : kernel output}
+        self.values = {}
+        self.runs = 0
+
+    def get(self, path):
+        return self.values[path]
+
+    def set(self, path, value, force=False):
+        self.values[path] = value
+
+    def run(self):
+        res = self.stage(dict([(name, self.values[name]) for name in self.inputs]))
+        for path, name in self.outputs.items():
+            self.values[path] = float(res[name][0])
+        self.runs += 1
+
+class stageWorkflow(object):
+    ''' the aep1 -> tcc -> bos -> om -> fin workflow of lcoe_csm_assembly on the kernel stages '''
+
+    class driver(object):
+        pass
+
+    def __init__(self, inputs):
+        om = dict([('plantOM.' + name, name) for name in ['preventativeMaintenanceCost', 'correctiveMaintenanceCost',
+                                                         'landLeaseCost']])
+        comps = [stageComponent('aep1', aepKernel, AEP_INPUTS,
+                                {'ratedWindSpeed' : 'ratedWindSpeed', 'maxEfficiency' : 'maxEfficiency', 'aep' : 'aep'}),
+                 stageComponent('tcc', tccKernel, STAGE_INPUTS['tcc'], {'turbineCost' : 'turbineCost'}),
+                 stageComponent('bos', bosKernel, STAGE_INPUTS['bos'], {'BOScost' : 'BOScost'}),
+                 stageComponent('om', omKernel, STAGE_INPUTS['om'], om),
+                 stageComponent('fin', finKernel, STAGE_INPUTS['fin'], {'lcoe' : 'lcoe', 'coe' : 'coe'})]
+        self.driver = stageWorkflow.driver()
+        self.driver.workflow = comps
+        self._connections = CONNECTIONS
+        self._passthroughs = {'lcoe' : 'fin.lcoe', 'coe' : 'fin.coe'}
+
+        byName = dict([(comp.name, comp) for comp in comps])
+        for comp in comps:
+            for name in comp.inputs:
+                if name in inputs:
+                    comp.set(name, inputs[name])
+            comp.run()
+            for src, dest in CONNECTIONS:
+                if src.startswith(comp.name + '.'):
+                    component, path = dest.split('.', 1)
+                    byName[component].set(path, comp.get(src[len(comp.name) + 1:]))
+
+#-----------------------------------------
+
+class lcoeGradientTest(unittest.TestCase):
+
+    def testMatchesReference(self):
+        ''' the chained component differences agree with the recorded Jacobians '''
+
+        for changes, expected in REFERENCE_JACOBIANS:
+            workflow = stageWorkflow(dict(INPUT_DEFAULTS, **changes))
+            J = lcoeGradient(workflow, DERIV_INPUTS, ['lcoe', 'coe'])
+            for k, out in enumerate(['lcoe', 'coe']):
+                for j, name in enumerate(DERIV_INPUTS):
+                    ref = expected[out][j]
+                    self.assertTrue(abs(J[k, j] - ref) <= 1.0e-4 * abs(ref), (changes, out, name, J[k, j], ref))
+
+    def testComponentDifferences(self):
+        ''' aep1 is differenced on its own, with one run per input and one to restore its outputs '''
+
+        workflow = stageWorkflow(INPUT_DEFAULTS)
+        aep1 = workflow.driver.workflow[0]
+        runs = aep1.runs
+        before = aep1.get('aep')
+        J = componentJacobian(aep1, ['rotorDiameter', 'ratedPower'], ['aep', 'ratedWindSpeed'])
+        self.assertEqual(J.shape, (2, 2))
+        self.assertEqual(aep1.runs - runs, 3)
+        self.assertEqual(aep1.get('aep'), before)
+
+    def testProvidedJacobian(self):
+        ''' a component's own provideJ() is used when it covers the requested inputs and outputs '''
+
+        class provided(stageComponent):
+            def list_deriv_vars(self):
+                return ('a', 'b'), ('y', 'z')
+            def provideJ(self):
+                return np.array([[1.0, 2.0], [3.0, 4.0]])
+
+        comp = provided('c', None, [], {})
+        self.assertEqual(componentJacobian(comp, ['b'], ['z', 'y']).tolist(), [[4.0], [2.0]])
+
+#-----------------------------------------
+
+class provideJTest(unittest.TestCase):
+    ''' lcoe_csm_assembly.provideJ() against central differences of the full assembly '''
+
+    @classmethod
+    def setUpClass(cls):
+        try:
+            from lcoe_csm_assembly import lcoe_csm_assembly
+        except ImportError:
+            raise unittest.SkipTest('OpenMDAO and the twister components are not installed')
+        cls.lcoe = lcoe_csm_assembly()
+        cls.lcoe.quiet = True
+
+    def testMatchesAssemblyDifferences(self):
+        lcoe = self.lcoe
+        lcoe.execute()
+        J = lcoe.provideJ()
+
+        fd = np.zeros((len(DERIV_OUTPUTS), len(DERIV_INPUTS)))
+        for j, name in enumerate(DERIV_INPUTS):
+            x = getattr(lcoe, name)
+            h = 1.0e-4 * abs(x)
+            vals = []
+            for value in (x + h, x - h):
+                setattr(lcoe, name, value)
+                lcoe.execute()
+                vals.append([getattr(lcoe, out) for out in DERIV_OUTPUTS])
+            setattr(lcoe, name, x)
+            fd[:, j] = (np.array(vals[0]) - np.array(vals[1])) / (2.0 * h)
+        lcoe.execute()
+
+        for k in range(len(DERIV_OUTPUTS)):
+            for j in range(len(DERIV_INPUTS)):
+                self.assertTrue(abs(J[k, j] - fd[k, j]) <= 1.0e-3 * abs(fd[k, j]) + 1.0e-12,
+                                '{:}/{:}: provideJ {:g}, differences {:g}'.format(
+                                DERIV_OUTPUTS[k], DERIV_INPUTS[j], J[k, j], fd[k, j]))
+
+if __name__=="__main__":
+
+    unittest.main()
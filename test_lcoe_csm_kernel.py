@@ -0,0 +1,248 @@
+"""
+test_lcoe_csm_kernel.py
+
+Tests of the NumPy LCOE kernel.  The equation tests need only NumPy and
+compare the kernel with values recorded from scalar runs of the CSM aero,
+AEP and cost modules; the comparison with lcoe_csm_assembly is skipped
+when OpenMDAO and the twister components are not installed.
+
+USAGE: python -m unittest test_lcoe_csm_kernel
+"""
+
+import os, sys, json, subprocess, tempfile, unittest
+from StringIO import StringIO
+import numpy as np
+
+from lcoe_csm_kernel import (lcoeKernel, lcoeKernelBatch, lcoeCalibration, aepKernel, powerCurve, kernelStream,
+                             KERNEL_OUTPUTS)
+
+# NREL 5-MW reference turbine in a 100 turbine plant
+REFERENCE = {'rotorDiameter' : 126.0, 'maxTipSpeed' : 80.0, 'bladeNumber' : 3, 'advancedBlade' : False,
+             'maxPowerCoefficient' : 0.488, 'optTipSpeedRatio' : 7.525, 'cutInWindSpeed' : 3.0,
+             'cutOutWindSpeed' : 25.0, 'thrustCoefficient' : 0.5, 'ratedPower' : 5000.0, 'drivetrainDesign' : 1,
+             'crane' : True, 'advancedBedplate' : 0, 'hubHeight' : 90.0, 'windSpeed50m' : 8.02, 'weibullK' : 2.15,
+             'shearExponent' : 0.2, 'seaDepth' : 20.0, 'altitude' : 0.0, 'airDensity' : 0.0, 'year' : 2009,
+             'month' : 12, 'turbineNumber' : 100, 'soilingLosses' : 0.0, 'arrayLosses' : 0.1,
+             'availability' : 0.941, 'fixedChargeRate' : 0.12, 'constructionTime' : 1.0, 'projectLifetime' : 20.0}
+
+# aep1 of the CSM recorded at REFERENCE and two other turbines (one with a given air density); the power
+# curve at 3, 4, ..., 15 m/s
+AEP_CASES = [
+    ({}, {'aep' : 1833651292.34, 'capacityFactor' : 0.418641847567, 'ratedWindSpeed' : 11.5064002636,
+          'ratedRotorSpeed' : 12.1260909022,
+          'powerCurve' : [0.0, 144.771389871, 350.858866106, 658.300838849, 1087.3682074, 1658.33187107,
+                          2391.46272915, 3307.03168094, 4415.71725613, 5000.0, 5000.0, 5000.0, 5000.0]}),
+    ({'rotorDiameter' : 100.0, 'maxTipSpeed' : 75.0, 'ratedPower' : 2500.0, 'drivetrainDesign' : 4,
+      'hubHeight' : 80.0, 'altitude' : 1200.0, 'windSpeed50m' : 7.2, 'weibullK' : 1.9, 'shearExponent' : 0.14,
+      'cutInWindSpeed' : 4.0, 'cutOutWindSpeed' : 22.0, 'maxPowerCoefficient' : 0.47, 'optTipSpeedRatio' : 8.0,
+      'availability' : 0.97, 'arrayLosses' : 0.05, 'soilingLosses' : 0.02, 'turbineNumber' : 30},
+     {'aep' : 237476568.181, 'capacityFactor' : 0.361455963746, 'ratedWindSpeed' : 11.4697731739,
+      'ratedRotorSpeed' : 14.3239448783,
+      'powerCurve' : [0.0, 0.0, 214.879522977, 389.709634988, 630.964129313, 947.054334308, 1344.63445163,
+                      1818.74807974, 2285.63581339, 2500.0, 2500.0, 2500.0, 2500.0]}),
+    ({'rotorDiameter' : 100.0, 'maxTipSpeed' : 75.0, 'ratedPower' : 2500.0, 'drivetrainDesign' : 2,
+      'hubHeight' : 80.0, 'altitude' : 1200.0, 'airDensity' : 1.15, 'windSpeed50m' : 7.2, 'weibullK' : 1.9,
+      'shearExponent' : 0.14, 'cutInWindSpeed' : 4.0, 'cutOutWindSpeed' : 22.0, 'maxPowerCoefficient' : 0.47,
+      'optTipSpeedRatio' : 8.0, 'availability' : 0.97, 'arrayLosses' : 0.05, 'soilingLosses' : 0.02,
+      'turbineNumber' : 30},
+     {'aep' : 242437781.18, 'capacityFactor' : 0.36900727729, 'ratedWindSpeed' : 11.2306646763,
+      'ratedRotorSpeed' : 14.3239448783,
+      'powerCurve' : [0.0, 0.0, 216.66440439, 399.719538908, 652.483175078, 983.943377339, 1401.35049734,
+                      1898.35110306, 2388.86425406, 2500.0, 2500.0, 2500.0, 2500.0]}),
+]
+
+# tcc, bos, om and fin of the CSM, escalated with its PPI tables, recorded at REFERENCE (offshore, depth class 2),
+# a land plant and a depth class 3 plant
+COST_CASES = [
+    ({}, {'turbineCost' : 6087803.62308, 'turbineMass' : 790893.211096, 'BOScost' : 766877526.639,
+          'OnMcost' : 50560221.8119, 'coe' : 0.106571560567, 'lcoe' : 0.1008683759}),
+    (dict(AEP_CASES[1][0], drivetrainDesign=3, seaDepth=0.0, year=2005, month=3, advancedBlade=True),
+     {'turbineCost' : 2239550.43059, 'turbineMass' : 398472.091107, 'BOScost' : 22888789.3571,
+      'OnMcost' : 2921973.46022, 'coe' : 0.0540003463142, 'lcoe' : 0.0503886837503}),
+    ({'seaDepth' : 45.0, 'year' : 2010, 'month' : 6},
+     {'turbineCost' : 6308003.14027, 'turbineMass' : 790893.211096, 'BOScost' : 1086845743.41,
+      'OnMcost' : 51903717.5199, 'coe' : 0.129391972397, 'lcoe' : 0.119822145288}),
+]
+RECORDED_RTOL = 1.0e-10
+
+# outputs compared with the assembly and their relative tolerance
+COMPARED = ['aep', 'aepPerTurbine', 'capacityFactor', 'ratedWindSpeed', 'ratedRotorSpeed', 'turbineCost',
+            'turbineMass', 'BOScost', 'OnMcost', 'coe', 'lcoe']
+RTOL = 1.0e-6
+
+def designs(n, seed=1):
+    ''' n random design points covering every drivetrain, blade type and BOS depth class of the CSM '''
+
+    rng = np.random.RandomState(seed)
+    return {'rotorDiameter'    : rng.uniform(90.0, 150.0, n),
+            'maxTipSpeed'      : rng.uniform(70.0, 90.0, n),
+            'ratedPower'       : rng.uniform(2000.0, 7000.0, n),
+            'hubHeight'        : rng.uniform(70.0, 120.0, n),
+            'drivetrainDesign' : np.arange(n) % 4 + 1,
+            'advancedBlade'    : np.arange(n) % 2,
+            'seaDepth'         : np.array([0.0, 15.0, 40.0])[np.arange(n) % 3],
+            'windSpeed50m'     : rng.uniform(6.5, 9.5, n),
+            'weibullK'         : rng.uniform(1.8, 2.6, n)}
+
+#-----------------------------------------
+
+class kernelEquationsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.cal = lcoeCalibration(REFERENCE, reference=True)
+
+    def testReferenceTurbine(self):
+        ''' rated operating point of the CSM 5-MW reference turbine '''
+
+        res = aepKernel(REFERENCE)
+        self.assertAlmostEqual(res['maxEfficiency'][0], 0.90201, places=10)
+        self.assertAlmostEqual(res['ratedWindSpeed'][0], 11.5064, places=4)
+        self.assertAlmostEqual(res['ratedRotorSpeed'][0], 12.1261, places=4)
+
+    def testRecordedAEP(self):
+        ''' power curve, AEP, capacity factor and rated point against aep1 of the CSM '''
+
+        for changes, expected in AEP_CASES:
+            x = dict(REFERENCE, **changes)
+            res = aepKernel(x)
+            for name in ['aep', 'capacityFactor', 'ratedWindSpeed', 'ratedRotorSpeed']:
+                self.assertTrue(abs(res[name][0] / expected[name] - 1.0) < RECORDED_RTOL, (name, changes))
+            curve = powerCurve(x)[0][12:61:4]
+            self.assertTrue(np.allclose(curve, expected['powerCurve'], rtol=RECORDED_RTOL, atol=0.0), changes)
+
+    def testRecordedCosts(self):
+        ''' the default calibration escalates every line item with the CSM's PPI tables '''
+
+        for changes, expected in COST_CASES:
+            res = lcoeKernel(dict(REFERENCE, **changes), sorted(expected))
+            for name in expected:
+                self.assertTrue(abs(res[name] / expected[name] - 1.0) < RECORDED_RTOL, (name, changes))
+
+    def testNoFramework(self):
+        ''' the default calibration imports neither OpenMDAO nor the assembly '''
+
+        out = subprocess.check_output([sys.executable, '-c',
+            'import sys; from lcoe_csm_kernel import lcoeKernel; lcoeKernel({"rotorDiameter" : 130.0}); '
+            'print sorted([m for m in sys.modules if m.split(".")[0] in ("openmdao", "twister", "lcoe_csm_assembly")])'])
+        self.assertEqual(out.strip(), '[]')
+
+    def testOutsideTables(self):
+        ''' dates without PPI data and deep water plants raise ValueError instead of building the assembly '''
+
+        self.assertRaises(ValueError, lcoeKernel, {'year' : 2012})
+        self.assertRaises(ValueError, lcoeKernel, {'year' : 2011, 'month' : 9})
+        self.assertRaises(ValueError, lcoeKernel, {'seaDepth' : 80.0})
+        res = lcoeKernel({'year' : 2012}, calibration=self.cal)
+        self.assertTrue(res['lcoe'] > 0.0)
+
+    def testBatchMatchesPoints(self):
+        ''' a vectorized batch over mixed calibration groups equals point by point evaluation '''
+
+        cases = designs(12)
+        batch = lcoeKernelBatch(cases, KERNEL_OUTPUTS, self.cal)
+        for i in range(12):
+            point = lcoeKernel(dict([(name, cases[name][i]) for name in cases]), KERNEL_OUTPUTS, self.cal)
+            for name in KERNEL_OUTPUTS:
+                self.assertAlmostEqual(batch[name][i] / point[name], 1.0, places=12, msg=name)
+
+    def testCalibrationFile(self):
+        ''' saved factors are used in place of the PPI tables when loaded '''
+
+        escalated = lcoeCalibration(REFERENCE)
+        before = lcoeKernelBatch(designs(6), KERNEL_OUTPUTS, escalated)
+        fd, filename = tempfile.mkstemp(suffix='.json')
+        os.close(fd)
+        try:
+            lcoeCalibration(REFERENCE, escalated.escalated).save(filename)
+            loaded = lcoeCalibration.load(filename)
+        finally:
+            os.remove(filename)
+        self.assertEqual(sorted(loaded.factors['tcc']), sorted(escalated.escalated['tcc']))
+        after = lcoeKernelBatch(designs(6), KERNEL_OUTPUTS, loaded)
+        self.assertEqual(loaded.escalated['tcc'], {})
+        for name in KERNEL_OUTPUTS:
+            self.assertTrue(np.array_equal(before[name], after[name]), name)
+
+    def testUnknownInput(self):
+        self.assertRaises(ValueError, lcoeKernel, {'rotorDiam' : 120.0}, ['lcoe'], self.cal)
+
+#-----------------------------------------
+
+class kernelBatchTest(unittest.TestCase):
+    ''' lcoeBatch and the -batch scenarios are evaluated with the kernel without the framework '''
+
+    def testBatchUsesKernel(self):
+        out = subprocess.check_output([sys.executable, '-c',
+            'import sys; from lcoe_csm_batch import lcoeBatch; lcoeBatch({"rotorDiameter" : [120.0, 130.0]}); '
+            'print sorted([m for m in sys.modules if m.split(".")[0] in ("openmdao", "twister", "lcoe_csm_assembly")])'])
+        self.assertEqual(out.strip(), '[]')
+
+    def testStreamMatchesBatch(self):
+        ''' chunks, inputs under every case and per case errors keep the case order '''
+
+        cases = designs(7)
+        rows = [dict([(name, float(cases[name][i])) for name in cases]) for i in range(7)]
+        rows[2] = dict(rows[2], rotorDiam=120.0)
+        rows[5] = 'not a case'
+        expected = lcoeKernelBatch(dict(cases, altitude=500.0), KERNEL_OUTPUTS)
+        res = list(kernelStream(rows, KERNEL_OUTPUTS, {'altitude' : 500.0}, chunkSize=3))
+        self.assertEqual([index for index, vals, err in res], range(7))
+        for index, vals, err in res:
+            if index in (2, 5):
+                self.assertTrue(vals is None and err.startswith('ValueError'), err)
+                continue
+            self.assertTrue(err is None, err)
+            for name, value in zip(KERNEL_OUTPUTS, vals):
+                self.assertEqual(value, expected[name][index], name)
+
+    def testRunBatch(self):
+        from lcoe_csm_batch import runBatch, BATCH_OUTPUTS
+
+        ofh = StringIO()
+        stderr, sys.stderr = sys.stderr, StringIO()
+        try:
+            nerr = runBatch(StringIO('{"rotorDiameter" : 120.0}\n{"rotorDiameter" : -1.0}\n'), ofh)
+        finally:
+            sys.stderr = stderr
+        lines = [json.loads(line) for line in ofh.getvalue().splitlines()]
+        self.assertEqual(nerr, 1)
+        self.assertEqual([line['index'] for line in lines], [0, 1])
+        expected = lcoeKernel({'rotorDiameter' : 120.0})
+        for name in BATCH_OUTPUTS:
+            self.assertEqual(lines[0][name], expected[name], name)
+        self.assertTrue('error' in lines[1])
+
+#-----------------------------------------
+
+class kernelAssemblyTest(unittest.TestCase):
+    ''' the kernel against lcoe_csm_assembly over designs spanning the model's configurations '''
+
+    @classmethod
+    def setUpClass(cls):
+        try:
+            from lcoe_csm_assembly import lcoe_csm_assembly
+        except ImportError:
+            raise unittest.SkipTest('OpenMDAO and the twister components are not installed')
+        from lcoe_csm_cache import fullInputs
+        cls.lcoe = lcoe_csm_assembly()
+        cls.lcoe.quiet = True
+        cls.cal = lcoeCalibration(fullInputs(cls.lcoe))
+
+    def testCalibration(self):
+        ''' factors fitted against the components agree with the PPI tables '''
+
+        self.assertTrue(lcoeCalibration().calibrate() < RTOL)
+
+    def testMatchesAssembly(self):
+        from lcoe_csm_batch import lcoeBatch
+
+        cases = designs(24)
+        expected = lcoeBatch(cases, COMPARED, self.lcoe)
+        res = lcoeKernelBatch(cases, COMPARED, self.cal)
+        for name in COMPARED:
+            err = np.abs(res[name] / expected[name] - 1.0).max()
+            self.assertTrue(err < RTOL, '{:} differs from the assembly by {:.2e}'.format(name, err))
+
+if __name__=="__main__":
+
+    unittest.main()
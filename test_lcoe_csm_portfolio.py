@@ -0,0 +1,78 @@
+"""
+test_lcoe_csm_portfolio.py
+
+Tests of the designs x sites portfolio evaluation.  The site ordering
+test needs only NumPy; the component run counts are checked on
+lcoe_csm_assembly and skipped when OpenMDAO and the twister components
+are not installed.
+
+USAGE: python -m unittest test_lcoe_csm_portfolio
+"""
+
+import unittest
+import numpy as np
+
+from lcoe_csm_portfolio import portfolio, siteOrder
+
+DESIGNS = {'rotorDiameter' : [110.0, 120.0, 130.0],
+           'ratedPower'    : [4000.0, 5000.0, 5000.0]}
+
+# 8 sites in 3 tcc groups, each site with its own wind resource, listed out of order
+SITES = {'windSpeed50m' : [8.0, 7.0, 9.0, 7.5, 8.5, 6.5, 9.5, 7.2],
+         'weibullK'     : [2.0, 2.1, 2.2, 2.0, 1.9, 2.3, 2.0, 2.1],
+         'altitude'     : [0.0, 500.0, 0.0, 500.0, 0.0, 0.0, 500.0, 0.0],
+         'seaDepth'     : [0.0, 0.0, 20.0, 0.0, 0.0, 20.0, 0.0, 20.0]}
+NGROUPS = 3
+
+#-----------------------------------------
+
+class siteOrderTest(unittest.TestCase):
+
+    def testGroupsAreContiguous(self):
+        ''' sites sharing the tcc inputs are adjacent, so each group is entered once '''
+
+        order = siteOrder(dict([(name, np.array(SITES[name])) for name in SITES]))
+        self.assertEqual(sorted(order), range(len(SITES['altitude'])))
+        groups = [(SITES['altitude'][k], SITES['seaDepth'][k]) for k in order]
+        changes = len([i for i in range(1, len(groups)) if groups[i] != groups[i-1]])
+        self.assertEqual(changes, NGROUPS - 1)
+
+#-----------------------------------------
+
+class componentRunsTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        try:
+            from lcoe_csm_assembly import lcoe_csm_assembly
+        except ImportError:
+            raise unittest.SkipTest('OpenMDAO and the twister components are not installed')
+
+    def testStagesRunOncePerGroup(self):
+        ''' aep1, om and fin run once per pair; tcc and bos once per design and tcc site group '''
+
+        res = portfolio(DESIGNS, SITES, outputs=['lcoe'])
+        ndesigns, nsites = res['lcoe'].shape
+        runs = res['componentRuns']
+        for name in ['aep1', 'om', 'fin']:
+            self.assertEqual(runs[name], ndesigns * nsites, name)
+        for name in ['tcc', 'bos']:
+            self.assertEqual(runs[name], ndesigns * NGROUPS, name)
+
+    def testMatchesPairwise(self):
+        ''' the factorized matrix equals evaluating every pair from scratch '''
+
+        from lcoe_csm_assembly import lcoe_csm_assembly
+        res = portfolio(DESIGNS, SITES, outputs=['lcoe'])
+        for i in range(len(DESIGNS['rotorDiameter'])):
+            for j in range(len(SITES['altitude'])):
+                case = dict([(name, DESIGNS[name][i]) for name in DESIGNS])
+                case.update(dict([(name, SITES[name][j]) for name in SITES]))
+                lcoe = lcoe_csm_assembly(case)
+                lcoe.quiet = True
+                lcoe.execute()
+                self.assertAlmostEqual(res['lcoe'][i, j], lcoe.lcoe, places=12)
+
+if __name__=="__main__":
+
+    unittest.main()